@@ -0,0 +1,92 @@
+"""
+Benchmark do carregamento da base: loader legado (load_workbook completo + listas
++ DataFrame + codigos.json + _build_index) contra o loader em streaming
+(carregar_indice_base).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_carregar_base --linhas 200000
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+from core.excel_processor import carregar_indice_base
+from core.fast_code_generator import _build_index
+
+
+def gerar_base_sintetica(caminho: str, linhas: int, digitos: int = 4, seed: int = 42):
+    """Cria uma base 'aba1' com códigos aleatórios nas colunas A e B."""
+    rnd = random.Random(seed)
+    siglas = ["".join(rnd.choices(string.ascii_uppercase, k=3)) for _ in range(500)]
+    limite = 10 ** digitos - 1
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("aba1")
+    ws.append(["Codigo A", "Codigo B"])
+    for _ in range(linhas):
+        a = f"{rnd.choice(siglas)}{str(rnd.randint(1, limite)).zfill(digitos)}"
+        b = f"{rnd.choice(siglas)}{str(rnd.randint(1, limite)).zfill(digitos)}"
+        ws.append([a, b])
+    wb.save(caminho)
+
+
+def loader_legado(filepath: str, digitos: int, aba: str = "aba1"):
+    """Reprodução fiel do fluxo antigo: tudo em memória antes de indexar."""
+    wb = load_workbook(filepath)
+    ws = wb[aba]
+    dados_a, dados_b = [], []
+    for row in ws.iter_rows(min_row=2, max_col=2, values_only=True):
+        dados_a.append(row[0] if row[0] else None)
+        dados_b.append(row[1] if len(row) > 1 and row[1] else None)
+    df = pd.DataFrame({'Codigo': dados_a + dados_b}).dropna()
+    with open(os.path.join(os.path.dirname(filepath), "codigos.json"), "w") as f:
+        json.dump(df.to_dict(orient="records"), f)
+    return _build_index(df, digitos)
+
+
+def medir(func, *args):
+    """Tempo e pico de memória medidos em execuções separadas (tracemalloc distorce o tempo)."""
+    t0 = time.perf_counter()
+    resultado = func(*args)
+    duracao = time.perf_counter() - t0
+
+    tracemalloc.start()
+    func(*args)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, duracao, pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--digitos", type=int, choices=(3, 4), default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, "base.xlsx")
+        print(f"Gerando base sintética com {args.linhas} linhas...")
+        gerar_base_sintetica(caminho, args.linhas, args.digitos)
+
+        idx_legado, t_legado, mem_legado = medir(loader_legado, caminho, args.digitos)
+        idx_stream, t_stream, mem_stream = medir(carregar_indice_base, caminho, args.digitos)
+
+    if idx_legado != idx_stream:
+        raise SystemExit("ERRO: os índices gerados pelos dois loaders diferem.")
+
+    print(f"Legado:    {t_legado:8.2f} s | pico {mem_legado / 2**20:8.1f} MiB")
+    print(f"Streaming: {t_stream:8.2f} s | pico {mem_stream / 2**20:8.1f} MiB")
+    print(f"Speedup:   {t_legado / t_stream:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
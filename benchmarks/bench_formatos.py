@@ -0,0 +1,83 @@
+"""
+Pipeline completo por formato de entrada/saída: tempo, vazão (siglas/s) e pico
+de memória (RSS), cada variante em um processo novo.
+
+- xlsx: base e entrada .xlsx, resultado em arquivo separado (modo 'arquivo');
+- csv: base e entrada .csv, resultado em <entrada>_RESULTADO.csv, em blocos;
+- fluxo: entrada .csv pela entrada padrão e resultado na saída padrão, como em
+  'cat entrada.csv | python -m core.cli --base base.csv --entrada - --destino -'.
+
+Nas variantes em texto a memória depende do bloco (formatos.TAMANHO_BLOCO_SIGLAS)
+e não do tamanho da entrada: aumente --linhas-entrada para conferir.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_formatos --linhas-base 200000 --linhas-entrada 1000000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.gerador import ParametrosDados, adicionar_argumentos, gerar_arquivos, parametros_dos_argumentos
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_MEDIR = r"""
+import json, sys, time
+sys.path.insert(0, {raiz!r})
+t0 = time.perf_counter()
+from core.excel_processor import MODO_ARQUIVO
+from core.metricas import pico_rss_mb
+from core.pipeline import processar_arquivos
+(_, _, gerados), = processar_arquivos({base!r}, [{entrada!r}], {digitos}, usar_cache=False, usar_ledger=False,
+                                      usar_snapshot=False, modo_saida=MODO_ARQUIVO, destino={destino!r})
+sys.stdout.flush()
+print(json.dumps({{"tempo_s": time.perf_counter() - t0, "pico_rss_mb": pico_rss_mb(), "gerados": gerados}}),
+      file=sys.stderr)
+"""
+
+
+def _rodar(base: str, entrada: str, digitos: int, destino=None, stdin=None) -> dict:
+    codigo = _MEDIR.format(raiz=RAIZ, base=base, entrada=entrada, digitos=digitos, destino=destino)
+    with open(stdin, "rb") if stdin else open(os.devnull, "rb") as fluxo:
+        saida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, stdin=fluxo, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.PIPE, text=True)
+    if saida.returncode != 0:
+        raise SystemExit(f"ERRO na medição:\n{saida.stderr}")
+    return json.loads(saida.stderr.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    adicionar_argumentos(parser, ParametrosDados(linhas_base=200_000, linhas_entrada=200_000, siglas=2_000))
+    args = parser.parse_args()
+    p = parametros_dos_argumentos(args)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        c = gerar_arquivos(pasta, p)
+        # A entrada .xlsx do gerador não tem cabeçalho (as siglas começam na linha 1)
+        with open(c["entrada_csv"], encoding="utf-8") as origem, \
+                open(os.path.join(pasta, "siglas.csv"), "w", encoding="utf-8") as f:
+            next(origem)
+            f.writelines(origem)
+        c["entrada_csv"] = f.name
+        medidas = {
+            "xlsx": _rodar(c["base_xlsx"], c["entrada_xlsx"], p.digitos),
+            "csv": _rodar(c["base_csv"], c["entrada_csv"], p.digitos),
+            "fluxo (stdin/stdout)": _rodar(c["base_csv"], "-", p.digitos, destino="-", stdin=c["entrada_csv"]),
+        }
+    if len({m["gerados"] for m in medidas.values()}) != 1:
+        raise SystemExit(f"ERRO: quantidade de códigos difere entre os formatos: {medidas}")
+
+    print(f"Base: {p.linhas_base:,} códigos | entrada: {p.linhas_entrada:,} siglas")
+    print(f"{'':<22}{'tempo (s)':>12}{'siglas/s':>12}{'pico RSS (MiB)':>16}")
+    for nome, m in medidas.items():
+        rss = f"{m['pico_rss_mb']:.0f}" if m["pico_rss_mb"] is not None else "n/d"
+        print(f"{nome:<22}{m['tempo_s']:>12.2f}{p.linhas_entrada / m['tempo_s']:>12,.0f}{rss:>16}")
+
+
+if __name__ == "__main__":
+    main()
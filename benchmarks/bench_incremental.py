@@ -0,0 +1,89 @@
+"""
+Base que cresce por linhas no fim: atualização incremental do índice em cache
+(core.base_incremental) contra a reconstrução completa, em .xlsx e .csv.
+
+Para cada formato: grava a base, monta o cache (leitura completa), acrescenta
+--novas linhas no fim e mede obter_indice, que deve ler só elas; depois edita
+uma linha do começo, o que obriga a reconstruir. Confere que os índices batem
+com uma leitura completa do arquivo final.
+
+O tempo incremental deve acompanhar --novas, não --linhas-base (o resto é só
+descompactar e conferir os digests dos blocos já vistos): varie um de cada vez.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_incremental --linhas-base 400000 --novas 5000
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+from typing import List, Optional, Tuple
+
+from openpyxl import Workbook
+
+from benchmarks.gerador import ParametrosDados, adicionar_argumentos, gerar_dados, parametros_dos_argumentos
+from core.formatos import indexar_base
+from core.index_cache import obter_indice
+
+Par = Tuple[Optional[str], Optional[str]]
+
+
+def _gravar(caminho: str, pares: List[Par]):
+    if caminho.endswith(".csv"):
+        with open(caminho, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["Codigo A", "Codigo B"])
+            w.writerows([a or "", b or ""] for a, b in pares)
+        return
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("aba1")
+    ws.append(["Codigo A", "Codigo B"])
+    for par in pares:
+        ws.append(list(par))
+    wb.save(caminho)
+
+
+def _medir(funcao, *args, **kwargs):
+    t0 = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    return resultado, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    adicionar_argumentos(parser, ParametrosDados(linhas_base=400_000, siglas=2_000))
+    parser.add_argument("--novas", type=int, default=5_000, help="linhas acrescentadas no fim da base")
+    args = parser.parse_args()
+    p = parametros_dos_argumentos(args)
+
+    codigos, _ = gerar_dados(p)
+    pares: List[Par] = [(codigos[i], codigos[i + 1] if i + 1 < len(codigos) else None)
+                        for i in range(0, len(codigos), 2)]
+    antigas, novas = pares[:-args.novas], pares[-args.novas:]
+    editadas = [("ZZZ0001", "ZZZ0002")] + antigas[1:] + novas
+
+    print(f"Base: {len(antigas):,} linhas + {len(novas):,} novas ({p.linhas_base:,} códigos)")
+    print(f"{'':<8}{'completa (s)':>14}{'incremental (s)':>17}{'após edição (s)':>17}")
+    for ext in (".xlsx", ".csv"):
+        with tempfile.TemporaryDirectory() as pasta:
+            base, cache = os.path.join(pasta, "base" + ext), os.path.join(pasta, "cache")
+            _gravar(base, antigas)
+            obter_indice(base, p.digitos, cache_dir=cache)
+
+            _gravar(base, antigas + novas)
+            inc, t_inc = _medir(obter_indice, base, p.digitos, cache_dir=cache)
+            ref, t_ref = _medir(indexar_base, base, p.digitos)
+            if inc != ref:
+                raise SystemExit(f"ERRO ({ext}): índice incremental difere da leitura completa")
+
+            _gravar(base, editadas)
+            ed, t_ed = _medir(obter_indice, base, p.digitos, cache_dir=cache)
+            if ed != indexar_base(base, p.digitos):
+                raise SystemExit(f"ERRO ({ext}): índice após edição difere da leitura completa")
+        print(f"{ext:<8}{t_ref:>14.2f}{t_inc:>17.2f}{t_ed:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
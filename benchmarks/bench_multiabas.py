@@ -0,0 +1,72 @@
+"""
+Base espalhada em várias abas e colunas: leitura aba a aba em um processo só
+contra uma aba por processo (carregar_indice_base com workers), mais a base
+consolidada em 'aba1' (colunas A e B) como referência. Confere que os três
+índices são iguais.
+
+Com workers >= nº de abas, o tempo paralelo deve ficar perto do de uma aba
+(total consolidado / nº de abas), mais a partida dos processos.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_multiabas --linhas-base 400000 --abas 4 --colunas 3
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.gerador import (
+    ParametrosDados,
+    adicionar_argumentos,
+    gerar_dados,
+    gravar_base_multiabas_xlsx,
+    gravar_base_xlsx,
+    parametros_dos_argumentos,
+)
+from core.excel_processor import ABA_TODAS, carregar_indice_base
+
+
+def _medir(funcao, *args, **kwargs):
+    t0 = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    return resultado, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    adicionar_argumentos(parser, ParametrosDados(linhas_base=400_000, siglas=2_000))
+    parser.add_argument("--abas", type=int, default=4)
+    parser.add_argument("--colunas", type=int, default=3, help="colunas de códigos por aba")
+    parser.add_argument("--workers", type=int, default=0, help="processos (0 = nº de abas)")
+    parser.add_argument("--especificacao", default=ABA_TODAS,
+                        help="abas/colunas lidas (padrão: '*', todas as abas com colunas detectadas)")
+    args = parser.parse_args()
+    p = parametros_dos_argumentos(args)
+    workers = args.workers or args.abas
+
+    with tempfile.TemporaryDirectory() as pasta:
+        codigos, _ = gerar_dados(p)
+        consolidada = os.path.join(pasta, "consolidada.xlsx")
+        multiabas = os.path.join(pasta, "multiabas.xlsx")
+        gravar_base_xlsx(consolidada, codigos)
+        gravar_base_multiabas_xlsx(multiabas, codigos, args.abas, args.colunas)
+
+        ref, t_ref = _medir(carregar_indice_base, consolidada, p.digitos)
+        seq, t_seq = _medir(carregar_indice_base, multiabas, p.digitos, args.especificacao, workers=1)
+        par, t_par = _medir(carregar_indice_base, multiabas, p.digitos, args.especificacao, workers=workers)
+
+    if not (ref == seq == par):
+        raise SystemExit("ERRO: os índices diferem entre a base consolidada e a base em várias abas")
+
+    print(f"Base: {p.linhas_base:,} códigos em {args.abas} abas x {args.colunas} colunas "
+          f"(especificação '{args.especificacao}')")
+    print(f"{'consolidada (aba1, A:B)':<32}{t_ref:8.2f} s")
+    print(f"{'várias abas, um processo':<32}{t_seq:8.2f} s")
+    print(f"{f'várias abas, {workers} processo(s)':<32}{t_par:8.2f} s  ({t_seq / t_par:.1f}x)")
+    if (os.cpu_count() or 1) < workers:
+        print(f"(só {os.cpu_count()} CPU(s) disponível(is): os processos disputam a mesma CPU)")
+
+
+if __name__ == "__main__":
+    main()
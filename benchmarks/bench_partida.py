@@ -0,0 +1,136 @@
+"""
+Tempo de partida da GUI: garante que pandas/numpy/openpyxl ficam fora do
+caminho até a primeira janela e mede esse tempo, comparando com a linha de base.
+
+Verificações (cada medição roda em um processo Python novo; vale a menor de N):
+- importação: 'import main' não pode carregar nenhum módulo de MODULOS_PESADOS;
+  mede o tempo dessa importação;
+- janela: roda main.py com GERADOR_CODIGOS_MEDIR_PARTIDA=1 e lê o tempo até a
+  primeira janela desenhada (medido pelo próprio app) e o total desde o início
+  do processo. Precisa de um display (no Linux sem DISPLAY, é pulada).
+
+Sai com código 1 se um módulo pesado for importado na partida ou se algum tempo
+passar da linha de base além do limite. A linha de base depende da máquina:
+grave a sua com --gravar-baseline.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_partida
+    python -m benchmarks.bench_partida --gravar-baseline
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PADRAO = os.path.join(os.path.dirname(__file__), "baseline_partida.json")
+MODULOS_PESADOS = ("pandas", "numpy", "openpyxl", "sqlite3")
+VAR_MEDIR_PARTIDA = "GERADOR_CODIGOS_MEDIR_PARTIDA"  # ver main.py
+
+_SONDA_IMPORTACAO = """
+import sys, time, json
+t0 = time.perf_counter()
+import main
+ms = (time.perf_counter() - t0) * 1000
+print(json.dumps({"ms": ms, "pesados": [m for m in %r if m in sys.modules]}))
+""" % (MODULOS_PESADOS,)
+
+
+def _tem_display() -> bool:
+    return sys.platform in ("win32", "darwin") or bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def medir_importacao(repeticoes: int) -> dict:
+    melhor, pesados = float("inf"), []
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, "-c", _SONDA_IMPORTACAO], cwd=RAIZ, capture_output=True,
+                               text=True, check=True).stdout
+        medida = json.loads(saida.strip().splitlines()[-1])
+        melhor = min(melhor, medida["ms"])
+        pesados = sorted(set(pesados) | set(medida["pesados"]))
+    return {"importacao_ms": round(melhor, 1), "pesados": pesados}
+
+
+def medir_janela(repeticoes: int, timeout: float) -> Optional[Dict[str, float]]:
+    """(janela_ms medido pelo app, processo_ms desde o spawn) ou None se o app não informou."""
+    ambiente = {**os.environ, VAR_MEDIR_PARTIDA: "1"}
+    janela, processo = float("inf"), float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        saida = subprocess.run([sys.executable, "main.py"], cwd=RAIZ, env=ambiente, capture_output=True,
+                               text=True, timeout=timeout).stdout
+        total = (time.perf_counter() - t0) * 1000
+        linhas = [l for l in saida.splitlines() if l.startswith("partida_ms=")]
+        if not linhas:
+            return None
+        janela = min(janela, float(linhas[-1].split("=", 1)[1]))
+        processo = min(processo, total)
+    return {"janela_ms": round(janela, 1), "processo_ms": round(processo, 1)}
+
+
+def comparar(atual: dict, baseline: dict, limite: float, folga_ms: float) -> List[str]:
+    regressoes = []
+    for chave in ("importacao_ms", "janela_ms", "processo_ms"):
+        t, t_ref = atual.get(chave), baseline.get(chave)
+        if t is None or not t_ref:
+            continue
+        if t > t_ref * (1 + limite) and t - t_ref > folga_ms:
+            regressoes.append(f"{chave}: {t:.0f} ms vs {t_ref:.0f} ms (+{(t / t_ref - 1) * 100:.0f}%)")
+    return regressoes
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_PADRAO)
+    parser.add_argument("--gravar-baseline", action="store_true")
+    parser.add_argument("--limite", type=float, default=0.25, help="regressão tolerada (0.25 = 25%%)")
+    parser.add_argument("--folga", type=float, default=50.0,
+                        help="diferença absoluta (ms) abaixo da qual não há regressão")
+    parser.add_argument("--timeout", type=float, default=60.0, help="tempo máximo (s) de cada partida da janela")
+    args = parser.parse_args()
+
+    atual = medir_importacao(args.repeticoes)
+    print(f"import main: {atual['importacao_ms']:.0f} ms")
+    if atual["pesados"]:
+        print(f"ERRO: módulos pesados carregados na partida: {', '.join(atual['pesados'])}", file=sys.stderr)
+        return 1
+
+    if _tem_display():
+        janela = medir_janela(args.repeticoes, args.timeout)
+        if janela is None:
+            print("ERRO: o app não informou o tempo de partida (a janela abriu?)", file=sys.stderr)
+            return 1
+        atual.update(janela)
+        print(f"primeira janela: {janela['janela_ms']:.0f} ms (processo inteiro: {janela['processo_ms']:.0f} ms)")
+    else:
+        print("Sem display: medição da janela pulada (só a importação foi verificada)")
+
+    if args.gravar_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({k: v for k, v in atual.items() if k != "pesados"}, f, indent=2)
+            f.write("\n")
+        print(f"Linha de base gravada em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("Sem linha de base (use --gravar-baseline)")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressoes = comparar(atual, baseline, args.limite, args.folga)
+    if regressoes:
+        print("REGRESSÕES:", file=sys.stderr)
+        for r in regressoes:
+            print(f"  {r}", file=sys.stderr)
+        return 1
+    print("OK: partida dentro do limite")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Benchmark de proximo_codigo em laço, como a GUI usava: consulta a sigla e
+acrescenta o código gerado à base com pd.concat. Compara a versão original
+(filtros + regex + set(range(...)) a cada chamada) com a memorizada
+(core.code_generator.proximo_codigo), conferindo que os resultados são iguais.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_proximo_codigo --linhas 1000000 --chamadas 2000
+"""
+
+import argparse
+import random
+import string
+import time
+
+import pandas as pd
+
+from core.code_generator import codigo_valido, limpar_cache_proximo_codigo, proximo_codigo
+
+
+def proximo_codigo_original(sigla: str, df_base: pd.DataFrame, digitos: int = 4) -> str:
+    """Implementação anterior, mantida aqui só como referência de tempo e resultado."""
+    df_base = df_base[df_base['Codigo'].apply(codigo_valido)]
+    df_base = df_base[df_base['Codigo'].str.startswith(sigla)]
+    df_base = df_base[df_base['Codigo'].str.len() == (3 + digitos)]
+
+    if df_base.empty:
+        return f"{sigla}{'1'.zfill(digitos)}"
+
+    numeros = df_base['Codigo'].str.extract(fr'{sigla}(\d{{{digitos}}})')[0].dropna()
+    if numeros.empty:
+        return f"{sigla}{'1'.zfill(digitos)}"
+
+    numeros = numeros.astype(int)
+    usados = set(numeros)
+    lacunas = set(range(1, numeros.max() + 2)) - usados
+    proximo = min(lacunas) if lacunas else numeros.max() + 1
+
+    return f"{sigla}{str(proximo).zfill(digitos)}"
+
+
+def _laco(funcao, df: pd.DataFrame, siglas: list, digitos: int) -> tuple:
+    """Tempo só das chamadas de 'funcao'; o pd.concat é custo do chamador, igual nas duas versões."""
+    gerados = []
+    tempos = []
+    for sigla in siglas:
+        t0 = time.perf_counter()
+        codigo = funcao(sigla, df, digitos)
+        tempos.append(time.perf_counter() - t0)
+        gerados.append(codigo)
+        df = pd.concat([df, pd.DataFrame({"Codigo": [codigo]})], ignore_index=True)
+    return gerados, tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--siglas", type=int, default=5000)
+    parser.add_argument("--chamadas", type=int, default=2000, help="chamadas da versão memorizada")
+    parser.add_argument("--chamadas-original", type=int, default=5,
+                        help="chamadas da versão original (cada uma percorre a base inteira)")
+    parser.add_argument("--digitos", type=int, choices=(3, 4), default=4)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    siglas = ["".join(rnd.choices(string.ascii_uppercase, k=3)) for _ in range(args.siglas)]
+    limite = 10 ** args.digitos - 1
+    df = pd.DataFrame({"Codigo": [
+        f"{rnd.choice(siglas)}{str(rnd.randint(1, limite)).zfill(args.digitos)}" for _ in range(args.linhas)
+    ]})
+    pedidas = [rnd.choice(siglas) for _ in range(max(args.chamadas, args.chamadas_original))]
+
+    ref, t_orig = _laco(proximo_codigo_original, df, pedidas[:args.chamadas_original], args.digitos)
+    limpar_cache_proximo_codigo()
+    novos, t_memo = _laco(proximo_codigo, df, pedidas[:args.chamadas], args.digitos)
+    if novos[:len(ref)] != ref:
+        raise SystemExit("ERRO: as duas versões geraram códigos diferentes.")
+
+    por_orig = sum(t_orig) / len(t_orig)
+    por_memo = sum(t_memo[1:]) / max(1, len(t_memo) - 1)
+    print(f"Base: {args.linhas:,} linhas")
+    print(f"Original:   {len(ref):6d} chamadas em {sum(t_orig):8.2f} s ({por_orig * 1000:9.2f} ms/chamada)")
+    print(f"Memorizada: {len(novos):6d} chamadas em {sum(t_memo):8.2f} s "
+          f"(1ª, monta o índice: {t_memo[0] * 1000:.0f} ms; demais: {por_memo * 1000:.3f} ms/chamada)")
+    print(f"Speedup por chamada (após a 1ª): {por_orig / por_memo:8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
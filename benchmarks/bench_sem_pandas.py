@@ -0,0 +1,148 @@
+"""
+Pipeline sem pandas contra o fluxo legado com DataFrame: pico de memória (RSS),
+tempo e tamanho dos pacotes de terceiros carregados, cada um em um processo novo.
+
+- sem_pandas: core.pipeline.processar_arquivos com pandas e numpy bloqueados
+  (sys.modules[...] = None: qualquer import deles falha, o que prova que o
+  caminho não depende deles);
+- legado: carregar_codigos_existentes -> extrair_siglas -> gerar_codigos_em_lote
+  -> salvar_resultado com DataFrame, como a GUI fazia antes do pipeline.
+
+"Pacotes carregados" soma o tamanho em disco de cada pacote de terceiros
+importado (incluindo <pacote>.libs, onde ficam as bibliotecas nativas): é o que
+o PyInstaller leva para o executável. Com --pyinstaller (e o PyInstaller
+instalado), gera também os dois executáveis --onedir de main.py (com e sem
+--exclude-module pandas/numpy) e informa o tamanho real de cada pasta.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_sem_pandas --linhas-base 200000 --linhas-entrada 20000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Dict
+
+from benchmarks.gerador import ParametrosDados, adicionar_argumentos, gerar_arquivos, parametros_dos_argumentos
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_COMUM = r"""
+import json, os, sys, sysconfig, time
+sys.path.insert(0, {raiz!r})
+
+def pacotes_carregados():
+    # Tamanho em disco dos pacotes de terceiros importados (site-packages)
+    site = os.path.realpath(sysconfig.get_paths()["purelib"])
+    total, nomes = 0, set()
+    for nome, mod in list(sys.modules.items()):
+        arquivo = getattr(mod, "__file__", None) or ""
+        if "." in nome or not os.path.realpath(arquivo).startswith(site):
+            continue
+        nomes.add(nome)
+        pasta = os.path.dirname(arquivo) if os.path.basename(arquivo).startswith("__init__.") else arquivo
+        for alvo in (pasta, os.path.join(site, nome + ".libs"), os.path.join(site, nome.lower() + ".libs")):
+            if os.path.isdir(alvo):
+                total += sum(os.path.getsize(os.path.join(r, f)) for r, _, fs in os.walk(alvo) for f in fs)
+            elif os.path.isfile(alvo):
+                total += os.path.getsize(alvo)
+    return total, sorted(nomes)
+
+t0 = time.perf_counter()
+"""
+
+_SEM_PANDAS = _COMUM + r"""
+sys.modules["pandas"] = None
+sys.modules["numpy"] = None
+from core.pipeline import processar_arquivos
+from core.metricas import pico_rss_mb
+(_, _, gerados), = processar_arquivos({base!r}, [{entrada!r}], {digitos}, usar_cache=False,
+                                      usar_ledger=False, usar_snapshot=False)
+"""
+
+_LEGADO = _COMUM + r"""
+import pandas as pd
+from core.excel_processor import carregar_codigos_existentes, extrair_siglas, salvar_resultado
+from core.fast_code_generator import gerar_codigos_em_lote
+from core.metricas import pico_rss_mb
+os.chdir(os.path.dirname({entrada!r}))  # carregar_codigos_existentes grava codigos.json aqui
+df_base = carregar_codigos_existentes({base!r})
+siglas = extrair_siglas({entrada!r}, "SIGLAS", 1)["Sigla"].tolist()
+novos = gerar_codigos_em_lote(siglas, df_base, {digitos})
+salvar_resultado({entrada!r}, "RESULTADO", pd.DataFrame({{"Sigla": siglas, "Proximo_Codigo": novos}}))
+gerados = sum(1 for c in novos if c is not None)
+"""
+
+_FIM = r"""
+tamanho, nomes = pacotes_carregados()
+print(json.dumps({"tempo_s": time.perf_counter() - t0, "pico_rss_mb": pico_rss_mb(), "gerados": gerados,
+                  "pacotes_mb": tamanho / 2**20, "pacotes": nomes}))
+"""
+
+
+def _rodar(modelo: str, base: str, entrada: str, digitos: int) -> dict:
+    codigo = modelo.format(raiz=RAIZ, base=base, entrada=entrada, digitos=digitos) + _FIM
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True)
+    if saida.returncode != 0:
+        raise SystemExit(f"ERRO na medição:\n{saida.stderr}")
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def _tamanho_pasta(pasta: str) -> int:
+    return sum(os.path.getsize(os.path.join(r, f)) for r, _, fs in os.walk(pasta) for f in fs)
+
+
+def medir_executaveis(pasta: str) -> Dict[str, float]:
+    """Tamanho (MiB) das pastas --onedir geradas pelo PyInstaller, com e sem pandas/numpy."""
+    variantes = {"com_pandas": [], "sem_pandas": ["--exclude-module", "pandas", "--exclude-module", "numpy"]}
+    tamanhos = {}
+    for nome, extra in variantes.items():
+        dist = os.path.join(pasta, "dist_" + nome)
+        subprocess.run(["pyinstaller", "--onedir", "--noconfirm", "--name", "GeradorCodigos", "--distpath", dist,
+                        "--workpath", os.path.join(pasta, "build_" + nome), "--specpath", pasta, *extra,
+                        os.path.join(RAIZ, "main.py")], check=True, capture_output=True)
+        tamanhos[nome] = _tamanho_pasta(dist) / 2**20
+    return tamanhos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    adicionar_argumentos(parser, ParametrosDados(linhas_base=200_000, linhas_entrada=20_000, siglas=2_000))
+    parser.add_argument("--pyinstaller", action="store_true",
+                        help="gera os dois executáveis (lento) e informa o tamanho real")
+    args = parser.parse_args()
+    p = parametros_dos_argumentos(args)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminhos = gerar_arquivos(pasta, p, csv_tambem=False)
+        entradas = {}
+        for nome in ("sem_pandas", "legado"):
+            entradas[nome] = os.path.join(pasta, f"entrada_{nome}.xlsx")
+            shutil.copyfile(caminhos["entrada_xlsx"], entradas[nome])
+        sem = _rodar(_SEM_PANDAS, caminhos["base_xlsx"], entradas["sem_pandas"], p.digitos)
+        legado = _rodar(_LEGADO, caminhos["base_xlsx"], entradas["legado"], p.digitos)
+        if sem["gerados"] != legado["gerados"]:
+            raise SystemExit(f"ERRO: {sem['gerados']} códigos sem pandas vs {legado['gerados']} no legado")
+
+        executaveis = {}
+        if args.pyinstaller:
+            if shutil.which("pyinstaller") is None:
+                print("PyInstaller não encontrado: tamanho dos executáveis não medido")
+            else:
+                executaveis = medir_executaveis(pasta)
+
+    print(f"Base: {p.linhas_base:,} códigos | entrada: {p.linhas_entrada:,} siglas")
+    print(f"{'':<14}{'tempo (s)':>12}{'pico RSS (MiB)':>16}{'pacotes (MiB)':>15}  pacotes de terceiros")
+    for nome, m in (("sem pandas", sem), ("legado", legado)):
+        rss = f"{m['pico_rss_mb']:.0f}" if m["pico_rss_mb"] is not None else "n/d"
+        print(f"{nome:<14}{m['tempo_s']:>12.2f}{rss:>16}{m['pacotes_mb']:>15.1f}  {', '.join(m['pacotes'])}")
+    for nome, tamanho in executaveis.items():
+        print(f"executável --onedir ({nome}): {tamanho:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark de partida a frio do índice: snapshot mmap (core.snapshot) contra o
+pickle do cache persistente (core.index_cache), para uma base sintética.
+
+Mede abrir + primeira consulta (o que uma ferramenta que só precisa de um
+código faz), abrir + copiar o índice inteiro (o que o pipeline faz para alocar)
+e o carregamento do pickle equivalente.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_snapshot --codigos 5000000
+"""
+
+import argparse
+import itertools
+import os
+import pickle
+import random
+import string
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.fast_code_generator import _build_index_vetorizado
+from core.snapshot import SnapshotIndice, compilar_snapshot
+
+
+def _medir(funcao, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--codigos", type=int, default=5_000_000)
+    parser.add_argument("--digitos", type=int, choices=(3, 4), default=4)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    rnd = np.random.default_rng(42)
+    siglas = np.array(["".join(p) for p in itertools.product(string.ascii_uppercase, repeat=3)])
+    numeros = rnd.integers(1, 10 ** args.digitos, args.codigos)
+    codigos = pd.Series(np.char.add(siglas[rnd.integers(0, len(siglas), args.codigos)],
+                                    np.char.zfill(numeros.astype(str), args.digitos)), dtype=object)
+    t0 = time.perf_counter()
+    idx = _build_index_vetorizado(codigos, args.digitos)
+    t_indice = time.perf_counter() - t0
+    consulta = random.Random(1).choice(list(idx))
+
+    with tempfile.TemporaryDirectory() as pasta:
+        snap = os.path.join(pasta, "base.snap")
+        t0 = time.perf_counter()
+        compilar_snapshot(idx, snap, args.digitos)
+        t_compilar = time.perf_counter() - t0
+        pkl = os.path.join(pasta, "base.idx")
+        with open(pkl, "wb") as f:
+            pickle.dump({"indice": idx}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        def snapshot_consulta(verificar: bool):
+            with SnapshotIndice(snap, verificar=verificar) as s:
+                s.proximo_livre(consulta)
+
+        def snapshot_indice():
+            with SnapshotIndice(snap) as s:
+                s.para_indice()
+
+        def pickle_indice():
+            with open(pkl, "rb") as f:
+                pickle.load(f)
+
+        t_consulta = _medir(lambda: snapshot_consulta(True), args.repeticoes)
+        t_consulta_sem_crc = _medir(lambda: snapshot_consulta(False), args.repeticoes)
+        t_copia = _medir(snapshot_indice, args.repeticoes)
+        t_pickle = _medir(pickle_indice, args.repeticoes)
+        tamanho_snap, tamanho_pkl = os.path.getsize(snap), os.path.getsize(pkl)
+
+    print(f"Base sintética: {args.codigos:,} códigos, {len(idx):,} siglas "
+          f"(índice montado em {t_indice:.2f} s, snapshot compilado em {t_compilar * 1000:.0f} ms)")
+    print(f"Snapshot: {tamanho_snap / 2**20:.1f} MiB | pickle: {tamanho_pkl / 2**20:.1f} MiB")
+    print(f"Snapshot abrir + consulta (com crc32):  {t_consulta * 1000:8.2f} ms")
+    print(f"Snapshot abrir + consulta (sem crc32):  {t_consulta_sem_crc * 1000:8.2f} ms")
+    print(f"Snapshot abrir + índice completo:       {t_copia * 1000:8.2f} ms")
+    print(f"Pickle do cache (índice completo):      {t_pickle * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Teste de carga do serviço de alocação (core.servico): vários clientes com
+conexão keep-alive pedem códigos ao mesmo tempo; mede a latência de cada pedido
+(p50/p99) e a vazão, e confere que nenhum código saiu repetido.
+
+Sem --url, sobe o serviço em um subprocesso sobre uma base sintética temporária.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.carga_servico --clientes 50 --pedidos 200
+    python -m benchmarks.carga_servico --url http://127.0.0.1:8765 --clientes 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from benchmarks.bench_carregar_base import gerar_base_sintetica
+
+SIGLAS = ["ABC", "DEF", "GHI", "JKL", "MNO"]
+
+
+async def _pedir(reader, writer, metodo: str, caminho: str) -> dict:
+    writer.write(f"{metodo} {caminho} HTTP/1.1\r\nHost: localhost\r\nContent-Length: 0\r\n\r\n".encode())
+    await writer.drain()
+    status = (await reader.readline()).split()[1]
+    tamanho = 0
+    while True:
+        linha = await reader.readline()
+        if linha in (b"\r\n", b""):
+            break
+        if linha.lower().startswith(b"content-length:"):
+            tamanho = int(linha.split(b":")[1])
+    corpo = json.loads(await reader.readexactly(tamanho))
+    if status != b"200":
+        raise RuntimeError(f"{metodo} {caminho}: {status.decode()} {corpo}")
+    return corpo
+
+
+async def _cliente(host: str, porta: int, pedidos: int, lote: int, consultas: float, semente: int,
+                   latencias: list, codigos: list):
+    rnd = random.Random(semente)
+    reader, writer = await asyncio.open_connection(host, porta)
+    try:
+        for _ in range(pedidos):
+            sigla = rnd.choice(SIGLAS)
+            t0 = time.perf_counter()
+            if rnd.random() < consultas:
+                await _pedir(reader, writer, "GET", f"/proximo/{sigla}")
+            else:
+                caminho = f"/alocar/{sigla}" + (f"?n={lote}" if lote > 1 else "")
+                codigos.extend((await _pedir(reader, writer, "POST", caminho))["codigos"])
+            latencias.append(time.perf_counter() - t0)
+    finally:
+        writer.close()
+
+
+def _percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+async def _carga(host: str, porta: int, args) -> int:
+    latencias: list = []
+    codigos: list = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        _cliente(host, porta, args.pedidos, args.lote, args.consultas, i, latencias, codigos)
+        for i in range(args.clientes)
+    ))
+    duracao = time.perf_counter() - t0
+    reader, writer = await asyncio.open_connection(host, porta)
+    saude = await _pedir(reader, writer, "GET", "/saude")
+    writer.close()
+
+    repetidos = [c for c, n in Counter(codigos).items() if n > 1]
+    ms = [x * 1000 for x in latencias]
+    print(f"pedidos={len(latencias)} clientes={args.clientes} em {duracao:.2f}s "
+          f"({len(latencias) / duracao:,.0f} pedidos/s, {len(codigos) / duracao * 60:,.0f} códigos/min)")
+    print(f"latência: p50={_percentil(ms, 50):.2f} ms  p99={_percentil(ms, 99):.2f} ms  max={max(ms):.2f} ms")
+    print(f"códigos={len(codigos)} repetidos={len(repetidos)} "
+          f"transações no ledger={saude['transacoes']} (pedidos agrupados por transação)")
+    return 1 if repetidos else 0
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _aguardar_servico(host: str, porta: int, proc: subprocess.Popen, limite: float = 120.0):
+    fim = time.time() + limite
+    while time.time() < fim:
+        if proc.poll() is not None:
+            raise RuntimeError(f"o serviço terminou com código {proc.returncode}")
+        try:
+            socket.create_connection((host, porta), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError("o serviço não respondeu a tempo")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="serviço já em execução (ex.: http://127.0.0.1:8765)")
+    parser.add_argument("--clientes", type=int, default=20, help="conexões simultâneas")
+    parser.add_argument("--pedidos", type=int, default=200, help="pedidos por cliente")
+    parser.add_argument("--lote", type=int, default=1, help="códigos por pedido de alocação")
+    parser.add_argument("--consultas", type=float, default=0.1, help="fração de pedidos /proximo (só consulta)")
+    parser.add_argument("--linhas-base", type=int, default=50_000, help="tamanho da base sintética")
+    args = parser.parse_args()
+
+    if args.url:
+        url = urlsplit(args.url)
+        return asyncio.run(_carga(url.hostname, url.port or 80, args))
+
+    with tempfile.TemporaryDirectory() as pasta:
+        base = os.path.join(pasta, "base.xlsx")
+        gerar_base_sintetica(base, args.linhas_base)
+        porta = _porta_livre()
+        env = dict(os.environ, GERADOR_CODIGOS_CACHE=os.path.join(pasta, "cache"))
+        proc = subprocess.Popen([sys.executable, "-m", "core.servico", "--base", base, "--porta", str(porta)],
+                                env=env)
+        try:
+            _aguardar_servico("127.0.0.1", porta, proc)
+            return asyncio.run(_carga("127.0.0.1", porta, args))
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
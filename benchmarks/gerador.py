@@ -0,0 +1,175 @@
+"""
+Gerador de dados sintéticos para os benchmarks: base (aba 'aba1', colunas A/B)
+e entrada (aba 'SIGLAS', coluna A) em .xlsx e .csv, reprodutíveis pela semente.
+
+Parâmetros que mudam o comportamento dos algoritmos:
+- assimetria: expoente de Zipf da frequência das siglas (0 = uniforme; 1.2 =
+  poucas siglas concentram a maioria dos códigos e das lacunas a preencher);
+- lacunas: fração de números livres dentro da faixa usada de cada sigla
+  (0 = códigos contíguos 1..n, o pior caso para quem procura "o próximo livre");
+- mistura_digitos: fração de códigos com a outra largura (3 dígitos numa base de
+  4 e vice-versa), que o índice precisa ignorar.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.gerador --saida /tmp/dados --linhas-base 200000 --linhas-entrada 20000
+"""
+
+import argparse
+import csv
+import math
+import os
+import random
+import string
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from openpyxl import Workbook
+
+
+@dataclass
+class ParametrosDados:
+    linhas_base: int = 100_000  # códigos na base (metade na coluna A, metade na B)
+    linhas_entrada: int = 10_000
+    siglas: int = 500
+    digitos: int = 4
+    assimetria: float = 1.0
+    lacunas: float = 0.2
+    mistura_digitos: float = 0.05
+    vazias_entrada: float = 0.02  # células vazias na coluna de siglas
+    semente: int = 42
+
+
+def _todas_siglas():
+    letras = string.ascii_uppercase
+    return ((a, b, c) for a in letras for b in letras for c in letras)
+
+
+def _pesos(n: int, assimetria: float) -> List[float]:
+    return [1.0 / (i + 1) ** assimetria for i in range(n)]
+
+
+def _numeros(rnd: random.Random, quantidade: int, lacunas: float, limite: int) -> List[int]:
+    """'quantidade' números distintos de 1..faixa, com a fração 'lacunas' da faixa livre."""
+    faixa = min(limite, max(quantidade, math.ceil(quantidade / max(1e-9, 1 - lacunas))))
+    return rnd.sample(range(1, faixa + 1), min(quantidade, faixa))
+
+
+def gerar_dados(p: ParametrosDados) -> Tuple[List[str], List[Optional[str]]]:
+    """(códigos da base, siglas da entrada) conforme os parâmetros."""
+    rnd = random.Random(p.semente)
+    siglas = rnd.sample(["".join(t) for t in _todas_siglas()], p.siglas)
+    pesos = _pesos(p.siglas, p.assimetria)
+
+    outra = 3 if p.digitos == 4 else 4
+    por_sigla = [0] * p.siglas
+    for i in rnd.choices(range(p.siglas), weights=pesos, k=p.linhas_base):
+        por_sigla[i] += 1
+
+    codigos: List[str] = []
+    for sigla, quantidade in zip(siglas, por_sigla):
+        n_outra = sum(1 for _ in range(quantidade) if rnd.random() < p.mistura_digitos)
+        for num in _numeros(rnd, quantidade - n_outra, p.lacunas, 10 ** p.digitos - 1):
+            codigos.append(f"{sigla}{str(num).zfill(p.digitos)}")
+        for num in _numeros(rnd, n_outra, p.lacunas, 10 ** outra - 1):
+            codigos.append(f"{sigla}{str(num).zfill(outra)}")
+    rnd.shuffle(codigos)
+
+    entrada: List[Optional[str]] = [
+        None if rnd.random() < p.vazias_entrada else siglas[i]
+        for i in rnd.choices(range(p.siglas), weights=pesos, k=p.linhas_entrada)
+    ]
+    return codigos, entrada
+
+
+def gravar_base_xlsx(caminho: str, codigos: List[str]):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("aba1")
+    ws.append(["Codigo A", "Codigo B"])
+    meio = (len(codigos) + 1) // 2
+    for i in range(meio):
+        ws.append([codigos[i], codigos[meio + i] if meio + i < len(codigos) else None])
+    wb.save(caminho)
+
+
+def gravar_base_multiabas_xlsx(caminho: str, codigos: List[str], abas: int, colunas: int) -> List[str]:
+    """
+    Base espalhada como as reais: os códigos divididos entre 'abas' abas ('Base1', ...),
+    cada uma com uma coluna de descrição (A), os códigos em B.. ('colunas' colunas)
+    e uma coluna de observação no fim. Devolve os nomes das abas.
+    """
+    wb = Workbook(write_only=True)
+    nomes = []
+    por_aba = -(-len(codigos) // abas)
+    for n in range(abas):
+        nomes.append(f"Base{n + 1}")
+        ws = wb.create_sheet(nomes[-1])
+        ws.append(["Descricao"] + [f"Codigo {i + 1}" for i in range(colunas)] + ["Obs"])
+        trecho = codigos[n * por_aba:(n + 1) * por_aba]
+        for i in range(0, len(trecho), colunas):
+            linha = trecho[i:i + colunas]
+            ws.append([f"item {n}-{i}"] + linha + [None] * (colunas - len(linha)) + ["ok"])
+    wb.save(caminho)
+    return nomes
+
+
+def gravar_entrada_xlsx(caminho: str, siglas: List[Optional[str]]):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("SIGLAS")
+    for sigla in siglas:
+        ws.append([sigla])
+    wb.save(caminho)
+
+
+def gravar_csv(caminho: str, cabecalho: str, valores: List[Optional[str]]):
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow([cabecalho])
+        w.writerows([v if v is not None else ""] for v in valores)
+
+
+def gerar_arquivos(pasta: str, p: ParametrosDados, csv_tambem: bool = True) -> dict:
+    """Grava base/entrada em 'pasta' e devolve os caminhos por tipo."""
+    os.makedirs(pasta, exist_ok=True)
+    codigos, siglas = gerar_dados(p)
+    caminhos = {"base_xlsx": os.path.join(pasta, "base.xlsx"),
+                "entrada_xlsx": os.path.join(pasta, "entrada.xlsx")}
+    gravar_base_xlsx(caminhos["base_xlsx"], codigos)
+    gravar_entrada_xlsx(caminhos["entrada_xlsx"], siglas)
+    if csv_tambem:
+        caminhos["base_csv"] = os.path.join(pasta, "base.csv")
+        caminhos["entrada_csv"] = os.path.join(pasta, "entrada.csv")
+        gravar_csv(caminhos["base_csv"], "Codigo", codigos)
+        gravar_csv(caminhos["entrada_csv"], "Sigla", siglas)
+    return caminhos
+
+
+def adicionar_argumentos(parser: argparse.ArgumentParser, padrao: ParametrosDados = ParametrosDados()):
+    parser.add_argument("--linhas-base", type=int, default=padrao.linhas_base)
+    parser.add_argument("--linhas-entrada", type=int, default=padrao.linhas_entrada)
+    parser.add_argument("--siglas", type=int, default=padrao.siglas)
+    parser.add_argument("--digitos", type=int, choices=(3, 4), default=padrao.digitos)
+    parser.add_argument("--assimetria", type=float, default=padrao.assimetria, help="expoente de Zipf (0 = uniforme)")
+    parser.add_argument("--lacunas", type=float, default=padrao.lacunas, help="fração livre da faixa de cada sigla")
+    parser.add_argument("--mistura-digitos", type=float, default=padrao.mistura_digitos,
+                        help="fração de códigos com a outra largura de dígitos")
+    parser.add_argument("--semente", type=int, default=padrao.semente)
+
+
+def parametros_dos_argumentos(args: argparse.Namespace) -> ParametrosDados:
+    return ParametrosDados(linhas_base=args.linhas_base, linhas_entrada=args.linhas_entrada,
+                           siglas=args.siglas, digitos=args.digitos, assimetria=args.assimetria,
+                           lacunas=args.lacunas, mistura_digitos=args.mistura_digitos, semente=args.semente)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--saida", required=True, help="pasta de destino")
+    parser.add_argument("--sem-csv", action="store_true")
+    adicionar_argumentos(parser)
+    args = parser.parse_args()
+    for tipo, caminho in gerar_arquivos(args.saida, parametros_dos_argumentos(args), not args.sem_csv).items():
+        print(f"{tipo}: {caminho}")
+
+
+if __name__ == "__main__":
+    main()
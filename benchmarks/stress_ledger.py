@@ -0,0 +1,94 @@
+"""
+Teste de estresse do ledger: vários processos reservam códigos ao mesmo tempo,
+no mesmo arquivo SQLite, para poucas siglas (máxima disputa). Cada processo
+parte do mesmo índice "da base", como operadores rodando a ferramenta sobre a
+mesma planilha. Falha (código de saída 1) se algum código sair repetido ou se o
+ledger não tiver exatamente os códigos entregues.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.stress_ledger --processos 16 --reservas 200 --lote 5
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from core.fast_code_generator import indexar_codigos
+from core.ledger import Ledger
+
+SIGLAS = ["ABC", "XYZ", "QWE", "RTY"]
+
+
+def _base_sintetica(digitos: int) -> list:
+    """Alguns códigos já "na base", com lacunas, para a alocação não ser só sequencial."""
+    rnd = random.Random(7)
+    limite = 10 ** digitos - 1
+    return [f"{s}{str(rnd.randint(1, limite // 4)).zfill(digitos)}" for s in SIGLAS for _ in range(300)]
+
+
+def _operador(caminho: str, base: list, digitos: int, reservas: int, lote: int, semente: int,
+              barreira, saida):
+    rnd = random.Random(semente)
+    idx = indexar_codigos(base, digitos)
+    emitidos = []
+    with Ledger(caminho) as ledger:
+        barreira.wait()
+        for _ in range(reservas):
+            siglas = [rnd.choice(SIGLAS) for _ in range(lote)]
+            emitidos.extend(c for c in ledger.reservar(siglas, idx, digitos, origem=f"pid {os.getpid()}") if c)
+    saida.put(emitidos)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processos", type=int, default=8)
+    parser.add_argument("--reservas", type=int, default=100, help="reservas (transações) por processo")
+    parser.add_argument("--lote", type=int, default=5, help="siglas por reserva")
+    parser.add_argument("--digitos", type=int, choices=(3, 4), default=4)
+    args = parser.parse_args()
+
+    base = _base_sintetica(args.digitos)
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "stress.codigos.sqlite")
+        Ledger(caminho).fechar()  # cria o esquema antes da corrida
+
+        barreira = multiprocessing.Barrier(args.processos)
+        saida = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=_operador,
+                                         args=(caminho, base, args.digitos, args.reservas, args.lote, i,
+                                               barreira, saida))
+                 for i in range(args.processos)]
+        t0 = time.perf_counter()
+        for p in procs:
+            p.start()
+        emitidos = [c for _ in procs for c in saida.get(timeout=600)]
+        for p in procs:
+            p.join()
+        duracao = time.perf_counter() - t0
+
+        with Ledger(caminho) as ledger:
+            registrados = list(ledger.codigos())
+
+    repetidos = [c for c, n in Counter(emitidos).items() if n > 1]
+    na_base = set(base).intersection(emitidos)
+    print(f"processos={args.processos} reservas={args.processos * args.reservas} "
+          f"códigos={len(emitidos)} em {duracao:.2f}s "
+          f"({len(emitidos) / duracao:,.0f} códigos/s, {args.processos * args.reservas / duracao:,.0f} transações/s)")
+    print(f"repetidos={len(repetidos)} já_na_base={len(na_base)} registrados={len(registrados)}")
+
+    falhas = [p.exitcode for p in procs if p.exitcode != 0]
+    if repetidos or na_base or sorted(registrados) != sorted(emitidos) or falhas:
+        print("FALHA: " + ", ".join(repetidos[:10] + sorted(na_base)[:10]) + (f" exitcodes={falhas}" if falhas else ""),
+              file=sys.stderr)
+        return 1
+    print("OK: nenhum código emitido duas vezes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
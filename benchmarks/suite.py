@@ -0,0 +1,214 @@
+"""
+Suíte de benchmarks reprodutível: gera base/entrada sintéticas (benchmarks.gerador),
+mede cada etapa do fluxo separadamente e compara com a linha de base gravada.
+
+Etapas: carregar_codigos_existentes, extrair_siglas, _build_index,
+gerar_codigos_em_lote e salvar_resultado. Tempo = menor de N repetições (sem
+tracemalloc); pico de memória = execução separada com tracemalloc.
+
+Sai com código 1 se alguma etapa ficar mais lenta (ou usar mais memória) que a
+linha de base além do limite. A linha de base depende da máquina: grave a sua
+com --gravar-baseline antes de usar a comparação (ex.: na máquina de CI).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.suite                        # cenários padrão, compara
+    python -m benchmarks.suite --cenario medio --repeticoes 5
+    python -m benchmarks.suite --gravar-baseline      # atualiza benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+from benchmarks.gerador import ParametrosDados, gerar_arquivos
+from core.excel_processor import carregar_codigos_existentes, extrair_siglas, salvar_resultado
+from core.fast_code_generator import _build_index, gerar_codigos_em_lote
+
+CENARIOS: Dict[str, ParametrosDados] = {
+    "pequeno": ParametrosDados(linhas_base=20_000, linhas_entrada=2_000, siglas=200),
+    "medio": ParametrosDados(linhas_base=200_000, linhas_entrada=20_000, siglas=2_000),
+    "assimetrico": ParametrosDados(linhas_base=200_000, linhas_entrada=20_000, siglas=2_000,
+                                   assimetria=1.6, lacunas=0.0),
+    "grande": ParametrosDados(linhas_base=1_000_000, linhas_entrada=100_000, siglas=10_000),
+}
+CENARIOS_PADRAO = ["pequeno", "medio", "assimetrico"]
+BASELINE_PADRAO = os.path.join(os.path.dirname(__file__), "baseline.json")
+ETAPAS = ["carregar_codigos_existentes", "extrair_siglas", "_build_index",
+          "gerar_codigos_em_lote", "salvar_resultado"]
+
+
+@contextmanager
+def _na_pasta(pasta: str):
+    # carregar_codigos_existentes grava codigos.json na pasta atual
+    anterior = os.getcwd()
+    os.chdir(pasta)
+    try:
+        yield
+    finally:
+        os.chdir(anterior)
+
+
+def _executar_etapas(caminhos: dict, digitos: int, medir: Callable) -> Dict[str, float]:
+    """Roda o fluxo uma vez; 'medir(nome, funcao)' decide o que registrar de cada etapa."""
+    resultados = {}
+    df_base = medir("carregar_codigos_existentes", lambda: carregar_codigos_existentes(caminhos["base_xlsx"]),
+                    resultados)
+    df_siglas = medir("extrair_siglas", lambda: extrair_siglas(caminhos["entrada_xlsx"], "SIGLAS", 1), resultados)
+    medir("_build_index", lambda: _build_index(df_base, digitos), resultados)
+    siglas = df_siglas["Sigla"].tolist()
+    novos = medir("gerar_codigos_em_lote", lambda: gerar_codigos_em_lote(siglas, df_base, digitos), resultados)
+
+    df_result = pd.DataFrame({"Sigla": siglas, "Proximo_Codigo": novos})
+    # Cópia nova a cada execução: a gravação acrescenta uma aba à entrada
+    shutil.copyfile(caminhos["entrada_xlsx"], caminhos["saida_xlsx"])
+    medir("salvar_resultado", lambda: salvar_resultado(caminhos["saida_xlsx"], "RESULTADO", df_result), resultados)
+    return resultados
+
+
+def _tempo(nome: str, funcao, resultados: dict):
+    t0 = time.perf_counter()
+    valor = funcao()
+    resultados[nome] = time.perf_counter() - t0
+    return valor
+
+
+def _memoria(nome: str, funcao, resultados: dict):
+    tracemalloc.reset_peak()
+    inicio = tracemalloc.get_traced_memory()[0]
+    valor = funcao()
+    resultados[nome] = (tracemalloc.get_traced_memory()[1] - inicio) / 2**20
+    return valor
+
+
+def medir_cenario(nome: str, p: ParametrosDados, repeticoes: int, memoria: bool = True) -> Dict[str, dict]:
+    with tempfile.TemporaryDirectory() as pasta:
+        caminhos = gerar_arquivos(pasta, p, csv_tambem=False)
+        caminhos["saida_xlsx"] = os.path.join(pasta, "saida.xlsx")
+        with _na_pasta(pasta):
+            tempos = [_executar_etapas(caminhos, p.digitos, _tempo) for _ in range(repeticoes)]
+            picos = {}
+            if memoria:
+                tracemalloc.start()
+                try:
+                    picos = _executar_etapas(caminhos, p.digitos, _memoria)
+                finally:
+                    tracemalloc.stop()
+
+    return {etapa: {"tempo_s": round(min(t[etapa] for t in tempos), 4),
+                    **({"pico_mb": round(picos[etapa], 2)} if memoria else {})}
+            for etapa in ETAPAS}
+
+
+def comparar(atual: Dict[str, Dict[str, dict]], baseline: Dict[str, Dict[str, dict]], limite: float,
+             limite_memoria: float, folga_s: float) -> List[str]:
+    """Regressões (texto) de cada cenário/etapa presente nos dois lados."""
+    regressoes = []
+    for cenario, etapas in atual.items():
+        base_cenario = baseline.get(cenario)
+        if base_cenario is None:
+            continue
+        for etapa, medida in etapas.items():
+            ref = base_cenario.get(etapa)
+            if ref is None:
+                continue
+            t, t_ref = medida["tempo_s"], ref["tempo_s"]
+            # Folga absoluta: etapas de milissegundos oscilam mais que o limite relativo
+            if t > t_ref * (1 + limite) and t - t_ref > folga_s:
+                regressoes.append(f"{cenario}/{etapa}: tempo {t:.3f}s vs {t_ref:.3f}s (+{(t / t_ref - 1) * 100:.0f}%)")
+            m, m_ref = medida.get("pico_mb"), ref.get("pico_mb")
+            if m is not None and m_ref and m > m_ref * (1 + limite_memoria) and m - m_ref > 1:
+                regressoes.append(f"{cenario}/{etapa}: memória {m:.1f} MiB vs {m_ref:.1f} MiB "
+                                  f"(+{(m / m_ref - 1) * 100:.0f}%)")
+    return regressoes
+
+
+def _imprimir(cenario: str, p: ParametrosDados, medidas: Dict[str, dict], ref: Dict[str, dict]):
+    print(f"\n== {cenario}: base {p.linhas_base:,} códigos, entrada {p.linhas_entrada:,} siglas, "
+          f"{p.siglas:,} siglas distintas, assimetria {p.assimetria}, lacunas {p.lacunas}")
+    print(f"{'etapa':<30}{'tempo (s)':>12}{'baseline':>12}{'pico (MiB)':>12}{'baseline':>12}")
+    for etapa in ETAPAS:
+        m, r = medidas[etapa], ref.get(etapa, {})
+        print(f"{etapa:<30}{m['tempo_s']:>12.3f}{r.get('tempo_s', float('nan')):>12.3f}"
+              f"{m.get('pico_mb', float('nan')):>12.1f}{r.get('pico_mb', float('nan')):>12.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cenario", action="append", choices=sorted(CENARIOS),
+                        help=f"cenários a rodar (padrão: {', '.join(CENARIOS_PADRAO)})")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--sem-memoria", action="store_true", help="não mede o pico de memória (mais rápido)")
+    parser.add_argument("--baseline", default=BASELINE_PADRAO)
+    parser.add_argument("--gravar-baseline", action="store_true",
+                        help="grava os resultados como nova linha de base (não compara)")
+    parser.add_argument("--limite", type=float, default=0.25, help="regressão de tempo tolerada (0.25 = 25%%)")
+    parser.add_argument("--limite-memoria", type=float, default=0.25)
+    parser.add_argument("--folga", type=float, default=0.05,
+                        help="diferença de tempo absoluta (s) abaixo da qual não há regressão")
+    parser.add_argument("--json", metavar="ARQUIVO", help="grava os resultados desta execução")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            gravado = json.load(f)
+        # Só compara cenários medidos com os mesmos parâmetros de geração
+        baseline = {c: medidas for c, medidas in gravado.get("cenarios", {}).items()
+                    if c in CENARIOS and gravado.get("parametros", {}).get(c) == asdict(CENARIOS[c])}
+
+    atual = {}
+    for cenario in args.cenario or CENARIOS_PADRAO:
+        p = CENARIOS[cenario]
+        atual[cenario] = medir_cenario(cenario, p, args.repeticoes, memoria=not args.sem_memoria)
+        _imprimir(cenario, p, atual[cenario], baseline.get(cenario, {}))
+
+    documento = {
+        "maquina": {"python": platform.python_version(), "sistema": platform.platform(),
+                    "processador": platform.processor() or platform.machine()},
+        "parametros": {c: asdict(CENARIOS[c]) for c in atual},
+        "cenarios": atual,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(documento, f, indent=2, ensure_ascii=False)
+
+    if args.gravar_baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                anterior = json.load(f)
+            # Cenários não executados agora continuam com a linha de base anterior
+            documento["cenarios"] = {**anterior.get("cenarios", {}), **atual}
+            documento["parametros"] = {**anterior.get("parametros", {}), **documento["parametros"]}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(documento, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"\nLinha de base gravada em {args.baseline}")
+        return 0
+
+    sem_baseline = [c for c in atual if c not in baseline]
+    if sem_baseline:
+        print(f"\nSem linha de base (ou com outros parâmetros) para: {', '.join(sem_baseline)} "
+              f"(use --gravar-baseline)")
+    regressoes = comparar(atual, baseline, args.limite, args.limite_memoria, args.folga)
+    if regressoes:
+        print("\nREGRESSÕES:", file=sys.stderr)
+        for r in regressoes:
+            print(f"  {r}", file=sys.stderr)
+        return 1
+    print("\nOK: nenhuma regressão além do limite")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,415 @@
+"""
+Atualização incremental do índice da base: relê só as linhas acrescentadas.
+
+A base costuma crescer por linhas novas no fim da planilha. Em vez de reler
+tudo com o openpyxl, o estado guardado junto do índice (ver index_cache) tem,
+para cada aba, quantas linhas já foram vistas e um digest (BLAKE2) de cada
+bloco de BLOCO_LINHAS linhas, calculados sobre o XML bruto da worksheet (ou
+as linhas do CSV), mais o digest do último bloco incompleto.
+
+Quando o arquivo muda, atualizar_indice percorre o XML descompactado (barato:
+só divide em '</row>' e calcula os digests) e confere os blocos antigos. Se
+batem, só as linhas depois deles são interpretadas e entram no índice como
+delta; o custo de interpretação cresce com as linhas novas, não com a base.
+Qualquer diferença nas linhas já vistas (edição, exclusão, inserção no meio,
+abas diferentes, sharedStrings alterado) devolve None: o chamador reconstrói.
+
+Valem as mesmas regras da leitura completa: linha 1 é cabeçalho, só as colunas
+da região (ver excel_processor.interpretar_regioes) e só células de texto; com
+colunas detectadas, vale a detecção feita quando o estado foi criado.
+"""
+
+import csv
+import hashlib
+import io
+import itertools
+import re
+import zipfile
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree as ET
+
+from openpyxl.utils import column_index_from_string
+
+from core.excel_processor import (
+    AMOSTRA_DETECCAO,
+    _NS_MAIN,
+    _partes_planilha,
+    _regioes_por_aba,
+    detectar_colunas,
+    interpretar_regioes,
+)
+from core.fast_code_generator import AlocadorSigla, indexar_codigos
+from core.formatos import CODIFICACAO_LEITURA, FORMATO_XLSX, colunas_delimitadas, formato_de, valores_colunas
+from core.metricas import medir_etapa
+
+BLOCO_LINHAS = 1000          # linhas por digest
+LOTE_XML = 5000              # linhas novas interpretadas por vez
+PASSO_VERIFICACAO = 50_000   # linhas conferidas entre dois avisos de progresso
+_LEITURA = 1 << 20
+
+_C, _F, _V, _IS, _T, _R = (f"{{{_NS_MAIN}}}{n}" for n in ("c", "f", "v", "is", "t", "r"))
+_ROW = f"{{{_NS_MAIN}}}row"
+_SI = f"{{{_NS_MAIN}}}si"
+_RAIZ = re.compile(rb"<(?![?!])[^>]*>")
+_XMLNS = re.compile(rb"""\sxmlns(?::[\w.-]+)?=(?:"[^"]*"|'[^']*')""")
+
+Progresso = Optional[Callable[[int, int], None]]
+
+
+@dataclass
+class EstadoFonte:
+    """Linhas já vistas de uma aba (ou arquivo de texto, ou sharedStrings) e seus digests."""
+    linhas: int = 0
+    blocos: List[bytes] = field(default_factory=list)
+    parcial: bytes = b""     # digest das linhas do último bloco incompleto
+    parte: str = ""          # parte da worksheet no zip
+    colunas: Tuple[int, ...] = ()
+
+
+@dataclass
+class EstadoBase:
+    """Estado de toda a base para a próxima atualização (guardado pelo index_cache)."""
+    formato: str
+    especificacao: str
+    fontes: Dict[str, EstadoFonte]
+    strings: Optional[EstadoFonte] = None
+
+
+class _Alterada(Exception):
+    """Linhas já vistas mudaram: a atualização incremental não se aplica."""
+
+
+class _Blocos:
+    """Digests acumulados linha a linha, um por bloco de BLOCO_LINHAS linhas."""
+
+    def __init__(self):
+        self.linhas = 0
+        self.blocos: List[bytes] = []
+        self._hash = hashlib.blake2b(digest_size=16)
+
+    def acrescentar(self, linha: bytes):
+        self._hash.update(len(linha).to_bytes(4, "little"))
+        self._hash.update(linha)
+        self.linhas += 1
+        if self.linhas % BLOCO_LINHAS == 0:
+            self.blocos.append(self._hash.digest())
+            self._hash = hashlib.blake2b(digest_size=16)
+
+    def parcial(self) -> bytes:
+        return self._hash.digest() if self.linhas % BLOCO_LINHAS else b""
+
+    def estado(self, **extra) -> EstadoFonte:
+        return EstadoFonte(self.linhas, self.blocos, self.parcial(), **extra)
+
+
+def _pedacos(f) -> Iterator[bytes]:
+    return iter(lambda: f.read(_LEITURA), b"")
+
+
+def _fatias(pedacos: Iterable[bytes], fim: bytes, inicio: Optional[bytes] = None,
+            resto: bool = False, cabeca: Optional[list] = None) -> Iterator[bytes]:
+    """
+    Divide um fluxo de bytes em fatias terminadas por 'fim' (sem ele). Com 'inicio'
+    (nome de um elemento, ex.: b"sheetData"), só divide o que vem depois da tag de
+    abertura, e o que veio até ela (inclusive) vai para 'cabeca'. Com 'resto', a sobra final
+    (linha sem quebra no fim do arquivo) também vira fatia.
+    """
+    pedacos = iter(pedacos)
+    buf = b""
+    if inicio is not None:
+        abertura = re.compile(rb"<(?:[\w.-]+:)?" + inicio + rb"\b[^>]*?(/?)>")
+        for pedaco in pedacos:
+            buf += pedaco
+            m = abertura.search(buf)
+            if m:
+                break
+        else:
+            return
+        if cabeca is not None:
+            cabeca.append(buf[:m.end()])
+        if m.group(1):
+            return  # elemento vazio (<sheetData/>)
+        pedacos, buf = itertools.chain([buf[m.end():]], pedacos), b""
+    for pedaco in pedacos:
+        buf += pedaco
+        pos = 0
+        while True:
+            j = buf.find(fim, pos)
+            if j < 0:
+                break
+            yield buf[pos:j]
+            pos = j + len(fim)
+        buf = buf[pos:]
+    if resto and buf:
+        yield buf
+
+
+def _digests(fatias: Iterable[bytes], **extra) -> EstadoFonte:
+    blocos = _Blocos()
+    for fatia in fatias:
+        blocos.acrescentar(fatia)
+    return blocos.estado(**extra)
+
+
+def _conferir(fatias: Iterable[bytes], anterior: EstadoFonte, blocos: _Blocos,
+              progresso: Progresso = None, todas: bool = False) -> Iterator[bytes]:
+    """
+    Confere as fatias já vistas contra 'anterior' e devolve as novas (com 'todas',
+    também as já vistas); _Alterada se algo mudou.
+    """
+    for fatia in fatias:
+        blocos.acrescentar(fatia)
+        n = blocos.linhas
+        if n <= anterior.linhas:
+            if n % BLOCO_LINHAS == 0 and blocos.blocos[-1] != anterior.blocos[n // BLOCO_LINHAS - 1]:
+                raise _Alterada
+            if n == anterior.linhas and anterior.parcial and blocos.parcial() != anterior.parcial:
+                raise _Alterada
+            if todas:
+                yield fatia
+        else:
+            yield fatia
+        if progresso is not None and n % PASSO_VERIFICACAO == 0:
+            progresso(n, 0)
+    if blocos.linhas < anterior.linhas:
+        raise _Alterada
+
+
+def _declaracoes_ns(cabeca: List[bytes]) -> bytes:
+    """Declarações xmlns da raiz (worksheet/sst), para interpretar fatias fora do documento."""
+    m = _RAIZ.search(cabeca[0]) if cabeca else None
+    return b"".join(_XMLNS.findall(m.group(0))) if m else b""
+
+
+def _texto(el: ET.Element) -> str:
+    """Texto de <is>/<si>: <t> direto ou das runs <r>, sem a fonética (<rPh>), como o openpyxl."""
+    partes = []
+    for filho in el:
+        if filho.tag == _T:
+            partes.append(filho.text or "")
+        elif filho.tag == _R:
+            partes.extend(t.text or "" for t in filho.iter(_T))
+    return "".join(partes)
+
+
+class _Compartilhada(int):
+    """Índice de uma célula no sharedStrings, resolvido depois (ver _percorrer_strings)."""
+
+
+_OUTRO = object()  # célula preenchida que não é texto: número, data, booleano, erro ou fórmula
+
+
+def _celulas(xml: bytes, linha: int) -> Iterator[Tuple[int, Dict[int, object]]]:
+    """
+    (nº da linha, {coluna: valor}) de um trecho de <row>s, como o openpyxl os leria:
+    str, _Compartilhada ou _OUTRO (nunca é código). Células vazias ficam de fora.
+    'linha' é o número da linha anterior, para as <row> sem o atributo r.
+    """
+    for row in ET.fromstring(xml).iter(_ROW):
+        r = row.get("r")
+        linha = int(r) if r else linha + 1
+        valores: Dict[int, object] = {}
+        coluna = 0
+        for c in row.iter(_C):
+            ref = c.get("r")
+            coluna = column_index_from_string(ref.rstrip("0123456789")) if ref else coluna + 1
+            tipo, v = c.get("t"), c.find(_V)
+            if c.find(_F) is not None:
+                valores[coluna] = _OUTRO
+            elif tipo == "inlineStr":
+                inline = c.find(_IS)
+                if inline is not None:
+                    valores[coluna] = _texto(inline)
+            elif v is not None and v.text:
+                if tipo == "s":
+                    valores[coluna] = _Compartilhada(v.text)
+                else:
+                    valores[coluna] = v.text if tipo == "str" else _OUTRO
+        yield linha, valores
+
+
+def _ler_linhas(fatias: List[bytes], ns: bytes, linha: int) -> Iterator[Tuple[int, Dict[int, object]]]:
+    """_celulas de fatias de <row> (sem o '</row>'), LOTE_XML por vez; ET.ParseError se o XML não fechar."""
+    for k in range(0, len(fatias), LOTE_XML):
+        xml = b"<w" + ns + b">" + b"</row>".join(fatias[k:k + LOTE_XML]) + b"</row></w>"
+        for linha, valores in _celulas(xml, linha):
+            yield linha, valores
+
+
+def _percorrer_strings(zin: zipfile.ZipFile, parte: Optional[str], anterior: EstadoFonte,
+                       indices: Iterable[int]) -> Tuple[Optional[EstadoFonte], Dict[int, str]]:
+    """Confere o sharedStrings já visto e devolve (novo estado, textos dos índices pedidos)."""
+    if parte is None:
+        if anterior.linhas or indices:
+            raise _Alterada
+        return None, {}
+    blocos = _Blocos()
+    pedidos = sorted(set(indices), reverse=True)
+    cabeca: List[bytes] = []
+    escolhidas: Dict[int, bytes] = {}
+    with zin.open(parte) as f:
+        for fatia in _conferir(_fatias(_pedacos(f), b"</si>", b"sst", cabeca=cabeca), anterior, blocos, todas=True):
+            i = blocos.linhas - 1
+            if pedidos and pedidos[-1] == i:
+                pedidos.pop()
+                escolhidas[i] = fatia
+    if pedidos:
+        raise _Alterada  # célula aponta para um índice que não existe
+    ns = _declaracoes_ns(cabeca)
+    textos: Dict[int, str] = {}
+    ordem = sorted(escolhidas)
+    for k in range(0, len(ordem), LOTE_XML):
+        lote = ordem[k:k + LOTE_XML]
+        raiz = ET.fromstring(b"<w" + ns + b">" + b"</si>".join(escolhidas[i] for i in lote) + b"</si></w>")
+        for i, si in zip(lote, raiz.iter(_SI)):
+            textos[i] = _texto(si)
+    return blocos.estado(), textos
+
+
+def _detectar(amostra: List[Tuple[int, Dict[int, object]]], textos: Dict[int, str]) -> List[int]:
+    """detectar_colunas sobre as linhas 2..AMOSTRA_DETECCAO+1 lidas do XML."""
+    linhas = []
+    for linha, valores in amostra:
+        if 2 <= linha <= 1 + AMOSTRA_DETECCAO and valores:
+            linha_valores = [None] * max(valores)
+            for coluna, valor in valores.items():
+                linha_valores[coluna - 1] = textos[valor] if isinstance(valor, _Compartilhada) else valor
+            linhas.append(tuple(linha_valores))
+    return detectar_colunas(linhas)
+
+
+def _fatias_texto(filepath: str) -> Iterator[bytes]:
+    with open(filepath, "rb") as f:
+        yield from _fatias(_pedacos(f), b"\n", resto=True)
+
+
+def _colunas_texto(filepath: str, aba: str, delimitador: str) -> Tuple[int, ...]:
+    """Colunas da região em um arquivo delimitado, detectadas como na leitura completa."""
+    with open(filepath, encoding=CODIFICACAO_LEITURA, newline="") as f:
+        linhas = csv.reader(f, delimiter=delimitador)
+        next(linhas, None)  # cabeçalho
+        return colunas_delimitadas(linhas, aba)[0]
+
+
+def estado_base(filepath: str, aba: str = 'aba1') -> Optional[EstadoBase]:
+    """
+    Estado da base (linhas e digests por bloco) para uma futura atualizar_indice.
+    Tirar antes de ler a base completa: se ela mudar no meio, a próxima
+    atualização relê o que faltou (os códigos só marcam números como usados).
+    None se o formato não permitir atualização incremental.
+    """
+    formato = formato_de(filepath)
+    with medir_etapa("estado_base [incremental]") as medida:
+        if formato.delimitador is not None:
+            fonte = _digests(_fatias_texto(filepath), colunas=_colunas_texto(filepath, aba, formato.delimitador))
+            medida.linhas = fonte.linhas
+            return EstadoBase(formato.nome, aba, {"": fonte})
+        if formato is not FORMATO_XLSX:
+            return None
+        with zipfile.ZipFile(filepath) as zin:
+            partes, parte_strings = _partes_planilha(zin)
+            regioes = _regioes_por_aba(aba, list(partes))
+            fontes, amostras = {}, {}
+            for nome, (colunas, detectar) in regioes.items():
+                blocos, cabeca, amostra = _Blocos(), [], []
+                with zin.open(partes[nome]) as f:
+                    for fatia in _fatias(_pedacos(f), b"</row>", b"sheetData", cabeca=cabeca):
+                        blocos.acrescentar(fatia)
+                        if detectar and len(amostra) <= AMOSTRA_DETECCAO:
+                            amostra.append(fatia)
+                fontes[nome] = blocos.estado(parte=partes[nome], colunas=colunas)
+                if detectar:
+                    try:
+                        amostras[nome] = list(_ler_linhas(amostra, _declaracoes_ns(cabeca), 0))
+                    except ET.ParseError:
+                        return None
+            # Colunas detectadas como na leitura completa (sem abrir o openpyxl, que
+            # percorreria cada aba inteira se o arquivo não tiver <dimension>)
+            indices = [v for amostra in amostras.values() for _, valores in amostra
+                       for v in valores.values() if isinstance(v, _Compartilhada)]
+            try:
+                strings, textos = _percorrer_strings(zin, parte_strings, EstadoFonte(), indices)
+            except (_Alterada, ET.ParseError):
+                return None
+            for nome, amostra in amostras.items():
+                fontes[nome].colunas = tuple(sorted(set(fontes[nome].colunas) | set(_detectar(amostra, textos))))
+        medida.linhas = sum(f.linhas for f in fontes.values())
+        return EstadoBase(formato.nome, aba, fontes, strings)
+
+
+def atualizar_indice(filepath: str, digitos: int, indice: Dict[str, AlocadorSigla], estado: EstadoBase,
+                     progresso: Progresso = None) -> Optional[Tuple[Dict[str, AlocadorSigla], EstadoBase, int]]:
+    """
+    Acrescenta a 'indice' (montado quando a base estava em 'estado') só os códigos
+    das linhas novas. Devolve (índice, novo estado, linhas novas), ou None se as
+    linhas já vistas mudaram ou a estrutura não é a mesma: aí reconstrua o índice.
+    """
+    formato = formato_de(filepath)
+    if formato.nome != estado.formato:
+        return None
+    try:
+        with medir_etapa("atualizar_indice [incremental]") as medida:
+            if formato.delimitador is not None:
+                anterior = estado.fontes[""]
+                if not anterior.linhas:
+                    return None  # nem o cabeçalho tinha sido visto
+                if (anterior.linhas <= AMOSTRA_DETECCAO + 1
+                        and any(r.colunas is None for r in interpretar_regioes(estado.especificacao))):
+                    return None  # as linhas novas ainda entrariam na amostra da detecção
+                blocos = _Blocos()
+                novas = list(_conferir(_fatias_texto(filepath), anterior, blocos, progresso))
+                texto = io.StringIO(b"\n".join(novas).decode("utf-8"), newline="")
+                valores = [v for linha in csv.reader(texto, delimiter=formato.delimitador)
+                           for v in valores_colunas(linha, anterior.colunas)]
+                novo = EstadoBase(estado.formato, estado.especificacao, {"": blocos.estado(colunas=anterior.colunas)})
+            else:
+                novas, valores, novo = _atualizar_xlsx(filepath, estado, progresso)
+            indexar_codigos(valores, digitos, indice)
+            medida.linhas = len(novas)
+    except _Alterada:
+        return None
+    if progresso is not None:
+        progresso(len(novas), len(novas))
+    return indice, novo, len(novas)
+
+
+def _atualizar_xlsx(filepath: str, estado: EstadoBase,
+                    progresso: Progresso) -> Tuple[List[bytes], List[object], EstadoBase]:
+    with zipfile.ZipFile(filepath) as zin:
+        partes, parte_strings = _partes_planilha(zin)
+        try:
+            regioes = _regioes_por_aba(estado.especificacao, list(partes))
+        except KeyError:
+            raise _Alterada from None
+        if list(regioes) != list(estado.fontes):
+            raise _Alterada
+        fontes: Dict[str, EstadoFonte] = {}
+        todas: List[bytes] = []
+        valores: List[object] = []
+        for nome, (_, detectar) in regioes.items():
+            anterior = estado.fontes[nome]
+            if partes[nome] != anterior.parte or not anterior.linhas:
+                raise _Alterada
+            if detectar and anterior.linhas <= AMOSTRA_DETECCAO + 1:
+                raise _Alterada  # as linhas novas ainda entrariam na amostra da detecção
+            blocos, cabeca = _Blocos(), []
+            with zin.open(partes[nome]) as f:
+                fatias = _fatias(_pedacos(f), b"</row>", b"sheetData", cabeca=cabeca)
+                novas = list(_conferir(fatias, anterior, blocos, progresso))
+            alvo = frozenset(anterior.colunas)
+            try:
+                valores.extend(valor for linha, celulas in _ler_linhas(novas, _declaracoes_ns(cabeca), anterior.linhas)
+                               if linha >= 2 for coluna, valor in celulas.items()
+                               if coluna in alvo and valor is not _OUTRO)
+            except ET.ParseError:
+                raise _Alterada from None
+            todas.extend(novas)
+            fontes[nome] = blocos.estado(parte=anterior.parte, colunas=anterior.colunas)
+        indices = [v for v in valores if isinstance(v, _Compartilhada)]
+        try:
+            strings, textos = _percorrer_strings(zin, parte_strings, estado.strings or EstadoFonte(), indices)
+        except ET.ParseError:
+            raise _Alterada from None
+    valores = [textos[v] if isinstance(v, _Compartilhada) else v for v in valores]
+    return todas, valores, EstadoBase(estado.formato, estado.especificacao, fontes, strings)
@@ -0,0 +1,162 @@
+"""
+Linha de comando (sem interface gráfica) para o mesmo pipeline da GUI.
+
+Exemplo:
+    python -m core.cli --base base.xlsx --entrada siglas1.xlsx --entrada siglas2.xlsx \\
+        --aba-siglas SIGLAS --coluna A --digitos 4
+
+    # CSV/TSV em blocos, da entrada padrão para a saída padrão
+    cat siglas.csv | python -m core.cli --base base.csv --entrada - --destino - > resultado.csv
+
+Códigos de saída:
+    0  sucesso
+    1  erro inesperado
+    2  argumentos inválidos
+    3  falha ao ler a base
+    4  falha ao processar uma entrada (as entradas anteriores já foram gravadas)
+"""
+
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+from core.excel_processor import MODO_INJETAR, MODOS_SAIDA
+from core.formatos import FLUXO, FORMATOS
+from core.ledger import JOURNAIS, VAR_JOURNAL
+from core.metricas import caminho_metricas_padrao
+from core.pipeline import (
+    ABA_BASE_PADRAO,
+    ABA_SAIDA_PADRAO,
+    ABA_SIGLAS_PADRAO,
+    COLUNA_SIGLAS_PADRAO,
+    Cronometro,
+    ErroBase,
+    ErroEntrada,
+    processar_arquivos,
+)
+
+EXIT_OK = 0
+EXIT_ERRO = 1
+EXIT_USO = 2
+EXIT_BASE = 3
+EXIT_ENTRADA = 4
+
+
+def _parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="python -m core.cli",
+        description="Gera o próximo código por sigla para uma ou mais planilhas de entrada.",
+    )
+    p.add_argument("--base", required=True, help="arquivo com os códigos existentes (.xlsx, .csv ou .tsv)")
+    p.add_argument("--entrada", required=True, action="append", metavar="ARQUIVO",
+                   help="arquivo com as siglas (.xlsx, .csv ou .tsv; '-' = entrada padrão); "
+                        "pode repetir: a base é indexada uma única vez")
+    p.add_argument("--aba-base", default=ABA_BASE_PADRAO,
+                   help=f"aba da base (padrão: {ABA_BASE_PADRAO}, colunas A e B); várias abas/colunas: "
+                        "'aba1!A:D;aba2!C', '*' = todas as abas com colunas detectadas")
+    p.add_argument("--aba-siglas", default=ABA_SIGLAS_PADRAO, help=f"aba das siglas (padrão: {ABA_SIGLAS_PADRAO})")
+    p.add_argument("--coluna", default=COLUNA_SIGLAS_PADRAO, help=f"letra da coluna das siglas (padrão: {COLUNA_SIGLAS_PADRAO})")
+    p.add_argument("--aba-saida", default=ABA_SAIDA_PADRAO, help=f"aba de resultado (padrão: {ABA_SAIDA_PADRAO})")
+    p.add_argument("--digitos", type=int, choices=(3, 4), default=4, help="dígitos do sufixo (padrão: 4)")
+    p.add_argument("--sem-cache", action="store_true", help="ignora o cache persistente do índice")
+    p.add_argument("--sem-incremental", action="store_true",
+                   help="base alterada: reconstrói o índice inteiro em vez de ler só as linhas acrescentadas")
+    p.add_argument("--sem-snapshot", action="store_true",
+                   help="ignora o snapshot compilado da base (python -m core.snapshot)")
+    p.add_argument("--ledger", metavar="CAMINHO",
+                   help="registro SQLite dos códigos emitidos (padrão: <base>.codigos.sqlite)")
+    p.add_argument("--sem-ledger", action="store_true",
+                   help="não reserva os códigos no ledger (execuções simultâneas podem repetir códigos)")
+    p.add_argument("--ledger-journal", type=str.upper, choices=JOURNAIS,
+                   help="journal do SQLite do ledger; DELETE para pasta de rede (padrão: "
+                        f"{VAR_JOURNAL}, ou detectado pela pasta do ledger)")
+    p.add_argument("--saida", choices=MODOS_SAIDA, default=MODO_INJETAR,
+                   help="injetar: nova aba no próprio arquivo, sem regravar as demais (padrão); "
+                        "arquivo: resultado em <entrada>_<aba-saida>.xlsx; completo: modo antigo (openpyxl)")
+    p.add_argument("--destino", metavar="CAMINHO",
+                   help="grava o resultado de uma única entrada neste .csv/.tsv ('-' = saída padrão), "
+                        "em blocos; sem ele, entradas .csv/.tsv geram <entrada>_<aba-saida>.<ext>")
+    p.add_argument("--formato", choices=sorted(ext.lstrip(".") for ext in FORMATOS if ext != ".xlsx"),
+                   help="formato da entrada/saída padrão ('-'); padrão: csv")
+    p.add_argument("--workers", type=int, default=1, metavar="N",
+                   help="processos para ler a base e as entradas em pipeline, sobrepondo as etapas "
+                        "(0 = nº de CPUs; padrão: 1)")
+    p.add_argument("--metricas", metavar="ARQUIVO",
+                   help="log JSON Lines com as métricas de cada execução "
+                        "(padrão: metricas.jsonl ao lado do cache; GERADOR_CODIGOS_METRICAS)")
+    p.add_argument("--sem-metricas", action="store_true", help="não grava o log de métricas")
+    p.add_argument("--perfil", metavar="ARQUIVO",
+                   help="perfila a execução inteira com cProfile e grava em ARQUIVO (ver pstats)")
+    return p
+
+
+def _relatorio(cronometro: Cronometro):
+    for m in cronometro.para_dicts():
+        nome = "  " * m["nivel"] + m["nome"]
+        linhas = f" | {m['linhas']} linhas" if m["linhas"] is not None else ""
+        vazao = f" ({m['vazao']:.0f}/s)" if m["vazao"] is not None else ""
+        rss = f" | RSS {m['pico_rss_mb']:.0f} MiB" if m["pico_rss_mb"] is not None else ""
+        print(f"[tempo] {nome}: {m['duracao_s']:.3f} s (início +{m['inicio']:.3f} s) | CPU {m['cpu_s']:.3f} s"
+              f"{linhas}{vazao}{rss}", file=sys.stderr)
+    print(f"[tempo] soma das etapas: {cronometro.total():.3f} s", file=sys.stderr)
+    print(f"[tempo] decorrido: {cronometro.decorrido():.3f} s", file=sys.stderr)
+    print(f"[tempo] CPU (este processo): {cronometro.cpu_total():.3f} s", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    try:
+        args = _parser().parse_args(argv)
+    except SystemExit as e:
+        return EXIT_OK if e.code == 0 else EXIT_USO
+    if not args.coluna.isalpha():
+        print(f"Erro: coluna inválida '{args.coluna}' (use a letra, ex.: A)", file=sys.stderr)
+        return EXIT_USO
+
+    workers = args.workers or os.cpu_count() or 1
+    if workers < 0:
+        print("Erro: --workers deve ser >= 0", file=sys.stderr)
+        return EXIT_USO
+
+    if args.destino is not None and len(args.entrada) > 1:
+        print("Erro: --destino só pode ser usado com uma única --entrada", file=sys.stderr)
+        return EXIT_USO
+
+    cronometro = Cronometro()
+    try:
+        resultados = processar_arquivos(
+            args.base, args.entrada, args.digitos,
+            aba_base=args.aba_base, aba_siglas=args.aba_siglas, coluna=args.coluna,
+            aba_saida=args.aba_saida, usar_cache=not args.sem_cache, cronometro=cronometro,
+            workers=workers, modo_saida=args.saida,
+            usar_ledger=not args.sem_ledger, caminho_ledger=args.ledger, journal_ledger=args.ledger_journal,
+            usar_snapshot=not args.sem_snapshot,
+            arquivo_metricas=None if args.sem_metricas else (args.metricas or caminho_metricas_padrao()),
+            arquivo_perfil=args.perfil, destino=args.destino, formato=args.formato,
+            incremental=not args.sem_incremental,
+        )
+    except ErroBase as e:
+        print(f"Erro ao carregar a base {e}", file=sys.stderr)
+        return EXIT_BASE
+    except ErroEntrada as e:
+        print(f"Erro ao processar a entrada {e}", file=sys.stderr)
+        return EXIT_ENTRADA
+    except KeyboardInterrupt:
+        print("Interrompido.", file=sys.stderr)
+        return EXIT_ERRO
+    except Exception as e:
+        print(f"Erro inesperado: {e}", file=sys.stderr)
+        return EXIT_ERRO
+    finally:
+        _relatorio(cronometro)
+
+    # Com algum resultado na saída padrão (--destino - ou --entrada - sem --destino),
+    # o resumo vai para stderr; o destino resolvido vem de processar_arquivos
+    resumo = sys.stderr if any(arquivo == FLUXO for arquivo, _, _ in resultados) else sys.stdout
+    for entrada, (_, _, quantidade) in zip(args.entrada, resultados):
+        print(f"{entrada}: {quantidade} códigos gerados", file=resumo)
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
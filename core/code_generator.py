@@ -1,23 +1,81 @@
-import pandas as pd
+import threading
+import weakref
+from typing import TYPE_CHECKING, Dict, Optional
+
+from core.fast_code_generator import AlocadorSigla, _build_index_vetorizado, indexar_codigos
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# pandas só é necessário para quem chama proximo_codigo com um DataFrame; o
+# caminho vetorizado (_build_index_vetorizado) o importa na primeira chamada.
 
 def codigo_valido(codigo: str) -> bool:
     return isinstance(codigo, str) and len(codigo) in [6, 7] and codigo[:3].isalpha() and codigo[3:].isdigit()
 
-def proximo_codigo(sigla: str, df_base: pd.DataFrame, digitos: int = 4) -> str:
-    df_base = df_base[df_base['Codigo'].apply(codigo_valido)]
-    df_base = df_base[df_base['Codigo'].str.startswith(sigla)]
-    df_base = df_base[df_base['Codigo'].str.len() == (3 + digitos)]
 
-    if df_base.empty:
-        return f"{sigla}{'1'.zfill(digitos)}"
+class _IndiceMemorizado:
+    """Índice de um DataFrame já visto: referência fraca ao DataFrame, coluna e nº de linhas indexadas."""
+    __slots__ = ("df_ref", "codigos", "linhas", "idx")
+
+    def __init__(self, df_base: "pd.DataFrame", codigos: "pd.Series", idx: Dict[str, AlocadorSigla]):
+        self.df_ref = weakref.ref(df_base)
+        self.codigos = codigos.copy()  # cópia: edição no lugar não pode "confirmar" o prefixo
+        self.linhas = len(codigos)
+        self.idx = idx
+
+
+_memo: Dict[int, _IndiceMemorizado] = {}  # digitos -> último DataFrame consultado
+_memo_lock = threading.Lock()
+
+
+def _mesmo_prefixo(codigos: "pd.Series", anteriores: "pd.Series") -> bool:
+    # Coluna inteira, vetorizado: uma amostra deixaria passar uma linha do meio
+    # alterada, e o índice estendido daria como livre um código já usado. O custo
+    # é O(n), da mesma ordem do pd.concat que criou o novo DataFrame.
+    n = len(anteriores)
+    return codigos.iloc[:n].reset_index(drop=True).equals(anteriores.reset_index(drop=True))
+
+
+def _indice_memorizado(df_base: "pd.DataFrame", digitos: int) -> Dict[str, AlocadorSigla]:
+    # Chave: identidade + nº de linhas do DataFrame. Mesmo objeto e mesmo tamanho
+    # reaproveitam o índice; linhas acrescentadas (no próprio objeto ou em um novo
+    # DataFrame vindo de pd.concat([df_base, novas])) só indexam o trecho novo.
+    codigos = df_base['Codigo']
+    with _memo_lock:
+        memo = _memo.get(digitos)
+        if memo is not None and len(codigos) >= memo.linhas:
+            mesmo_df = memo.df_ref() is df_base
+            if mesmo_df and len(codigos) == memo.linhas:
+                return memo.idx
+            # Mesmo objeto que cresceu, ou novo objeto cujas primeiras linhas são
+            # exatamente as já indexadas: só o trecho novo é indexado
+            if mesmo_df or _mesmo_prefixo(codigos, memo.codigos):
+                indexar_codigos(codigos.iloc[memo.linhas:], digitos, memo.idx)
+                _memo[digitos] = _IndiceMemorizado(df_base, codigos, memo.idx)
+                return memo.idx
+
+        idx = _build_index_vetorizado(codigos, digitos)
+        _memo[digitos] = _IndiceMemorizado(df_base, codigos, idx)
+        return idx
+
+
+def limpar_cache_proximo_codigo():
+    """
+    Descarta os índices memorizados. Use após editar linhas já existentes no próprio
+    DataFrame já consultado; uma cópia alterada é detectada e reindexada sozinha.
+    """
+    with _memo_lock:
+        _memo.clear()
 
-    numeros = df_base['Codigo'].str.extract(fr'{sigla}(\d{{{digitos}}})')[0].dropna()
-    if numeros.empty:
-        return f"{sigla}{'1'.zfill(digitos)}"
 
-    numeros = numeros.astype(int)
-    usados = set(numeros)
-    lacunas = set(range(1, numeros.max() + 2)) - usados
-    proximo = min(lacunas) if lacunas else numeros.max() + 1
+def proximo_codigo(sigla: str, df_base: "pd.DataFrame", digitos: int = 4) -> str:
+    # Mesmo resultado do filtro com .apply + regex, mas consultando um índice
+    # memorizado por DataFrame (_indice_memorizado): chamadas em laço não
+    # refazem o filtro da base inteira a cada sigla.
+    if len(sigla) == 3:
+        aloc: Optional[AlocadorSigla] = _indice_memorizado(df_base, digitos).get(sigla)
+        if aloc is not None:
+            return f"{sigla}{str(aloc.proximo_livre()).zfill(digitos)}"
 
-    return f"{sigla}{str(proximo).zfill(digitos)}"
\ No newline at end of file
+    return f"{sigla}{'1'.zfill(digitos)}"
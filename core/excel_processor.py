@@ -1,38 +1,572 @@
-import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.utils.exceptions import IllegalCharacterError
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from xml.etree import ElementTree as ET
+from xml.sax.saxutils import escape
+import itertools
 import json
+import math
+import os
+import posixpath
+import re
+import shutil
+import tempfile
+import time
+import zipfile
 
-def carregar_codigos_existentes(filepath: str, aba='aba1') -> pd.DataFrame:
-    wb = load_workbook(filepath)
-    ws = wb[aba]
-    dados_a, dados_b = [], []
+from core.fast_code_generator import AlocadorSigla, _codigo_valido_formato, indexar_codigos, mesclar_indices
+from core.metricas import PROCESSO_FILHO, Medida, medir, medir_etapa, registrar_medida
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# pandas é opcional: o pipeline usa listas e TabelaResultado; só as funções
+# legadas que recebem/devolvem DataFrame o importam (carregar_codigos_existentes,
+# extrair_siglas e salvar_resultado com um DataFrame).
+
+PASSO_PROGRESSO = 1000  # linhas entre dois avisos de progresso
+COLUNAS_RESULTADO = ("Sigla", "Proximo_Codigo")
+
+
+@dataclass
+class TabelaResultado:
+    """Resultado de uma entrada sem pandas: a sigla lida e o código gerado (ou None), por linha."""
+    siglas: list
+    codigos: List[Optional[str]]
+
+    def __len__(self) -> int:
+        return len(self.siglas)
+
+    def gerados(self) -> int:
+        return sum(1 for c in self.codigos if c is not None)
+
+    def linhas(self) -> Iterator[list]:
+        """Cabeçalho + uma linha [sigla, código] por sigla (formato de Worksheet.append)."""
+        yield list(COLUNAS_RESULTADO)
+        for sigla, codigo in zip(self.siglas, self.codigos):
+            yield [sigla, codigo]
+
+    def para_dataframe(self) -> "pd.DataFrame":
+        """Adaptador para quem ainda trabalha com DataFrame (requer pandas)."""
+        import pandas as pd
+        return pd.DataFrame({COLUNAS_RESULTADO[0]: self.siglas, COLUNAS_RESULTADO[1]: self.codigos})
+
+# Regiões da base: quais abas e colunas têm códigos. A especificação é um texto
+# (o mesmo parâmetro 'aba' de sempre, então cache, snapshot e ledger continuam
+# identificando a base por ele):
+#   'aba1'              aba1, colunas A e B (padrão)
+#   'aba1!A:D'          aba1, colunas A a D ('A,C,F' e 'A:C,F' também valem)
+#   'aba1!*'            aba1, colunas detectadas pelo formato dos valores
+#   'aba1;Plan2!C:E'    várias regiões separadas por ';'
+#   '*' / '*!A:B'       todas as abas (colunas detectadas / A e B)
+# Em todas, a linha 1 é cabeçalho.
+ABA_TODAS = "*"
+COLUNAS_DETECTAR = "*"
+SEPARADOR_REGIOES = ";"
+COLUNAS_BASE_PADRAO = (1, 2)  # A e B
+AMOSTRA_DETECCAO = 200        # linhas examinadas para detectar as colunas de códigos
+
+
+@dataclass(frozen=True)
+class RegiaoBase:
+    """Aba (ou ABA_TODAS) e colunas (1 = A) de onde vêm os códigos; colunas=None: detectar."""
+    aba: str
+    colunas: Optional[Tuple[int, ...]] = COLUNAS_BASE_PADRAO
+
+
+def _interpretar_colunas(texto: str) -> Optional[Tuple[int, ...]]:
+    texto = texto.strip().upper()
+    if texto == COLUNAS_DETECTAR:
+        return None
+    colunas = set()
+    for parte in texto.split(","):
+        inicio, _, fim = parte.strip().partition(":")
+        a, b = column_index_from_string(inicio), column_index_from_string(fim or inicio)  # ValueError se inválida
+        colunas.update(range(min(a, b), max(a, b) + 1))
+    return tuple(sorted(colunas))
+
+
+def interpretar_regioes(especificacao: str) -> List[RegiaoBase]:
+    """Regiões da especificação (ver ABA_TODAS e exemplos acima), sem abrir a planilha."""
+    regioes = []
+    for parte in especificacao.split(SEPARADOR_REGIOES):
+        if not parte:
+            continue
+        aba, sep, colunas = parte.rpartition("!")
+        try:
+            if not sep:
+                raise ValueError(parte)
+            regioes.append(RegiaoBase(aba, _interpretar_colunas(colunas)))
+        except ValueError:
+            # Sem '!' (ou com algo que não é coluna depois dele): tudo é o nome da aba
+            regioes.append(RegiaoBase(parte, None if parte == ABA_TODAS else COLUNAS_BASE_PADRAO))
+    return regioes
+
+
+def _regioes_por_aba(especificacao: str, abas: List[str]) -> Dict[str, Tuple[Tuple[int, ...], bool]]:
+    """
+    Aba -> (colunas explícitas, detectar?), na ordem da especificação, com ABA_TODAS
+    expandida. Um nome de aba que contenha ';' vale por inteiro. KeyError se uma aba não existir.
+    """
+    regioes = [RegiaoBase(especificacao)] if especificacao in abas else interpretar_regioes(especificacao)
+    por_aba: Dict[str, Tuple[set, bool]] = {}
+    for regiao in regioes:
+        alvos = abas if regiao.aba == ABA_TODAS else [regiao.aba]
+        for aba in alvos:
+            if aba not in abas:
+                raise KeyError(f"Worksheet {aba} does not exist.")
+            colunas, detectar = por_aba.setdefault(aba, (set(), False))
+            colunas.update(regiao.colunas or ())
+            por_aba[aba] = (colunas, detectar or regiao.colunas is None)
+    if not por_aba:
+        raise KeyError(f"nenhuma aba em '{especificacao}'")
+    return {aba: (tuple(sorted(c)), d) for aba, (c, d) in por_aba.items()}
+
+
+def resolver_regioes(filepath: str, especificacao: str) -> Dict[str, Tuple[Tuple[int, ...], bool]]:
+    """Confere a especificação contra as abas da planilha (KeyError se faltar alguma)."""
+    return _regioes_por_aba(especificacao, abas_da_planilha(filepath))
+
+
+def varias_abas(especificacao: str) -> bool:
+    """Se a especificação pode abranger mais de uma aba (e ser indexada em paralelo)."""
+    abas = {r.aba for r in interpretar_regioes(especificacao)}
+    return len(abas) > 1 or ABA_TODAS in abas
+
+
+def _parece_codigo(valor: object) -> bool:
+    return _codigo_valido_formato(valor, 3) or _codigo_valido_formato(valor, 4)
+
+
+def detectar_colunas(amostra: Iterable[tuple]) -> List[int]:
+    """Colunas (1 = A) em que ao menos metade dos valores preenchidos da amostra tem formato de código."""
+    preenchidos: Counter = Counter()
+    codigos: Counter = Counter()
+    for row in amostra:
+        for i, valor in enumerate(row, 1):
+            if valor is None or valor == "":
+                continue
+            preenchidos[i] += 1
+            if _parece_codigo(valor):
+                codigos[i] += 1
+    return [i for i in sorted(codigos) if codigos[i] * 2 >= preenchidos[i]]
+
+
+def _linhas_regiao(ws, colunas: Tuple[int, ...], detectar: bool) -> Iterator[tuple]:
+    """A partir da linha 2, os valores das colunas da região (explícitas + detectadas), linha a linha."""
+    if detectar:
+        linhas = ws.iter_rows(min_row=2, values_only=True)
+        amostra = list(itertools.islice(linhas, AMOSTRA_DETECCAO))
+        colunas = tuple(sorted(set(colunas) | set(detectar_colunas(amostra))))
+        linhas, primeira = itertools.chain(amostra, linhas), 1
+    elif colunas:
+        linhas, primeira = ws.iter_rows(min_row=2, min_col=colunas[0], max_col=colunas[-1],
+                                        values_only=True), colunas[0]
+    else:
+        return
+    if not detectar and colunas == tuple(range(primeira, primeira + len(colunas))):
+        yield from linhas  # colunas contíguas: a linha já vem só com elas
+        return
+    posicoes = [c - primeira for c in colunas]
+    for row in linhas:
+        yield tuple(row[i] if i < len(row) else None for i in posicoes)
+
+
+def iterar_codigos_base(filepath: str, aba='aba1',
+                        progresso: Optional[Callable[[int, int], None]] = None) -> Iterator[object]:
+    """
+    Lê a base em modo somente leitura (streaming) e devolve, um a um, os valores
+    não vazios das regiões de 'aba' (padrão: colunas A e B; ver interpretar_regioes),
+    a partir da linha 2, aba por aba. Nada é acumulado em memória.
+    'progresso(linhas_lidas, total)' é chamado periodicamente, se informado.
+    """
+    wb = load_workbook(filepath, read_only=True)
+    try:
+        regioes = _regioes_por_aba(aba, wb.sheetnames)
+        total = sum(max((wb[nome].max_row or 1) - 1, 0) for nome in regioes)
+        lidas = 0
+        for nome, (colunas, detectar) in regioes.items():
+            for row in _linhas_regiao(wb[nome], colunas, detectar):
+                for valor in row:
+                    if valor:
+                        yield valor
+                lidas += 1
+                if progresso is not None and lidas % PASSO_PROGRESSO == 0:
+                    progresso(lidas, total)
+        if progresso is not None:
+            progresso(lidas, total)
+    finally:
+        wb.close()
+
+def _indexar_aba(filepath: str, aba: str, colunas: Tuple[int, ...], detectar: bool,
+                 digitos: int) -> Tuple[Dict[str, AlocadorSigla], Medida]:
+    """Índice de uma aba, para o pool de processos de carregar_indice_base."""
+    with medir(f"indexar_aba [{aba}]", PROCESSO_FILHO) as medida:
+        wb = load_workbook(filepath, read_only=True)
+        try:
+            medida.linhas = 0
+            idx: Dict[str, AlocadorSigla] = {}
+            for row in _linhas_regiao(wb[aba], colunas, detectar):
+                indexar_codigos(row, digitos, idx)
+                medida.linhas += sum(1 for valor in row if valor)  # valores, como carregar_indice_base
+        finally:
+            wb.close()
+    return idx, medida
+
+def carregar_indice_base(filepath: str, digitos: int, aba='aba1',
+                         progresso: Optional[Callable[[int, int], None]] = None,
+                         workers: Optional[int] = None) -> Dict[str, AlocadorSigla]:
+    """
+    Constrói o índice de alocação (ver fast_code_generator.indexar_codigos) direto
+    da planilha, sem listas intermediárias, DataFrame ou codigos.json.
 
-    for row in ws.iter_rows(min_row=2, max_col=2, values_only=True):
-        dados_a.append(row[0] if row[0] else None)
-        dados_b.append(row[1] if len(row) > 1 and row[1] else None)
+    Se 'aba' abranger várias abas (ver interpretar_regioes), cada aba é indexada em
+    um processo do pool (até 'workers', padrão: nº de CPUs) e os índices são mesclados:
+    o tempo tende ao da maior aba, e não à soma. Nesse caso 'progresso' recebe
+    (abas concluídas, total de abas). Com um único worker (ou uma única CPU), as
+    abas são lidas em sequência neste processo: cada processo do pool relê as
+    partes comuns do pacote (ex.: sharedStrings), o que só compensa em paralelo.
+    """
+    workers = workers or os.cpu_count() or 1
+    if not varias_abas(aba) or workers <= 1:
+        with medir_etapa("carregar_indice_base") as medida:
+            lidos = 0
 
-    df = pd.DataFrame({'Codigo': dados_a + dados_b}).dropna()
-    with open("codigos.json", "w") as f:
-        json.dump(df.to_dict(orient="records"), f)
+            def contar(valores: Iterator[object]) -> Iterator[object]:
+                nonlocal lidos
+                for lidos, valor in enumerate(valores, 1):
+                    yield valor
+
+            idx = indexar_codigos(contar(iterar_codigos_base(filepath, aba, progresso)), digitos)
+            medida.linhas = lidos
+        return idx
+
+    with medir_etapa("carregar_indice_base [abas]") as medida:
+        regioes = _regioes_por_aba(aba, abas_da_planilha(filepath))
+        idx = {}
+        medida.linhas = 0
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(regioes)))
+        try:
+            pendentes = {pool.submit(_indexar_aba, filepath, nome, colunas, detectar, digitos): nome
+                         for nome, (colunas, detectar) in regioes.items()}
+            while pendentes:
+                if progresso is not None:
+                    progresso(len(regioes) - len(pendentes), len(regioes))  # Cancelado interrompe aqui
+                prontos, _ = wait(pendentes, timeout=0.2, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    nome = pendentes.pop(futuro)
+                    idx_aba, medida_aba = futuro.result()
+                    registrar_medida(f"indexar_aba [{nome}] [processo]", medida_aba)
+                    mesclar_indices(idx, idx_aba)
+                    medida.linhas += medida_aba.linhas
+            if progresso is not None:
+                progresso(len(regioes), len(regioes))
+        finally:
+            pool.shutdown(wait=not pendentes, cancel_futures=True)
+    return idx
+
+def carregar_codigos_existentes(filepath: str, aba='aba1') -> "pd.DataFrame":
+    """API legada (requer pandas); o pipeline usa carregar_indice_base. 'aba': ver interpretar_regioes."""
+    import pandas as pd
+
+    with medir_etapa("carregar_codigos_existentes") as medida:
+        wb = load_workbook(filepath, read_only=True)
+        try:
+            dados: List[list] = []  # uma lista por coluna: todos os valores de A, depois os de B, ...
+            linhas = 0
+            for nome, (colunas, detectar) in _regioes_por_aba(aba, wb.sheetnames).items():
+                colunas_aba: Optional[List[list]] = None
+                for row in _linhas_regiao(wb[nome], colunas, detectar):
+                    if colunas_aba is None:
+                        colunas_aba = [[] for _ in row]
+                    for j, coluna in enumerate(colunas_aba):
+                        valor = row[j] if j < len(row) else None
+                        coluna.append(valor if valor else None)
+                    linhas += 1
+                dados.extend(colunas_aba or [])
+        finally:
+            wb.close()
+
+        df = pd.DataFrame({'Codigo': [v for coluna in dados for v in coluna]}).dropna()
+        with open("codigos.json", "w") as f:
+            json.dump(df.to_dict(orient="records"), f)
+        medida.linhas = linhas
     return df
 
-def extrair_siglas(filepath: str, aba: str, coluna: int) -> pd.DataFrame:
-    wb = load_workbook(filepath)
-    ws = wb[aba]
-    siglas = [row[coluna - 1].value for row in ws.iter_rows(min_row=1, min_col=coluna, max_col=coluna)]
-    return pd.DataFrame(siglas, columns=["Sigla"])
+def abas_da_planilha(filepath: str) -> List[str]:
+    """Nomes das abas (modo somente leitura: não percorre as células)."""
+    wb = load_workbook(filepath, read_only=True)
+    try:
+        return wb.sheetnames
+    finally:
+        wb.close()
 
-def salvar_resultado(filepath: str, aba: str, df_resultado: pd.DataFrame):
-    wb = load_workbook(filepath)
+def ler_coluna_siglas(filepath: str, aba: str, coluna: int,
+                      progresso: Optional[Callable[[int, int], None]] = None) -> list:
+    """
+    Lê a coluna de siglas (número da coluna, 1 = A) desde a linha 1 e devolve
+    os valores brutos (células vazias = None), sem pandas.
+    'progresso(linhas_lidas, total)' é chamado periodicamente, se informado.
+    """
+    with medir_etapa("ler_coluna_siglas") as medida:
+        wb = load_workbook(filepath)
+        ws = wb[aba]
+        total = ws.max_row
+        siglas = []
+        for row in ws.iter_rows(min_row=1, min_col=coluna, max_col=coluna):
+            siglas.append(row[0].value)
+            if progresso is not None and len(siglas) % PASSO_PROGRESSO == 0:
+                progresso(len(siglas), total)
+        if progresso is not None:
+            progresso(len(siglas), total)
+        medida.linhas = len(siglas)
+    return siglas
+
+def extrair_siglas(filepath: str, aba: str, coluna: int,
+                   progresso: Optional[Callable[[int, int], None]] = None) -> "pd.DataFrame":
+    """ler_coluna_siglas como DataFrame de uma coluna 'Sigla' (API legada, requer pandas)."""
+    import pandas as pd
+    return pd.DataFrame(ler_coluna_siglas(filepath, aba, coluna, progresso), columns=["Sigla"])
+
+MODO_INJETAR = "injetar"      # nova aba injetada no próprio arquivo, sem reprocessar as demais
+MODO_ARQUIVO = "arquivo"      # resultado em um arquivo separado (workbook write-only)
+MODO_COMPLETO = "completo"    # legado: load_workbook + save do arquivo inteiro
+MODOS_SAIDA = (MODO_INJETAR, MODO_ARQUIVO, MODO_COMPLETO)
+
+_NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+_NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_TIPO_WORKSHEET = _NS_REL + "/worksheet"
+_CT_WORKSHEET = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+
+def caminho_arquivo_resultado(filepath: str, aba: str) -> str:
+    """Destino padrão do modo 'arquivo': <entrada>_<aba>.xlsx na mesma pasta."""
+    raiz, _ = os.path.splitext(filepath)
+    return f"{raiz}_{aba}.xlsx"
+
+@contextmanager
+def _gravacao_atomica(destino: str):
+    """
+    Entrega um caminho temporário na mesma pasta do destino; só em caso de sucesso
+    ele substitui o destino (os.replace). Falha ou cancelamento não tocam no original.
+    """
+    pasta = os.path.dirname(os.path.abspath(destino))
+    fd, tmp = tempfile.mkstemp(dir=pasta, prefix=".~", suffix=os.path.splitext(destino)[1] + ".tmp")
+    os.close(fd)
+    try:
+        yield tmp
+        if os.path.exists(destino):
+            shutil.copymode(destino, tmp)
+        os.replace(tmp, destino)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def _nome_livre(aba: str, existentes: List[str], ignorar_caixa: bool = False) -> str:
+    """aba, aba1, aba2, ... (primeiro nome que ainda não existe)."""
+    usados = {n.lower() for n in existentes} if ignorar_caixa else set(existentes)
+    chave = (lambda n: n.lower()) if ignorar_caixa else (lambda n: n)
     original_aba = aba
     counter = 1
-    while aba in wb.sheetnames:
+    while chave(aba) in usados:
         aba = f"{original_aba}{counter}"
         counter += 1
+    return aba
+
+def _linhas_resultado(resultado: Union[TabelaResultado, "pd.DataFrame"],
+                      progresso: Optional[Callable[[int, int], None]]) -> Iterator[list]:
+    """Cabeçalho + linhas do resultado, avisando o progresso a cada PASSO_PROGRESSO linhas."""
+    total = len(resultado) + 1  # + cabeçalho
+    if isinstance(resultado, TabelaResultado):
+        linhas = resultado.linhas()
+    else:
+        from openpyxl.utils.dataframe import dataframe_to_rows  # importa numpy
+        linhas = dataframe_to_rows(resultado, index=False, header=True)
+    for i, r in enumerate(linhas, 1):
+        yield r
+        if progresso is not None and i % PASSO_PROGRESSO == 0:
+            progresso(i, total)
+    if progresso is not None:
+        progresso(total, total)
+
+def salvar_resultado(filepath: str, aba: str, df_resultado: Union[TabelaResultado, "pd.DataFrame"],
+                     progresso: Optional[Callable[[int, int], None]] = None,
+                     modo: str = MODO_INJETAR, destino: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Grava df_resultado (TabelaResultado ou DataFrame) em uma nova aba (aba, aba1,
+    aba2, ...) e devolve (arquivo, aba).
+    - modo 'injetar': a aba é escrita em streaming e inserida no .xlsx existente;
+      as demais partes do pacote são copiadas sem passar pelo openpyxl.
+    - modo 'arquivo': grava só o resultado em 'destino' (padrão: caminho_arquivo_resultado).
+    - modo 'completo': comportamento antigo (carrega e salva o workbook inteiro).
+    Em todos os modos a gravação é atômica (arquivo temporário + os.replace).
+    'progresso(linhas_escritas, total)' é chamado durante a escrita das linhas; uma
+    exceção levantada por ele interrompe a gravação sem alterar o arquivo de destino.
+    """
+    with medir_etapa(f"salvar_resultado [{modo}]") as medida:
+        medida.linhas = len(df_resultado)
+        return _salvar_resultado(filepath, aba, df_resultado, progresso, modo, destino)
+
+def _salvar_resultado(filepath: str, aba: str, df_resultado: Union[TabelaResultado, "pd.DataFrame"],
+                      progresso: Optional[Callable[[int, int], None]], modo: str,
+                      destino: Optional[str]) -> Tuple[str, str]:
+    if modo == MODO_INJETAR:
+        return filepath, _injetar_aba(filepath, aba, df_resultado, progresso)
+    if modo == MODO_ARQUIVO:
+        destino = destino or caminho_arquivo_resultado(filepath, aba)
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(aba)
+        for r in _linhas_resultado(df_resultado, progresso):
+            ws.append(r)
+        with _gravacao_atomica(destino) as tmp:
+            wb.save(tmp)
+        return destino, aba
+    if modo != MODO_COMPLETO:
+        raise ValueError(f"Modo de saída inválido: {modo!r} (use um de {MODOS_SAIDA})")
+
+    wb = load_workbook(filepath)
+    aba = _nome_livre(aba, wb.sheetnames)
     ws = wb.create_sheet(aba)
 
-    for r in dataframe_to_rows(df_resultado, index=False, header=True):
+    for r in _linhas_resultado(df_resultado, progresso):
         ws.append(r)
 
-    wb.save(filepath)
\ No newline at end of file
+    with _gravacao_atomica(filepath) as tmp:
+        wb.save(tmp)
+    return filepath, aba
+
+# ---------- Injeção de aba direto no pacote .xlsx (zip) ----------
+
+def _parte_relativa(base_dir: str, target: str) -> str:
+    """Resolve o Target de um relacionamento para o nome da parte dentro do zip."""
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(base_dir, target))
+
+def _parte_workbook(zin: zipfile.ZipFile) -> str:
+    """Parte do workbook no pacote, pelo _rels/.rels (normalmente xl/workbook.xml)."""
+    rels_raiz = ET.fromstring(zin.read("_rels/.rels"))
+    return next(
+        _parte_relativa("", r.get("Target"))
+        for r in rels_raiz.iter(f"{{{_NS_PKG_REL}}}Relationship")
+        if r.get("Type", "").endswith("/officeDocument")
+    )
+
+def _partes_planilha(zin: zipfile.ZipFile) -> Tuple[Dict[str, str], Optional[str]]:
+    """(nome da aba -> parte da worksheet, na ordem das abas; parte do sharedStrings ou None)."""
+    wb_part = _parte_workbook(zin)
+    wb_dir, wb_nome = posixpath.split(wb_part)
+    rels = {r.get("Id"): r for r in ET.fromstring(zin.read(posixpath.join(wb_dir, "_rels", wb_nome + ".rels")))
+            .iter(f"{{{_NS_PKG_REL}}}Relationship")}
+    abas = {}
+    for sh in ET.fromstring(zin.read(wb_part)).iter(f"{{{_NS_MAIN}}}sheet"):
+        rel = rels.get(sh.get(f"{{{_NS_REL}}}id"))
+        if rel is not None and rel.get("Type", "") == _TIPO_WORKSHEET:
+            abas[sh.get("name")] = _parte_relativa(wb_dir, rel.get("Target"))
+    strings = next((_parte_relativa(wb_dir, r.get("Target")) for r in rels.values()
+                    if r.get("Type", "").endswith("/sharedStrings")), None)
+    return abas, strings
+
+def _inserir_antes_do_fechamento(xml: bytes, tag_local: str, fragmento: str) -> bytes:
+    """Insere 'fragmento' antes de </tag> (com ou sem prefixo), sem reserializar o XML."""
+    m = re.search(rb"</(\w+:)?" + tag_local.encode() + rb"\s*>", xml)
+    if m is not None:
+        prefixo = (m.group(1) or b"").decode()
+        return xml[:m.start()] + fragmento.format(p=prefixo).encode("utf-8") + xml[m.start():]
+    # Elemento vazio (<tag/>): vira <tag>fragmento</tag>
+    m = re.search(rb"<(\w+:)?" + tag_local.encode() + rb"(\s[^>]*)?/>", xml)
+    if m is None:
+        raise ValueError(f"Elemento <{tag_local}> não encontrado no pacote")
+    prefixo = (m.group(1) or b"").decode()
+    abertura = m.group(0)[:-2].rstrip() + b">"
+    fechamento = f"</{prefixo}{tag_local}>".encode()
+    return xml[:m.start()] + abertura + fragmento.format(p=prefixo).encode("utf-8") + fechamento + xml[m.end():]
+
+def _celula_xml(ref: str, valor) -> str:
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+        return ""
+    if isinstance(valor, bool):
+        return f'<c r="{ref}" t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool) and math.isfinite(valor):
+        return f'<c r="{ref}"><v>{valor!r}</v></c>'
+    texto = str(valor)
+    if ILLEGAL_CHARACTERS_RE.search(texto):
+        raise IllegalCharacterError(f"{texto!r} não pode ser usado em uma planilha")
+    espaco = ' xml:space="preserve"' if texto != texto.strip() else ""
+    return f'<c r="{ref}" t="inlineStr"><is><t{espaco}>{escape(texto)}</t></is></c>'
+
+def _escrever_planilha_xml(destino, linhas: Iterator[list]):
+    """Gera o XML da worksheet em streaming (strings inline: sharedStrings não é tocado)."""
+    destino.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n')
+    destino.write(f'<worksheet xmlns="{_NS_MAIN}"><sheetData>'.encode())
+    letras: List[str] = []
+    for n, linha in enumerate(linhas, 1):
+        while len(letras) < len(linha):
+            letras.append(get_column_letter(len(letras) + 1))
+        celulas = "".join(_celula_xml(f"{letras[i]}{n}", v) for i, v in enumerate(linha))
+        destino.write(f'<row r="{n}">{celulas}</row>'.encode("utf-8"))
+    destino.write(b"</sheetData></worksheet>")
+
+def _injetar_aba(filepath: str, aba: str, df_resultado: Union[TabelaResultado, "pd.DataFrame"],
+                 progresso: Optional[Callable[[int, int], None]]) -> str:
+    with zipfile.ZipFile(filepath) as zin:
+        nomes = set(zin.namelist())
+
+        wb_part = _parte_workbook(zin)
+        wb_dir, wb_nome = posixpath.split(wb_part)
+        wb_rels_part = posixpath.join(wb_dir, "_rels", wb_nome + ".rels")
+
+        wb_xml = zin.read(wb_part)
+        wb_rels_xml = zin.read(wb_rels_part)
+        ct_xml = zin.read("[Content_Types].xml")
+
+        planilhas = list(ET.fromstring(wb_xml).iter(f"{{{_NS_MAIN}}}sheet"))
+        aba = _nome_livre(aba, [sh.get("name") for sh in planilhas], ignorar_caixa=True)
+        sheet_id = max((int(sh.get("sheetId")) for sh in planilhas), default=0) + 1
+
+        rel_ids = {r.get("Id") for r in ET.fromstring(wb_rels_xml).iter(f"{{{_NS_PKG_REL}}}Relationship")}
+        n = 1
+        while f"rId{n}" in rel_ids:
+            n += 1
+        rel_id = f"rId{n}"
+        n = 1
+        while posixpath.join(wb_dir, f"worksheets/sheet{n}.xml") in nomes:
+            n += 1
+        sheet_part = posixpath.join(wb_dir, f"worksheets/sheet{n}.xml")
+
+        # Reaproveita o prefixo já declarado para o namespace de relacionamentos (em geral "r")
+        raiz = re.search(rb"<(\w+:)?workbook\b[^>]*>", wb_xml)
+        m = re.search(rb'xmlns:(\w+)="' + re.escape(_NS_REL.encode()) + rb'"', raiz.group(0)) if raiz else None
+        r_attr = f'{m.group(1).decode()}:id' if m else f'xmlns:r="{_NS_REL}" r:id'
+        nome_attr = escape(aba, {'"': "&quot;"})
+        wb_xml = _inserir_antes_do_fechamento(
+            wb_xml, "sheets",
+            f'<{{p}}sheet name="{nome_attr}" sheetId="{sheet_id}" {r_attr}="{rel_id}"/>',
+        )
+        wb_rels_xml = _inserir_antes_do_fechamento(
+            wb_rels_xml, "Relationships",
+            f'<{{p}}Relationship Id="{rel_id}" Type="{_TIPO_WORKSHEET}" Target="/{sheet_part}"/>',
+        )
+        ct_xml = _inserir_antes_do_fechamento(
+            ct_xml, "Types",
+            f'<{{p}}Override PartName="/{sheet_part}" ContentType="{_CT_WORKSHEET}"/>',
+        )
+        alterados = {wb_part: wb_xml, wb_rels_part: wb_rels_xml, "[Content_Types].xml": ct_xml}
+
+        with _gravacao_atomica(filepath) as tmp:
+            with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zout:
+                for info in zin.infolist():
+                    dados = alterados.get(info.filename)
+                    zout.writestr(info, dados if dados is not None else zin.read(info.filename))
+                nova = zipfile.ZipInfo(sheet_part, date_time=time.localtime()[:6])
+                nova.compress_type = zipfile.ZIP_DEFLATED
+                with zout.open(nova, "w") as destino:
+                    _escrever_planilha_xml(destino, _linhas_resultado(df_resultado, progresso))
+    return aba
\ No newline at end of file
@@ -1,5 +1,15 @@
-﻿import pandas as pd
-from typing import Dict, List, Set, Optional
+﻿import re
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional
+
+from core.metricas import medir_etapa
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# NumPy/pandas são opcionais: só o caminho vetorizado (_build_index_vetorizado,
+# a partir de uma coluna de DataFrame) os importa. indexar_codigos e a alocação
+# trabalham com iteráveis e bytearrays.
 
 # Mantém compatibilidade com as regras atuais: 3 letras + 3 ou 4 dígitos
 def _codigo_valido_formato(codigo: str, digitos: int) -> bool:
@@ -10,37 +20,265 @@ def _codigo_valido_formato(codigo: str, digitos: int) -> bool:
         and codigo[3:].isdigit()
     )
 
-def _build_index(df_base: pd.DataFrame, digitos: int) -> Dict[str, Dict[str, object]]:
+_LIVRE = re.compile(b"[^\xff]")  # primeiro byte do bitset com algum bit livre
+
+class AlocadorSigla:
     """
-    Cria um índice rápido por sigla -> { 'used': set[int], 'next': int }
-    com base no DataFrame df_base['Codigo'].
+    Números já usados de uma sigla em um bitset de tamanho fixo: 10**digitos bits
+    (1250 bytes com 4 dígitos, 125 com 3), independentemente de quantos códigos existam.
+    'proximo' só avança (todos os números em [1, proximo) estão usados), então
+    achar o próximo livre custa O(1) amortizado; bytes cheios são pulados em bloco.
+    Números além da capacidade (ex.: ABC10000 quando 0001..9999 acabam) seguem em sequência.
     """
-    index: Dict[str, Dict[str, object]] = {}
-    if 'Codigo' not in df_base.columns:
-        return index
+    __slots__ = ('bits', 'proximo')
+
+    def __init__(self, digitos: int = 4, bits: Optional[bytes] = None, proximo: int = 1):
+        self.bits = bytearray(bits) if bits is not None else bytearray(10 ** digitos // 8)
+        self.proximo = proximo
+
+    @property
+    def capacidade(self) -> int:
+        return len(self.bits) * 8
+
+    def __contains__(self, num: int) -> bool:
+        return 0 <= num < len(self.bits) * 8 and bool(self.bits[num >> 3] & (1 << (num & 7)))
+
+    def __eq__(self, other) -> bool:
+        # O ponteiro é só uma dica de busca; dois alocadores com os mesmos bits alocam igual.
+        return isinstance(other, AlocadorSigla) and self.bits == other.bits
+
+    def __reduce__(self):
+        return (_restaurar_alocador, (bytes(self.bits), self.proximo))
+
+    def marcar(self, num: int):
+        if 0 <= num < len(self.bits) * 8:
+            self.bits[num >> 3] |= 1 << (num & 7)
+
+    def proximo_livre(self) -> int:
+        """Menor número ≥1 ainda livre (não marca)."""
+        nxt = _primeiro_livre(self.bits, self.proximo, 0, len(self.bits))
+        self.proximo = nxt
+        return nxt
+
+    def alocar(self) -> int:
+        nxt = self.proximo_livre()
+        self.marcar(nxt)
+        self.proximo = nxt + 1
+        return nxt
+
+    def alocar_varios(self, k: int) -> List[int]:
+        """
+        Os k menores números livres (≥ proximo) em uma única passada pelo bitset,
+        já marcados. Equivale a chamar alocar() k vezes.
+        """
+        out: List[int] = []
+        bits = self.bits
+        cap = len(bits) * 8
+        nxt = self.proximo
+        while len(out) < k and nxt < cap:
+            i = nxt >> 3
+            byte = bits[i]
+            if byte == 0xFF:
+                m = _LIVRE.search(bits, i + 1)
+                if m is None:
+                    nxt = cap
+                    break
+                i = m.start()
+                nxt = i * 8
+                byte = bits[i]
+            # Bits livres deste byte a partir de nxt, do menor para o maior
+            livres = ~byte & (0xFF << (nxt & 7)) & 0xFF
+            while livres and len(out) < k:
+                b = (livres & -livres).bit_length() - 1
+                out.append(i * 8 + b)
+                byte |= 1 << b
+                livres &= livres - 1
+            bits[i] = byte
+            nxt = out[-1] + 1 if len(out) == k else (i + 1) * 8
+        if len(out) < k:
+            # Capacidade esgotada: segue em sequência (ex.: ABC10000, ABC10001, ...)
+            inicio = max(nxt, cap)
+            out.extend(range(inicio, inicio + k - len(out)))
+        if out:
+            self.proximo = out[-1] + 1
+        return out
+
+    def usados(self) -> List[int]:
+        """Números marcados, em ordem crescente."""
+        bits = self.bits
+        return [i * 8 + b for i, byte in enumerate(bits) if byte for b in range(8) if byte & (1 << b)]
 
-    for code in df_base['Codigo']:
+def _primeiro_livre(buf, nxt: int, inicio: int, tamanho: int) -> int:
+    """
+    Menor bit livre ≥ nxt do bitset buf[inicio:inicio + tamanho], sem copiar o
+    buffer (serve para bytearray e para mmap, ver core.snapshot). Devolve a
+    capacidade (tamanho * 8) se não houver bit livre, ou nxt se já estiver além dela.
+    """
+    cap = tamanho * 8
+    fim = inicio + tamanho
+    while nxt < cap:
+        byte = buf[inicio + (nxt >> 3)]
+        if byte == 0xFF:
+            m = _LIVRE.search(buf, inicio + (nxt >> 3) + 1, fim)
+            if m is None:
+                return cap
+            nxt = (m.start() - inicio) * 8
+            byte = buf[m.start()]
+        if not byte & (1 << (nxt & 7)):
+            break
+        nxt += 1
+    return nxt
+
+def _restaurar_alocador(bits: bytes, proximo: int) -> AlocadorSigla:
+    return AlocadorSigla(bits=bits, proximo=proximo)
+
+def indexar_codigos(codigos: Iterable[object], digitos: int,
+                    index: Optional[Dict[str, AlocadorSigla]] = None) -> Dict[str, AlocadorSigla]:
+    """
+    Alimenta o índice sigla -> AlocadorSigla a partir de qualquer iterável de
+    códigos (lista, coluna do DataFrame ou gerador em streaming).
+    Se 'index' for informado, os códigos são acrescentados a ele (uso incremental).
+    """
+    if index is None:
+        index = {}
+
+    for code in codigos:
         if _codigo_valido_formato(code, digitos):
             sigla = code[:3]
-            num = int(code[3:])
-            entry = index.get(sigla)
-            if entry is None:
-                entry = {'used': set(), 'next': 1}
-                index[sigla] = entry
-            used: Set[int] = entry['used']  # type: ignore
-            used.add(num)
-
-    # Define o próximo faltante por sigla (menor número ausente ≥1)
-    for entry in index.values():
-        used: Set[int] = entry['used']  # type: ignore
-        nxt = 1
-        while nxt in used:
-            nxt += 1
-        entry['next'] = nxt
+            num = int(code[3:])  # sempre < 10**digitos: cabe no bitset
+            aloc = index.get(sigla)
+            if aloc is None:
+                aloc = AlocadorSigla(digitos)
+                index[sigla] = aloc
+            aloc.bits[num >> 3] |= 1 << (num & 7)
+
+    return index
+
+def mesclar_indices(destino: Dict[str, AlocadorSigla],
+                    origem: Dict[str, AlocadorSigla]) -> Dict[str, AlocadorSigla]:
+    """
+    Acrescenta a 'destino' os números usados em 'origem' (OU dos bitsets), ex.: índices
+    de abas diferentes da mesma base montados em paralelo. Devolve 'destino'.
+    """
+    for sigla, aloc in origem.items():
+        atual = destino.get(sigla)
+        if atual is None:
+            destino[sigla] = aloc
+            continue
+        n = len(atual.bits)
+        uniao = int.from_bytes(atual.bits, "little") | int.from_bytes(aloc.bits, "little")
+        atual.bits[:] = uniao.to_bytes(n, "little")
+        # [1, proximo) está usado em cada um, logo também na união
+        atual.proximo = max(atual.proximo, aloc.proximo)
+    return destino
+
+def _build_index_vetorizado(serie: "pd.Series", digitos: int) -> Dict[str, AlocadorSigla]:
+    """
+    Mesmo índice de indexar_codigos, calculado em lote com NumPy: validação,
+    separação sigla/número e conversão para int sobre a matriz de code points
+    (uma linha por código), e bitsets/primeiras lacunas de todas as siglas com
+    operações agrupadas. Códigos com caracteres fora do ASCII (raros) seguem
+    pelo caminho elemento a elemento, com as mesmas regras de str.isalpha/isdigit.
+    """
+    import numpy as np
+    import pandas as pd
+
+    n = 3 + digitos
+    if serie.empty:
+        return {}
+    so_strings = pd.api.types.is_string_dtype(serie.dtype) and (
+        serie.dtype != object or pd.api.types.infer_dtype(serie, skipna=True) == "string"
+    )
+    if so_strings:
+        # Só strings (e NaN): converte direto para largura n+1; o comprimento exato
+        # sai da própria matriz (posição n vazia e posição n-1 preenchida).
+        cp = serie.to_numpy(dtype=f"U{n + 1}").view(np.uint32).reshape(-1, n + 1)
+        tamanho_ok = (cp[:, n] == 0) & (cp[:, n - 1] != 0)
+        cp = cp[tamanho_ok, :n]
+        candidatos = serie[tamanho_ok]
+    else:
+        try:
+            candidatos = serie[serie.str.len().eq(n)]  # não-strings viram NaN e saem aqui
+            cp = candidatos.to_numpy(dtype=f"U{n}").view(np.uint32).reshape(-1, n)
+        except (AttributeError, TypeError, ValueError):  # sem strings / valores exóticos
+            return indexar_codigos(serie, digitos)
+
+    ascii_ = (cp < 128).all(axis=1)
+    letras = cp[:, :3] | 32  # minúscula
+    ok = (
+        ascii_
+        & ((letras >= ord('a')) & (letras <= ord('z'))).all(axis=1)
+        & ((cp[:, 3:] >= ord('0')) & (cp[:, 3:] <= ord('9'))).all(axis=1)
+    )
+    cp_ok = cp[ok].astype(np.int64)
+    nums = (cp_ok[:, 3:] - ord('0')) @ (10 ** np.arange(digitos - 1, -1, -1, dtype=np.int64))
+    chave_sigla = (cp_ok[:, 0] << 14) | (cp_ok[:, 1] << 7) | cp_ok[:, 2]
+
+    bytes_por_sigla = 10 ** digitos // 8
+    bits_por_sigla = bytes_por_sigla * 8
+
+    index: Dict[str, AlocadorSigla] = {}
+    # Posição global do bit (sigla, número), ordenada e sem repetições
+    pos = np.sort(chave_sigla * bits_por_sigla + nums)
+    pos = pos[np.r_[True, pos[1:] != pos[:-1]]] if len(pos) else pos
+    if len(pos):
+        _preencher_indice_vetorizado(index, pos, bytes_por_sigla)
 
+    # Linhas com caracteres não ASCII: validadas e convertidas como no caminho legado
+    if not ascii_.all():
+        indexar_codigos(candidatos[~ascii_], digitos, index)
     return index
 
-def gerar_codigos_em_lote(siglas: List[Optional[str]], df_base: pd.DataFrame, digitos: int = 4) -> List[Optional[str]]:
+def _preencher_indice_vetorizado(index: Dict[str, AlocadorSigla], pos: "np.ndarray", bytes_por_sigla: int):
+    """Cria os alocadores a partir das posições de bit (chave_sigla * bits + número) ordenadas."""
+    import numpy as np
+
+    bits_por_sigla = bytes_por_sigla * 8
+    chave = pos // bits_por_sigla
+    num = pos % bits_por_sigla
+    novo_grupo = np.r_[True, chave[1:] != chave[:-1]]
+    grupo = np.cumsum(novo_grupo) - 1
+    chaves = chave[novo_grupo]
+
+    # Bits distintos do mesmo byte: a soma equivale ao OR
+    byte_idx = grupo * bytes_por_sigla + (num >> 3)
+    valores = np.left_shift(1, num & 7).astype(np.uint8)
+    inicio_byte = np.flatnonzero(np.r_[True, byte_idx[1:] != byte_idx[:-1]])
+    buf = np.zeros(len(chaves) * bytes_por_sigla, dtype=np.uint8)
+    buf[byte_idx[inicio_byte]] = np.add.reduceat(valores, inicio_byte)
+
+    # Primeira lacuna ≥1 por sigla: na sequência ordenada, o primeiro número que
+    # difere da sua posição + 1 (ou quantidade + 1 se não houver buraco).
+    proximos = np.ones(len(chaves), dtype=np.int64)
+    sel = num >= 1
+    g, nn = grupo[sel], num[sel]
+    if len(g):
+        inicio_g = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+        contagem = np.diff(np.r_[inicio_g, len(g)])
+        rank = np.arange(len(g)) - np.repeat(inicio_g, contagem) + 1
+        sem_lacuna = bits_por_sigla + 1
+        primeira = np.minimum.reduceat(np.where(nn != rank, rank, sem_lacuna), inicio_g)
+        proximos[g[inicio_g]] = np.where(primeira == sem_lacuna, contagem + 1, primeira)
+
+    raw = buf.tobytes()
+    for i, k in enumerate(chaves.tolist()):
+        sigla = chr(k >> 14) + chr((k >> 7) & 127) + chr(k & 127)
+        index[sigla] = AlocadorSigla(bits=raw[i * bytes_por_sigla:(i + 1) * bytes_por_sigla],
+                                     proximo=int(proximos[i]))
+
+def _build_index(df_base: "pd.DataFrame", digitos: int) -> Dict[str, AlocadorSigla]:
+    """
+    Cria um índice rápido por sigla -> AlocadorSigla
+    com base no DataFrame df_base['Codigo'] (caminho vetorizado).
+    """
+    if 'Codigo' not in df_base.columns:
+        return {}
+    with medir_etapa("_build_index") as medida:
+        medida.linhas = len(df_base)
+        return _build_index_vetorizado(df_base['Codigo'], digitos)
+
+def gerar_codigos_em_lote(siglas: List[Optional[str]], df_base: "pd.DataFrame", digitos: int = 4,
+                          agrupar: bool = True, snapshot: Optional[str] = None) -> List[Optional[str]]:
     """
     Gera códigos em lote mantendo a mesma lógica de preencher lacunas e
     atualizar a base incrementalmente por sigla.
@@ -48,9 +286,67 @@ def gerar_codigos_em_lote(siglas: List[Optional[str]], df_base: pd.DataFrame, di
     - df_base: DataFrame com a coluna 'Codigo'. Não é modificado; o chamador decide se quer
       anexar os novos códigos ao seu df_base em memória (para consistência com a GUI atual).
     - digitos: 3 ou 4.
+    - agrupar: aloca por sigla em bloco (ver gerar_codigos_com_indice); o resultado é o mesmo.
+    - snapshot: caminho de um snapshot compilado (core.snapshot) que recebe os códigos gerados.
     Retorna lista do mesmo tamanho de 'siglas'.
     """
     idx = _build_index(df_base, digitos)
+    novos = gerar_codigos_com_indice(siglas, idx, digitos, agrupar=agrupar)
+    if snapshot is not None:
+        from core.snapshot import sincronizar_snapshot  # core.snapshot importa este módulo
+        sincronizar_snapshot(snapshot, novos, digitos)
+    return novos
+
+def gerar_codigos_com_indice(siglas: List[Optional[str]], idx: Dict[str, AlocadorSigla],
+                             digitos: int = 4, agrupar: bool = True,
+                             progresso: Optional[Callable[[int, int], None]] = None) -> List[Optional[str]]:
+    """
+    Mesma alocação de gerar_codigos_em_lote, mas sobre um índice já construído
+    (ex.: por carregar_indice_base, sem passar por DataFrame). O índice é atualizado
+    com os códigos alocados.
+
+    Com agrupar=True, conta quantos códigos cada sigla pede, tira as k menores
+    lacunas de uma vez (AlocadorSigla.alocar_varios) e devolve cada uma à sua
+    posição original: a n-ésima ocorrência da sigla recebe a n-ésima lacuna,
+    exatamente como na alocação linha a linha.
+
+    'progresso(codigos_alocados, total)' é chamado a cada sigla concluída, se informado.
+    """
+    with medir_etapa("gerar_codigos_com_indice") as medida:
+        medida.linhas = len(siglas)
+        if not agrupar:
+            out = _gerar_sequencial(siglas, idx, digitos)
+            if progresso is not None:
+                progresso(len(out), len(out))
+            return out
+
+        posicoes: Dict[str, List[int]] = {}
+        for i, sig in enumerate(siglas):
+            if isinstance(sig, str) and len(sig) >= 3:
+                lista = posicoes.get(sig[:3])
+                if lista is None:
+                    posicoes[sig[:3]] = [i]
+                else:
+                    lista.append(i)
+
+        out: List[Optional[str]] = [None] * len(siglas)
+        total = sum(len(pos) for pos in posicoes.values())
+        alocados = 0
+        for sigla, pos in posicoes.items():
+            aloc = idx.get(sigla)
+            if aloc is None:
+                aloc = AlocadorSigla(digitos)
+                idx[sigla] = aloc
+            for i, num in zip(pos, aloc.alocar_varios(len(pos))):
+                out[i] = f"{sigla}{str(num).zfill(digitos)}"
+            alocados += len(pos)
+            if progresso is not None:
+                progresso(alocados, total)
+
+        return out
+
+def _gerar_sequencial(siglas: List[Optional[str]], idx: Dict[str, AlocadorSigla],
+                      digitos: int) -> List[Optional[str]]:
     out: List[Optional[str]] = []
 
     for sig in siglas:
@@ -59,26 +355,12 @@ def gerar_codigos_em_lote(siglas: List[Optional[str]], df_base: pd.DataFrame, di
             continue
 
         sigla = sig[:3]
-        entry = idx.get(sigla)
-        if entry is None:
-            entry = {'used': set(), 'next': 1}
-            idx[sigla] = entry
-
-        used: Set[int] = entry['used']  # type: ignore
-        nxt: int = entry['next']        # type: ignore
+        aloc = idx.get(sigla)
+        if aloc is None:
+            aloc = AlocadorSigla(digitos)
+            idx[sigla] = aloc
 
-        # Garante o menor faltante atual
-        while nxt in used:
-            nxt += 1
-
-        code = f"{sigla}{str(nxt).zfill(digitos)}"
-        out.append(code)
-
-        # Atualiza estruturas para refletir a alocação
-        used.add(nxt)
-        nxt += 1
-        while nxt in used:
-            nxt += 1
-        entry['next'] = nxt
+        # Menor faltante atual, já marcado como usado
+        out.append(f"{sigla}{str(aloc.alocar()).zfill(digitos)}")
 
     return out
@@ -0,0 +1,234 @@
+"""
+Leitores e escritores por formato de arquivo, escolhidos pela extensão.
+
+- .xlsx: openpyxl (core.excel_processor); o resultado vira uma aba (salvar_resultado).
+- .csv / .tsv (e .txt, separado por tabulação): módulo csv, em streaming. A base
+  é lida linha a linha e as siglas em blocos de TAMANHO_BLOCO_SIGLAS, então a
+  memória não cresce com o tamanho do arquivo; o resultado (Sigla,
+  Proximo_Codigo) é gravado em outro arquivo delimitado, bloco a bloco.
+
+O caminho "-" (FLUXO) é a entrada padrão para as siglas e a saída padrão para o
+resultado, no formato informado (padrão: csv). Novos formatos entram com
+registrar_formato('.ext', Formato(...)).
+
+Mesma disposição das planilhas: na base valem as colunas da especificação 'aba'
+(padrão: as duas primeiras; ver colunas_delimitadas) a partir da 2ª linha (a 1ª
+é cabeçalho); nas siglas, a coluna informada desde a 1ª linha.
+"""
+
+import csv
+import io
+import itertools
+import os
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from core.excel_processor import (
+    AMOSTRA_DETECCAO,
+    COLUNAS_BASE_PADRAO,
+    PASSO_PROGRESSO,
+    _gravacao_atomica,
+    carregar_indice_base,
+    detectar_colunas,
+    interpretar_regioes,
+    iterar_codigos_base,
+    ler_coluna_siglas,
+)
+from core.fast_code_generator import AlocadorSigla, indexar_codigos
+from core.metricas import medir_etapa
+
+FLUXO = "-"                  # stdin (siglas) / stdout (resultado)
+EXTENSAO_FLUXO_PADRAO = ".csv"
+CODIFICACAO_LEITURA = "utf-8-sig"  # aceita o BOM que o Excel grava em CSV
+CODIFICACAO_ESCRITA = "utf-8"
+TAMANHO_BLOCO_SIGLAS = 100_000     # siglas lidas, alocadas e gravadas por vez
+
+Progresso = Optional[Callable[[int, int], None]]
+
+
+@dataclass(frozen=True)
+class Formato:
+    """
+    Funções de um formato. iterar_blocos_siglas(caminho, aba, coluna, tamanho_bloco,
+    progresso) devolve listas de valores brutos (vazio = None). 'escritor(destino)'
+    é um context manager que entrega uma função que grava linhas [sigla, código];
+    None quando o resultado é gravado por excel_processor.salvar_resultado.
+    'delimitador' identifica os formatos de texto delimitado (ver formato_delimitado).
+    """
+    nome: str
+    iterar_codigos_base: Callable[[str, str, Progresso], Iterator[object]]
+    iterar_blocos_siglas: Callable[[str, str, int, int, Progresso], Iterator[list]]
+    escritor: Optional[Callable[[str], ContextManager[Callable[[Iterable[list]], None]]]] = None
+    delimitador: Optional[str] = None
+
+
+def _blocos_xlsx(caminho: str, aba: str, coluna: int, tamanho_bloco: int,
+                 progresso: Progresso = None) -> Iterator[list]:
+    # Uma planilha tem no máximo ~1 milhão de linhas: vai em um bloco só
+    yield ler_coluna_siglas(caminho, aba, coluna, progresso)
+
+
+@contextmanager
+def _abrir_leitura(caminho: str) -> Iterator[TextIO]:
+    if caminho != FLUXO:
+        with open(caminho, encoding=CODIFICACAO_LEITURA, newline="") as f:
+            yield f
+        return
+    f = io.TextIOWrapper(sys.stdin.buffer, encoding=CODIFICACAO_LEITURA, newline="")
+    try:
+        yield f
+    finally:
+        f.detach()  # não fecha a stdin do processo
+
+
+def colunas_delimitadas(linhas: Iterator[List[str]], aba: str) -> Tuple[Tuple[int, ...], Iterator[List[str]]]:
+    """
+    Colunas (1 = A) da especificação 'aba' (ver excel_processor.interpretar_regioes)
+    em um arquivo delimitado, que tem uma aba só: o nome da aba é ignorado e as
+    regiões se somam ('aba1' = A e B, 'aba1!A:D' = A a D, '*' ou 'aba1!*' =
+    detectadas nas AMOSTRA_DETECCAO primeiras linhas). 'linhas' começa depois do
+    cabeçalho; devolve as colunas e as mesmas linhas (a amostra lida volta à frente).
+    """
+    regioes = interpretar_regioes(aba)
+    if not regioes:
+        return COLUNAS_BASE_PADRAO, linhas
+    colunas = {c for regiao in regioes for c in regiao.colunas or ()}
+    if any(regiao.colunas is None for regiao in regioes):
+        amostra = list(itertools.islice(linhas, AMOSTRA_DETECCAO))
+        colunas.update(detectar_colunas(amostra))
+        linhas = itertools.chain(amostra, linhas)
+    return tuple(sorted(colunas)), linhas
+
+
+def valores_colunas(linha: List[str], colunas: Tuple[int, ...]) -> List[str]:
+    """Valores não vazios de 'linha' nas 'colunas' (1 = A, em ordem crescente)."""
+    if not colunas:
+        return []
+    if colunas[-1] - colunas[0] + 1 == len(colunas):  # contíguas: uma fatia basta
+        return [v for v in linha[colunas[0] - 1:colunas[-1]] if v]
+    return [linha[c - 1] for c in colunas if c <= len(linha) and linha[c - 1]]
+
+
+def formato_delimitado(nome: str, delimitador: str) -> Formato:
+    """Formato de texto delimitado (csv, tsv...) lido e gravado em streaming."""
+
+    def iterar_codigos(caminho: str, aba: str = "", progresso: Progresso = None) -> Iterator[object]:
+        with _abrir_leitura(caminho) as f:
+            linhas = csv.reader(f, delimiter=delimitador)
+            next(linhas, None)  # cabeçalho
+            colunas, linhas = colunas_delimitadas(linhas, aba)
+            contiguas = bool(colunas) and colunas[-1] - colunas[0] + 1 == len(colunas)
+            inicio, fim = (colunas[0] - 1, colunas[-1]) if colunas else (0, 0)
+            lidas = 0
+            for linha in linhas:
+                # Colunas contíguas (o caso comum, A e B): fatia direto, sem chamada por linha
+                for valor in linha[inicio:fim] if contiguas else valores_colunas(linha, colunas):
+                    if valor:
+                        yield valor
+                lidas += 1
+                if progresso is not None and lidas % PASSO_PROGRESSO == 0:
+                    progresso(lidas, 0)  # total desconhecido em streaming
+            if progresso is not None:
+                progresso(lidas, lidas)
+
+    def iterar_blocos(caminho: str, aba: str, coluna: int, tamanho_bloco: int = TAMANHO_BLOCO_SIGLAS,
+                      progresso: Progresso = None) -> Iterator[list]:
+        i = coluna - 1
+        lidas = 0
+        bloco: list = []
+        with _abrir_leitura(caminho) as f:
+            for linha in csv.reader(f, delimiter=delimitador):
+                bloco.append((linha[i] or None) if i < len(linha) else None)
+                if len(bloco) >= tamanho_bloco:
+                    lidas += len(bloco)
+                    if progresso is not None:
+                        progresso(lidas, 0)
+                    yield bloco
+                    bloco = []
+        lidas += len(bloco)
+        if progresso is not None:
+            progresso(lidas, lidas)
+        if bloco or not lidas:
+            yield bloco
+
+    @contextmanager
+    def escritor(destino: str) -> Iterator[Callable[[Iterable[list]], None]]:
+        if destino == FLUXO:
+            sys.stdout.flush()
+            f = io.TextIOWrapper(sys.stdout.buffer, encoding=CODIFICACAO_ESCRITA, newline="")
+            try:
+                yield csv.writer(f, delimiter=delimitador, lineterminator="\n").writerows
+            finally:
+                f.flush()
+                f.detach()  # não fecha a stdout do processo
+            return
+        # Temporário + rename: o destino nunca fica pela metade (ver _gravacao_atomica)
+        with _gravacao_atomica(destino) as tmp:
+            with open(tmp, "w", encoding=CODIFICACAO_ESCRITA, newline="") as f:
+                yield csv.writer(f, delimiter=delimitador, lineterminator="\n").writerows
+
+    return Formato(nome, iterar_codigos, iterar_blocos, escritor, delimitador)
+
+
+FORMATO_XLSX = Formato("xlsx", iterar_codigos_base, _blocos_xlsx)
+FORMATOS: Dict[str, Formato] = {
+    ".xlsx": FORMATO_XLSX,
+    ".csv": formato_delimitado("csv", ","),
+    ".tsv": formato_delimitado("tsv", "\t"),
+    ".txt": formato_delimitado("txt", "\t"),
+}
+
+
+def registrar_formato(extensao: str, formato: Formato):
+    """Associa (ou substitui) o formato usado para arquivos com a extensão informada."""
+    FORMATOS[_normalizar_extensao(extensao)] = formato
+
+
+def _normalizar_extensao(extensao: str) -> str:
+    extensao = extensao.lower()
+    return extensao if extensao.startswith(".") else "." + extensao
+
+
+def formato_de(caminho: str, extensao: Optional[str] = None) -> Formato:
+    """
+    Formato pela extensão do caminho. FLUXO não tem extensão: vale 'extensao'
+    (ex.: 'tsv') ou EXTENSAO_FLUXO_PADRAO. ValueError se não houver formato registrado.
+    """
+    if caminho == FLUXO:
+        extensao = extensao or EXTENSAO_FLUXO_PADRAO
+    else:
+        extensao = os.path.splitext(caminho)[1]
+    ext = _normalizar_extensao(extensao)
+    try:
+        return FORMATOS[ext]
+    except KeyError:
+        raise ValueError(f"formato não suportado: '{ext}' (use um de {', '.join(sorted(FORMATOS))})") from None
+
+
+def caminho_resultado(entrada: str, aba: str) -> str:
+    """Destino padrão do resultado de uma entrada delimitada: <entrada>_<aba>.<ext> (ou FLUXO)."""
+    if entrada == FLUXO:
+        return FLUXO
+    raiz, ext = os.path.splitext(entrada)
+    return f"{raiz}_{aba}{ext}"
+
+
+def indexar_base(caminho: str, digitos: int, aba: str = 'aba1',
+                 progresso: Progresso = None) -> Dict[str, AlocadorSigla]:
+    """Índice de alocação da base em qualquer formato registrado (ver excel_processor.carregar_indice_base)."""
+    formato = formato_de(caminho)
+    if formato is FORMATO_XLSX:
+        return carregar_indice_base(caminho, digitos, aba, progresso)
+    with medir_etapa(f"indexar_base [{formato.nome}]") as medida:
+        lidos = 0
+
+        def contar(valores: Iterator[object]) -> Iterator[object]:
+            nonlocal lidos
+            for lidos, valor in enumerate(valores, 1):
+                yield valor
+
+        idx = indexar_codigos(contar(formato.iterar_codigos_base(caminho, aba, progresso)), digitos)
+        medida.linhas = lidos
+    return idx
@@ -0,0 +1,159 @@
+"""
+Cache persistente do índice de alocação construído a partir da base.
+
+Cada entrada é identificada pelo caminho da base, aba e modo de dígitos (3/4) e
+guarda a impressão digital do arquivo (tamanho, mtime e hash do conteúdo).
+Se a base não mudou, o índice volta do disco em milissegundos; se mudou, é
+reconstruído automaticamente. As entradas mais antigas são descartadas (LRU).
+
+Junto do índice fica o estado de core.base_incremental (linhas e digests por
+bloco de cada aba): se a base só ganhou linhas no fim, o índice guardado é
+atualizado com elas em vez de reconstruído.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Callable, Dict, Optional
+
+from core.base_incremental import atualizar_indice, estado_base
+from core.fast_code_generator import AlocadorSigla
+from core.formatos import indexar_base
+
+VERSAO_CACHE = 4
+MAX_ENTRADAS = 8
+_EXTENSAO = ".idx"
+
+
+def diretorio_cache_padrao() -> str:
+    """Pasta do cache: GERADOR_CODIGOS_CACHE, ou LOCALAPPDATA (Windows) / ~/.cache."""
+    custom = os.environ.get("GERADOR_CODIGOS_CACHE")
+    if custom:
+        return custom
+    raiz = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(raiz, "gerador_codigos", "indices")
+
+
+def hash_arquivo(filepath: str, bloco: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(bloco), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _caminho_entrada(cache_dir: str, filepath: str, aba: str, digitos: int) -> str:
+    chave = f"{os.path.abspath(filepath)}|{aba}|{digitos}"
+    nome = hashlib.sha256(chave.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(cache_dir, nome + _EXTENSAO)
+
+
+def _ler_entrada(caminho: str) -> Optional[dict]:
+    try:
+        with open(caminho, "rb") as f:
+            entrada = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    if not isinstance(entrada, dict) or entrada.get("versao") != VERSAO_CACHE:
+        return None
+    return entrada
+
+
+def _gravar_entrada(caminho: str, entrada: dict):
+    # Grava em arquivo temporário e renomeia: nunca deixa uma entrada pela metade.
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(entrada, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, caminho)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _despejar_lru(cache_dir: str, max_entradas: int):
+    """Remove as entradas usadas há mais tempo (mtime é atualizado a cada acerto)."""
+    entradas = []
+    for nome in os.listdir(cache_dir):
+        if nome.endswith(_EXTENSAO):
+            caminho = os.path.join(cache_dir, nome)
+            try:
+                entradas.append((os.stat(caminho).st_mtime_ns, caminho))
+            except OSError:
+                continue
+    entradas.sort(reverse=True)
+    for _, caminho in entradas[max_entradas:]:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+
+def obter_indice(filepath: str, digitos: int, aba: str = 'aba1',
+                 cache_dir: Optional[str] = None, max_entradas: int = MAX_ENTRADAS,
+                 progresso: Optional[Callable[[int, int], None]] = None,
+                 construir: Optional[Callable[[], Dict[str, AlocadorSigla]]] = None,
+                 incremental: bool = True) -> Dict[str, AlocadorSigla]:
+    """
+    Devolve o índice da base (mesmo formato de fast_code_generator._build_index),
+    usando o cache quando a base não mudou. Cada chamada devolve uma cópia nova,
+    que pode ser alterada pela alocação sem afetar o cache.
+
+    Tamanho e mtime iguais dispensam o hash; se diferirem, o hash do conteúdo
+    decide (um arquivo apenas "tocado" continua válido). 'progresso' só é usado
+    quando a base precisa ser lida (ver formatos.indexar_base).
+    'construir', se informado, substitui formatos.indexar_base na montagem do índice
+    (ex.: leitura da base em outro processo, ver pipeline.indexar_base_em_processo).
+
+    Com 'incremental', uma base que só ganhou linhas no fim atualiza o índice
+    guardado só com elas (ver base_incremental.atualizar_indice); se linhas já
+    lidas mudaram, o índice é reconstruído do zero.
+    """
+    cache_dir = cache_dir or diretorio_cache_padrao()
+    os.makedirs(cache_dir, exist_ok=True)
+    caminho = _caminho_entrada(cache_dir, filepath, aba, digitos)
+
+    st = os.stat(filepath)
+    entrada = _ler_entrada(caminho)
+    sha256 = None
+    if entrada is not None:
+        mesmo_stat = entrada["tamanho"] == st.st_size and entrada["mtime_ns"] == st.st_mtime_ns
+        if not mesmo_stat:
+            sha256 = hash_arquivo(filepath)
+        if mesmo_stat or entrada["sha256"] == sha256:
+            if not mesmo_stat:
+                entrada["tamanho"], entrada["mtime_ns"] = st.st_size, st.st_mtime_ns
+                _gravar_entrada(caminho, entrada)
+            else:
+                os.utime(caminho)  # marca como usado recentemente (LRU)
+            return entrada["indice"]
+
+    # Impressão digital tirada antes da leitura: se a base mudar durante a
+    # construção, a próxima chamada detecta a diferença e reconstrói.
+    sha256 = sha256 or hash_arquivo(filepath)
+    atualizado = None
+    if incremental and entrada is not None and entrada.get("estado") is not None:
+        atualizado = atualizar_indice(filepath, digitos, entrada["indice"], entrada["estado"], progresso)
+    if atualizado is not None:
+        indice, estado, _ = atualizado
+    else:
+        estado = estado_base(filepath, aba) if incremental else None
+        if construir is not None:
+            indice = construir()
+        else:
+            indice = indexar_base(filepath, digitos, aba, progresso)
+    _gravar_entrada(caminho, {
+        "versao": VERSAO_CACHE,
+        "base": os.path.abspath(filepath),
+        "aba": aba,
+        "digitos": digitos,
+        "tamanho": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": sha256,
+        "indice": indice,
+        "estado": estado,
+    })
+    _despejar_lru(cache_dir, max_entradas)
+    return indice
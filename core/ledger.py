@@ -0,0 +1,206 @@
+"""
+Registro (ledger) transacional dos códigos emitidos, em SQLite, ao lado da base.
+
+A base (.xlsx) só conhece os códigos que alguém já digitou nela; sem o ledger,
+duas execuções próximas montam o mesmo índice e entregam os mesmos códigos.
+Cada reserva roda em uma transação BEGIN IMMEDIATE (um escritor por vez):
+primeiro o índice recebe os códigos emitidos por outras execuções desde a última
+sincronização (só as linhas novas, pelo rowid), depois os códigos são alocados e
+gravados antes do COMMIT. A coluna 'codigo' é UNIQUE, então um código nunca é
+registrado duas vezes, mesmo que outra ferramenta escreva no arquivo.
+
+WAL permite leituras simultâneas às reservas. Atenção: o modo WAL exige que
+todos os processos estejam na mesma máquina (memória compartilhada); numa pasta
+de rede vale o journal de rollback (DELETE). abrir_ledger escolhe o journal por
+journal_padrao: a variável GERADOR_CODIGOS_LEDGER_JOURNAL, se definida; senão
+DELETE quando o ledger fica em pasta de rede (compartilhamento UNC ou unidade
+mapeada no Windows; NFS/SMB/SSHFS no Linux) e WAL nos demais casos.
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from core.fast_code_generator import AlocadorSigla, gerar_codigos_com_indice, indexar_codigos
+
+VERSAO_LEDGER = 1
+TIMEOUT_PADRAO = 60.0  # segundos aguardando o lock de escrita de outra execução
+_SUFIXO = ".codigos.sqlite"
+JOURNAL_WAL = "WAL"
+JOURNAL_DELETE = "DELETE"  # rollback: funciona em pasta de rede
+JOURNAIS = (JOURNAL_WAL, JOURNAL_DELETE)
+VAR_JOURNAL = "GERADOR_CODIGOS_LEDGER_JOURNAL"
+_FS_REDE = {"nfs", "nfs4", "cifs", "smbfs", "smb3", "ncpfs", "afs", "9p", "fuse.sshfs", "davfs", "fuse.davfs2"}
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS codigos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    codigo TEXT NOT NULL UNIQUE,
+    sigla TEXT NOT NULL,
+    emitido_em REAL NOT NULL,
+    origem TEXT
+);
+CREATE INDEX IF NOT EXISTS codigos_sigla ON codigos (sigla);
+"""
+
+
+def caminho_ledger_padrao(base_path: str) -> str:
+    """Ledger ao lado da base: <base>.codigos.sqlite (ex.: DADOS.xlsx.codigos.sqlite)."""
+    return base_path + _SUFIXO
+
+
+if sys.platform == "win32":
+    import ctypes
+
+    _DRIVE_REMOTE = 4
+
+    def pasta_de_rede(caminho: str) -> bool:
+        """True se o caminho está num compartilhamento (\\\\servidor\\pasta) ou unidade de rede mapeada."""
+        caminho = os.path.abspath(caminho)
+        if caminho.startswith("\\\\"):
+            return True
+        raiz = os.path.splitdrive(caminho)[0] + "\\"
+        try:
+            return ctypes.windll.kernel32.GetDriveTypeW(raiz) == _DRIVE_REMOTE
+        except (OSError, AttributeError):
+            return False
+else:
+    def pasta_de_rede(caminho: str) -> bool:
+        """True se o caminho está num sistema de arquivos de rede (pelo /proc/mounts; False se não houver)."""
+        caminho = os.path.realpath(caminho)
+        try:
+            with open("/proc/mounts", encoding="utf-8") as f:
+                montagens = [linha.split()[1:3] for linha in f]
+        except OSError:
+            return False
+        tipo, maior = None, -1
+        for ponto, fs in montagens:
+            ponto = ponto.replace("\\040", " ")
+            dentro = caminho == ponto or caminho.startswith(ponto.rstrip("/") + "/")
+            if dentro and len(ponto) > maior:
+                tipo, maior = fs, len(ponto)
+        return tipo in _FS_REDE
+
+
+def journal_padrao(caminho: str) -> str:
+    """Journal do ledger em 'caminho': GERADOR_CODIGOS_LEDGER_JOURNAL, ou DELETE em pasta de rede, ou WAL."""
+    escolhido = os.environ.get(VAR_JOURNAL)
+    if escolhido:
+        return validar_journal(escolhido)
+    return JOURNAL_DELETE if pasta_de_rede(os.path.dirname(os.path.abspath(caminho))) else JOURNAL_WAL
+
+
+def validar_journal(journal: str) -> str:
+    """Normaliza o modo de journal (WAL ou DELETE); ValueError para os demais."""
+    if journal.upper() not in JOURNAIS:
+        raise ValueError(f"journal do ledger inválido: '{journal}' (use {' ou '.join(JOURNAIS)})")
+    return journal.upper()
+
+
+class Ledger:
+    """
+    Conexão com o ledger, associada a UM índice em memória: 'ultimo_id' marca até
+    onde esse índice já viu o ledger. Use uma instância por índice (e por thread).
+    """
+
+    def __init__(self, caminho: str, timeout: float = TIMEOUT_PADRAO, journal: str = JOURNAL_WAL):
+        journal = validar_journal(journal)
+        self.caminho = caminho
+        self.journal = journal
+        self.ultimo_id = 0
+        # isolation_level=None: as transações são controladas explicitamente (BEGIN IMMEDIATE)
+        self._con = sqlite3.connect(caminho, timeout=timeout, isolation_level=None)
+        self._con.execute(f"PRAGMA journal_mode={journal}")
+        self._con.execute("PRAGMA synchronous=NORMAL" if journal == JOURNAL_WAL else "PRAGMA synchronous=FULL")
+        self._con.execute("BEGIN IMMEDIATE")
+        try:
+            for comando in _ESQUEMA.split(";"):
+                if comando.strip():
+                    self._con.execute(comando)
+            versao = self._con.execute("PRAGMA user_version").fetchone()[0]
+            if versao == 0:
+                self._con.execute(f"PRAGMA user_version={VERSAO_LEDGER}")
+            elif versao != VERSAO_LEDGER:
+                raise ValueError(f"ledger {caminho} na versão {versao} (esperada {VERSAO_LEDGER})")
+            self._con.execute("COMMIT")
+        except BaseException:
+            self._con.execute("ROLLBACK")
+            self._con.close()
+            raise
+
+    def __enter__(self) -> "Ledger":
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def fechar(self):
+        self._con.close()
+
+    def emitidos(self) -> int:
+        return self._con.execute("SELECT COUNT(*) FROM codigos").fetchone()[0]
+
+    def _aplicar_novos(self, idx: Dict[str, AlocadorSigla], digitos: int) -> int:
+        linhas = self._con.execute(
+            "SELECT id, codigo FROM codigos WHERE id > ? ORDER BY id", (self.ultimo_id,)
+        ).fetchall()
+        if linhas:
+            indexar_codigos((codigo for _, codigo in linhas), digitos, idx)
+            self.ultimo_id = linhas[-1][0]
+        return len(linhas)
+
+    def sincronizar(self, idx: Dict[str, AlocadorSigla], digitos: int) -> int:
+        """Marca em idx os códigos emitidos desde a última sincronização. Devolve quantos."""
+        return self._aplicar_novos(idx, digitos)
+
+    def reservar(self, siglas: List[Optional[str]], idx: Dict[str, AlocadorSigla], digitos: int,
+                 origem: Optional[str] = None,
+                 progresso: Optional[Callable[[int, int], None]] = None) -> List[Optional[str]]:
+        """
+        gerar_codigos_com_indice dentro de uma transação exclusiva de escrita: os
+        códigos devolvidos já estão registrados quando a função retorna. Se algo
+        falhar antes do COMMIT (inclusive Cancelado vindo de 'progresso'), nada é
+        registrado; idx fica só com bits a mais (códigos que este processo pula).
+        Códigos reservados cujo arquivo depois não foi gravado ficam registrados
+        (viram lacunas): é o preço de nunca emitir o mesmo código duas vezes.
+        """
+        con = self._con
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            self._aplicar_novos(idx, digitos)
+            novos = gerar_codigos_com_indice(siglas, idx, digitos=digitos, progresso=progresso)
+            agora = time.time()
+            con.executemany(
+                "INSERT INTO codigos (codigo, sigla, emitido_em, origem) VALUES (?, ?, ?, ?)",
+                ((codigo, codigo[:3], agora, origem) for codigo in novos if codigo is not None),
+            )
+            ultimo = con.execute("SELECT MAX(id) FROM codigos").fetchone()[0]
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        self.ultimo_id = ultimo or 0
+        return novos
+
+    def codigos(self, sigla: Optional[str] = None) -> Iterable[str]:
+        """Códigos registrados (todos ou de uma sigla), na ordem de emissão."""
+        if sigla is None:
+            cursor = self._con.execute("SELECT codigo FROM codigos ORDER BY id")
+        else:
+            cursor = self._con.execute("SELECT codigo FROM codigos WHERE sigla = ? ORDER BY id", (sigla,))
+        return (codigo for codigo, in cursor)
+
+
+def abrir_ledger(base_path: str, caminho: Optional[str] = None, journal: Optional[str] = None,
+                 **kwargs) -> Ledger:
+    """
+    Abre (criando se preciso) o ledger da base; a pasta precisa permitir escrita.
+    Sem 'journal', vale journal_padrao (variável de ambiente ou detecção de pasta de rede).
+    """
+    caminho = caminho or caminho_ledger_padrao(base_path)
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    if not os.access(pasta, os.W_OK):
+        raise PermissionError(f"sem permissão de escrita em {pasta} para o ledger")
+    return Ledger(caminho, journal=journal or journal_padrao(caminho), **kwargs)
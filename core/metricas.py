@@ -0,0 +1,272 @@
+"""
+Métricas por etapa de cada execução: tempo de parede, tempo de CPU, linhas
+processadas, vazão (linhas/s) e pico de memória residente (RSS).
+
+O Cronometro coleta as medidas de uma execução. As funções de core.excel_processor
+e core.fast_code_generator marcam as próprias etapas com 'medir_etapa(nome)', que só
+mede quando há um cronômetro ativo (ver 'coletando'); fora dele é um no-op.
+Etapas marcadas dentro de outra ficam com nivel > 0 e não entram na soma.
+
+Cada execução do pipeline pode ser acrescentada a um log JSON Lines
+(registrar_execucao) e, opcionalmente, perfilada com cProfile (perfilando).
+"""
+
+import contextvars
+import cProfile
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+PROCESSO_PRINCIPAL = "principal"
+PROCESSO_FILHO = "filho"
+_ARQUIVO_METRICAS = "metricas.jsonl"
+
+_coletor: contextvars.ContextVar = contextvars.ContextVar("coletor_metricas", default=None)
+
+
+@dataclass
+class Medida:
+    """Uma etapa medida. inicio/fim em time.time() (comparáveis entre processos)."""
+    nome: str
+    inicio: float
+    fim: float = 0.0
+    cpu_s: float = 0.0
+    linhas: Optional[int] = None
+    pico_rss_mb: Optional[float] = None
+    processo: str = PROCESSO_PRINCIPAL
+    nivel: int = 0
+
+    @property
+    def duracao(self) -> float:
+        return self.fim - self.inicio
+
+    @property
+    def vazao(self) -> Optional[float]:
+        """Linhas por segundo, se a etapa informou quantas processou."""
+        if self.linhas is None or self.duracao <= 0:
+            return None
+        return self.linhas / self.duracao
+
+
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    class _ContadoresMemoria(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    def pico_rss_mb() -> Optional[float]:
+        """Pico do working set do processo (MiB) até agora."""
+        try:
+            kernel32, psapi = ctypes.WinDLL("kernel32"), ctypes.WinDLL("psapi")
+            kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+            psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(_ContadoresMemoria),
+                                                   wintypes.DWORD]
+            contadores = _ContadoresMemoria()
+            contadores.cb = ctypes.sizeof(contadores)
+            if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(contadores),
+                                              contadores.cb):
+                return None
+            return contadores.PeakWorkingSetSize / 2**20
+        except (OSError, AttributeError):
+            return None
+else:
+    def pico_rss_mb() -> Optional[float]:
+        """Pico de RSS do processo (MiB) até agora."""
+        try:
+            import resource
+        except ImportError:
+            return None
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa KiB; macOS, bytes
+        return pico / 2**20 if sys.platform == "darwin" else pico / 2**10
+
+
+@contextmanager
+def medir(nome: str, processo: str = PROCESSO_PRINCIPAL) -> Iterator[Medida]:
+    """
+    Mede o bloco sem registrar em lugar nenhum (ex.: em um processo do pool, que
+    devolve a Medida para o cronômetro do processo principal). O chamador pode
+    preencher 'linhas' na medida devolvida.
+    """
+    medida = Medida(nome, time.time(), processo=processo)
+    cpu = time.process_time()
+    try:
+        yield medida
+    finally:
+        medida.fim = time.time()
+        medida.cpu_s = time.process_time() - cpu
+        medida.pico_rss_mb = pico_rss_mb()
+
+
+class Cronometro:
+    """
+    Acumula as medidas de cada etapa na ordem em que foram concluídas. 'intervalos'
+    guarda (nome, início, fim) em segundos desde a criação do cronômetro, o que
+    mostra a sobreposição das etapas quando rodam em paralelo. Usa time.time()
+    para que etapas medidas em outros processos (registrar) fiquem comparáveis.
+
+    O tempo de CPU é o do processo inteiro durante a etapa (time.process_time);
+    etapas de outros processos trazem o CPU e o pico de RSS do próprio processo.
+    """
+
+    def __init__(self):
+        self.medidas: List[Medida] = []
+        self._t0 = time.time()
+        self._cpu0 = time.process_time()
+        self._nivel = 0
+
+    @contextmanager
+    def etapa(self, nome: str) -> Iterator[Medida]:
+        nivel = self._nivel
+        self._nivel += 1
+        try:
+            with medir(nome) as medida:
+                medida.nivel = nivel
+                yield medida
+        finally:
+            self._nivel = nivel
+            self.medidas.append(medida)
+
+    def registrar(self, nome: str, inicio: float, fim: float, medida: Optional[Medida] = None):
+        """
+        Registra uma etapa medida fora do contexto 'etapa' (timestamps de time.time()).
+        Se vier a Medida do outro processo (ver 'medir'), CPU, linhas e RSS são dela.
+        Etapas de outros processos nunca são aninhadas: contam na soma das etapas.
+        """
+        if medida is None:
+            medida = Medida(nome, inicio, fim, processo=PROCESSO_FILHO)
+        medida.nome, medida.inicio, medida.fim = nome, inicio, fim
+        medida.nivel = 0
+        self.medidas.append(medida)
+
+    @property
+    def etapas(self) -> List[Tuple[str, float]]:
+        return [(m.nome, m.duracao) for m in self.medidas if m.nivel == 0]
+
+    @property
+    def intervalos(self) -> List[Tuple[str, float, float]]:
+        return [(m.nome, m.inicio - self._t0, m.fim - self._t0) for m in self.medidas if m.nivel == 0]
+
+    def total(self) -> float:
+        """Soma das etapas (o que levaria se nada se sobrepusesse)."""
+        return sum(duracao for _, duracao in self.etapas)
+
+    def decorrido(self) -> float:
+        """Tempo de parede do início do cronômetro até o fim da última etapa."""
+        return max((fim for _, _, fim in self.intervalos), default=0.0)
+
+    def cpu_total(self) -> float:
+        """CPU deste processo desde a criação do cronômetro (sem os processos filhos)."""
+        return time.process_time() - self._cpu0
+
+    def pico_rss_mb(self) -> Optional[float]:
+        """Maior pico de RSS entre as etapas (de qualquer processo)."""
+        picos = [m.pico_rss_mb for m in self.medidas if m.pico_rss_mb is not None]
+        return max(picos, default=None)
+
+    def para_dicts(self) -> List[dict]:
+        """Medidas serializáveis, com início/fim relativos à criação do cronômetro."""
+        saida = []
+        for m in self.medidas:
+            d = asdict(m)
+            d["inicio"], d["fim"] = round(m.inicio - self._t0, 6), round(m.fim - self._t0, 6)
+            d["duracao_s"], d["cpu_s"] = round(m.duracao, 6), round(m.cpu_s, 6)
+            d["vazao"] = round(m.vazao, 1) if m.vazao is not None else None
+            saida.append(d)
+        return saida
+
+
+@contextmanager
+def coletando(cronometro: Cronometro):
+    """Ativa o cronômetro para as etapas marcadas com 'medir_etapa' neste contexto (thread)."""
+    token = _coletor.set(cronometro)
+    try:
+        yield cronometro
+    finally:
+        _coletor.reset(token)
+
+
+@contextmanager
+def medir_etapa(nome: str) -> Iterator[Medida]:
+    """
+    Gancho das funções de I/O e alocação: mede no cronômetro ativo, se houver.
+    Sem cronômetro, devolve uma Medida descartável (o custo é um ContextVar.get).
+    """
+    cronometro = _coletor.get()
+    if cronometro is None:
+        yield Medida(nome, 0.0)
+        return
+    with cronometro.etapa(nome) as medida:
+        yield medida
+
+
+def registrar_medida(nome: str, medida: Medida):
+    """Registra no cronômetro ativo, se houver, uma etapa medida em outro processo (ver 'medir')."""
+    cronometro = _coletor.get()
+    if cronometro is not None:
+        cronometro.registrar(nome, medida.inicio, medida.fim, medida)
+
+
+@contextmanager
+def perfilando(caminho: Optional[str]):
+    """
+    Perfila o bloco com cProfile e grava o resultado em 'caminho' (abrir com
+    pstats ou snakeviz). Só a thread atual é perfilada; o trabalho feito nos
+    processos do pool aparece como espera. Com caminho=None não faz nada.
+    """
+    if not caminho:
+        yield
+        return
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield
+    finally:
+        perfil.disable()
+        pasta = os.path.dirname(os.path.abspath(caminho))
+        os.makedirs(pasta, exist_ok=True)
+        perfil.dump_stats(caminho)
+
+
+def caminho_metricas_padrao() -> str:
+    """Log de métricas: GERADOR_CODIGOS_METRICAS, ou LOCALAPPDATA (Windows) / ~/.cache."""
+    custom = os.environ.get("GERADOR_CODIGOS_METRICAS")
+    if custom:
+        return custom
+    raiz = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(raiz, "gerador_codigos", _ARQUIVO_METRICAS)
+
+
+def registrar_execucao(caminho: str, cronometro: Cronometro, **dados) -> dict:
+    """
+    Acrescenta uma linha JSON com a execução ('dados' + totais + etapas) ao log
+    e devolve o registro. Falha ao gravar o log não interrompe quem chamou.
+    """
+    registro = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        **dados,
+        "decorrido_s": round(cronometro.decorrido(), 6),
+        "soma_etapas_s": round(cronometro.total(), 6),
+        "cpu_s": round(cronometro.cpu_total(), 6),
+        "pico_rss_mb": cronometro.pico_rss_mb(),
+        "etapas": cronometro.para_dicts(),
+    }
+    try:
+        pasta = os.path.dirname(os.path.abspath(caminho))
+        os.makedirs(pasta, exist_ok=True)
+        with open(caminho, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    except OSError:
+        pass  # métricas são auxiliares: não derrubam uma execução que já terminou
+    return registro
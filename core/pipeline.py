@@ -0,0 +1,544 @@
+"""
+Pipeline de geração sem dependência de interface: carregar a base, ler as
+siglas da entrada, alocar os códigos e salvar a aba de resultado.
+Usado pela GUI (ui/gui.py) e pela linha de comando (core/cli.py).
+
+Base e entradas podem ser .xlsx, .csv ou .tsv (ver core.formatos). Entradas em
+texto delimitado, ou com 'destino', são processadas em blocos (leitura, alocação
+e gravação bloco a bloco), inclusive da entrada padrão para a saída padrão ("-").
+
+Com workers > 1 as etapas se sobrepõem (execução em pipeline): a base é lida
+em um processo próprio e enviada em blocos, indexados aqui à medida que chegam,
+enquanto as entradas são lidas em um pool de processos. O tempo total tende ao
+da etapa mais lenta, e não à soma de todas (ver Cronometro.intervalos).
+"""
+
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+from core.excel_processor import COLUNAS_RESULTADO, MODO_INJETAR, TabelaResultado, salvar_resultado, varias_abas
+from core.fast_code_generator import AlocadorSigla, gerar_codigos_com_indice, indexar_codigos
+from core.formatos import FLUXO, TAMANHO_BLOCO_SIGLAS, caminho_resultado, formato_de, indexar_base
+from core.index_cache import obter_indice
+from core.ledger import Ledger, abrir_ledger
+from core.metricas import (
+    PROCESSO_FILHO,
+    Cronometro,
+    Medida,
+    coletando,
+    medir,
+    perfilando,
+    registrar_execucao,
+)
+from core.snapshot import SnapshotIndice, SnapshotInvalido, sincronizar_snapshot, snapshot_atual
+from utils.helpers import letra_para_coluna
+
+ABA_BASE_PADRAO = "aba1"
+ABA_SIGLAS_PADRAO = "SIGLAS"
+COLUNA_SIGLAS_PADRAO = "A"
+ABA_SAIDA_PADRAO = "RESULTADO"
+TAMANHO_BLOCO_BASE = 20_000  # códigos por mensagem do processo leitor da base
+
+
+class ErroBase(Exception):
+    """Falha ao ler/indexar a planilha de base."""
+
+
+class ErroEntrada(Exception):
+    """
+    Falha ao processar uma planilha de entrada (as anteriores já foram gravadas).
+    'etapa' indica onde: 'leitura', 'alocacao' ou 'gravacao'.
+    """
+
+    def __init__(self, entrada: str, causa: Exception, etapa: str = "leitura"):
+        super().__init__(f"{entrada}: {causa}")
+        self.entrada = entrada
+        self.causa = causa
+        self.etapa = etapa
+
+
+class Cancelado(Exception):
+    """Execução interrompida a pedido do usuário antes de gravar qualquer arquivo."""
+
+
+def reportador(etapa: str, progresso: Optional[Callable[[str, int, int], None]] = None,
+               cancelar: Optional[threading.Event] = None) -> Callable[[int, int], None]:
+    """
+    Adapta um callback progresso(etapa, atual, total) ao formato (atual, total)
+    das funções de I/O e alocação. Se 'cancelar' estiver sinalizado, levanta
+    Cancelado no próximo aviso, interrompendo a etapa em andamento.
+    """
+    def _reportar(atual: int, total: int):
+        if cancelar is not None and cancelar.is_set():
+            raise Cancelado()
+        if progresso is not None:
+            progresso(etapa, atual, total)
+    return _reportar
+
+
+def carregar_base(base_path: str, digitos: int, aba: str = ABA_BASE_PADRAO, usar_cache: bool = True,
+                  progresso: Optional[Callable[[int, int], None]] = None,
+                  em_processo: bool = False, cronometro: Optional[Cronometro] = None,
+                  snapshot: Optional[str] = None, incremental: bool = True) -> Dict[str, AlocadorSigla]:
+    """
+    Índice de alocação da base (via cache persistente, salvo usar_cache=False).
+    Com em_processo=True, a leitura (se necessária) roda em outro processo e o
+    índice é montado aqui à medida que os blocos chegam (indexar_base_em_processo).
+    Com 'snapshot' (ver core.snapshot.snapshot_atual), a planilha nem é aberta.
+    'aba' pode abranger várias abas e colunas (ver excel_processor.interpretar_regioes);
+    nesse caso cada aba é indexada em um processo próprio, com ou sem em_processo.
+    Com 'incremental', se a base só ganhou linhas desde o índice em cache, só elas
+    são lidas (ver core.base_incremental).
+    """
+    if snapshot is not None:
+        try:
+            with SnapshotIndice(snapshot) as snap:
+                return snap.para_indice()
+        except (OSError, SnapshotInvalido):
+            pass  # removido ou corrompido depois de snapshot_atual: reconstrói pela base
+    construir = None
+    if em_processo and not varias_abas(aba):
+        construir = lambda: indexar_base_em_processo(base_path, digitos, aba, progresso, cronometro)  # noqa: E731
+    if usar_cache:
+        return obter_indice(base_path, digitos, aba, progresso=progresso, construir=construir,
+                            incremental=incremental)
+    if construir is not None:
+        return construir()
+    return indexar_base(base_path, digitos, aba, progresso)
+
+
+def _ler_base_em_blocos(base_path: str, aba: str, fila, tamanho_bloco: int):
+    """Processo leitor: envia os códigos (strings) da base em blocos pela fila."""
+    try:
+        bloco: list = []
+
+        def progresso(lidas: int, total: int):
+            fila.put(("progresso", lidas, total))
+
+        with medir("ler_base", PROCESSO_FILHO) as medida:
+            medida.linhas = 0
+            for valor in formato_de(base_path).iterar_codigos_base(base_path, aba, progresso):
+                medida.linhas += 1
+                if isinstance(valor, str):
+                    bloco.append(valor)
+                    if len(bloco) >= tamanho_bloco:
+                        fila.put(("bloco", bloco))
+                        bloco = []
+            if bloco:
+                fila.put(("bloco", bloco))
+        fila.put(("fim", medida))
+    except Exception as e:
+        fila.put(("erro", e))
+
+
+def indexar_base_em_processo(base_path: str, digitos: int, aba: str = ABA_BASE_PADRAO,
+                             progresso: Optional[Callable[[int, int], None]] = None,
+                             cronometro: Optional[Cronometro] = None,
+                             tamanho_bloco: int = TAMANHO_BLOCO_BASE) -> Dict[str, AlocadorSigla]:
+    """
+    Lê a base em um processo separado e monta o índice neste processo, bloco a
+    bloco, enquanto a leitura continua. Uma exceção levantada por 'progresso'
+    (ex.: Cancelado) encerra o processo leitor.
+    """
+    ctx = multiprocessing.get_context()
+    fila = ctx.Queue(maxsize=8)  # limita a memória se a indexação ficar para trás
+    leitor = ctx.Process(target=_ler_base_em_blocos, args=(base_path, aba, fila, tamanho_bloco), daemon=True)
+    leitor.start()
+    idx: Dict[str, AlocadorSigla] = {}
+    try:
+        while True:
+            try:
+                msg = fila.get(timeout=0.2)
+            except queue.Empty:
+                if not leitor.is_alive() and fila.empty():
+                    raise RuntimeError("o processo leitor da base terminou inesperadamente")
+                continue
+            tipo = msg[0]
+            if tipo == "bloco":
+                indexar_codigos(msg[1], digitos, idx)
+            elif tipo == "progresso":
+                if progresso is not None:
+                    progresso(msg[1], msg[2])
+            elif tipo == "fim":
+                if cronometro is not None:
+                    cronometro.registrar("ler_base [processo]", msg[1].inicio, msg[1].fim, msg[1])
+                return idx
+            else:
+                raise msg[1]
+    finally:
+        if leitor.is_alive():
+            leitor.terminate()
+        leitor.join()
+
+
+def ler_siglas(entrada_path: str, aba: str = ABA_SIGLAS_PADRAO, coluna: str = COLUNA_SIGLAS_PADRAO,
+               progresso: Optional[Callable[[int, int], None]] = None, formato: Optional[str] = None) -> list:
+    """
+    Valores brutos da coluna de siglas (letra da coluna, ex.: 'A'), inteiros na
+    memória. 'formato' só vale para a entrada padrão (ver formatos.formato_de).
+    """
+    blocos = formato_de(entrada_path, formato).iterar_blocos_siglas(
+        entrada_path, aba, letra_para_coluna(coluna), TAMANHO_BLOCO_SIGLAS, progresso)
+    return [valor for bloco in blocos for valor in bloco]
+
+
+def _ler_siglas_cronometrado(entrada_path: str, aba: str, coluna: str) -> Tuple[list, Medida]:
+    """ler_siglas para o pool de processos, devolvendo também a medida da etapa."""
+    with medir("extrair_siglas", PROCESSO_FILHO) as medida:
+        siglas = ler_siglas(entrada_path, aba, coluna)
+        medida.linhas = len(siglas)
+    return siglas, medida
+
+
+def _salvar_cronometrado(entrada_path: str, aba: str, resultado: TabelaResultado,
+                         modo: str) -> Tuple[Tuple[str, str], Medida]:
+    with medir("salvar_resultado", PROCESSO_FILHO) as medida:
+        destino = salvar_resultado(entrada_path, aba, resultado, modo=modo)
+        medida.linhas = len(resultado)
+    return destino, medida
+
+
+def gerar_resultado(siglas: list, idx: Dict[str, AlocadorSigla], digitos: int,
+                    progresso: Optional[Callable[[int, int], None]] = None,
+                    ledger: Optional[Ledger] = None, origem: Optional[str] = None,
+                    snapshot: Optional[str] = None) -> TabelaResultado:
+    """
+    Aloca um código por sigla (atualizando idx) e monta a tabela Sigla/Proximo_Codigo
+    (TabelaResultado; use .para_dataframe() se precisar de um DataFrame).
+    Com 'ledger', a alocação é uma reserva atômica registrada nele (ver core.ledger);
+    com 'snapshot', os códigos gerados também são marcados no snapshot da base.
+    """
+    siglas_lista = [s if isinstance(s, str) else None for s in siglas]
+    if ledger is not None:
+        novos = ledger.reservar(siglas_lista, idx, digitos, origem=origem, progresso=progresso)
+    else:
+        novos = gerar_codigos_com_indice(siglas_lista, idx, digitos=digitos, progresso=progresso)
+    if snapshot is not None:
+        try:
+            sincronizar_snapshot(snapshot, novos, digitos)
+        except SnapshotInvalido:
+            pass  # truncado ou corrompido: continua recusado, a próxima execução reconstrói
+    return TabelaResultado(list(siglas), novos)
+
+
+def processar_arquivos(base_path: str, entradas: Sequence[str], digitos: int = 4,
+                       aba_base: str = ABA_BASE_PADRAO, aba_siglas: str = ABA_SIGLAS_PADRAO,
+                       coluna: str = COLUNA_SIGLAS_PADRAO, aba_saida: str = ABA_SAIDA_PADRAO,
+                       usar_cache: bool = True, cronometro: Optional[Cronometro] = None,
+                       workers: int = 1, modo_saida: str = MODO_INJETAR,
+                       progresso: Optional[Callable[[str, int, int], None]] = None,
+                       cancelar: Optional[threading.Event] = None, usar_ledger: bool = True,
+                       caminho_ledger: Optional[str] = None,
+                       usar_snapshot: bool = True, arquivo_metricas: Optional[str] = None,
+                       arquivo_perfil: Optional[str] = None, destino: Optional[str] = None,
+                       formato: Optional[str] = None, incremental: bool = True,
+                       journal_ledger: Optional[str] = None) -> List[Tuple[str, str, int]]:
+    """
+    Executa o pipeline completo para uma ou mais entradas. A base é indexada uma
+    única vez e o mesmo índice segue de um arquivo para o outro, então as entradas
+    nunca recebem códigos repetidos entre si. Devolve (arquivo, aba, códigos gerados)
+    de cada entrada.
+
+    Com workers > 1 as etapas rodam em pipeline: a base é lida em um processo
+    próprio (indexar_base_em_processo) enquanto as entradas são lidas em um pool
+    de processos; com mais de uma entrada, as gravações também vão para o pool.
+    A alocação continua centralizada neste processo e na ordem das entradas: o
+    resultado é o mesmo da execução sequencial.
+
+    Com usar_ledger (padrão), cada alocação é reservada no ledger da base
+    (caminho_ledger, ou <base>.codigos.sqlite): execuções simultâneas de outros
+    operadores sobre a mesma base nunca recebem o mesmo código. 'journal_ledger'
+    ('WAL' ou 'DELETE') força o modo de journal; sem ele, vale ledger.journal_padrao
+    (DELETE em pasta de rede).
+
+    Com usar_snapshot (padrão), se a base tiver um snapshot compilado e em dia
+    (python -m core.snapshot), o índice vem dele e os códigos gerados são
+    marcados nele ao fim de cada entrada.
+
+    Com 'incremental' (padrão), uma base que só ganhou linhas no fim desde o
+    índice em cache tem só essas linhas lidas (ver core.base_incremental).
+
+    As medidas de cada etapa (tempo, CPU, linhas, pico de RSS) ficam no 'cronometro';
+    com 'arquivo_metricas', a execução é acrescentada a esse log JSON Lines, mesmo
+    se falhar ou for cancelada (ver core.metricas.registrar_execucao). Com
+    'arquivo_perfil', a execução inteira é perfilada com cProfile e gravada nele.
+
+    modo_saida: ver excel_processor.salvar_resultado ('injetar', 'arquivo' ou 'completo').
+    progresso(etapa, atual, total) / cancelar: ver reportador.
+
+    Entradas .csv/.tsv são processadas em blocos e o resultado (Sigla,
+    Proximo_Codigo) vai para <entrada>_<aba_saida>.<ext>, com aba "" no retorno.
+    'destino' (só com uma entrada) grava o resultado nesse arquivo delimitado, ou
+    na saída padrão com "-"; a entrada "-" é a entrada padrão. 'formato' ('csv',
+    'tsv') é o formato desses fluxos (padrão: csv). Ver core.formatos.
+
+    Para na primeira entrada com erro (ErroEntrada); falha na base ou no ledger gera ErroBase.
+    """
+    cronometro = cronometro or Cronometro()
+    resultados: List[Tuple[str, str, int]] = []
+    situacao, erro = "ok", None
+    try:
+        with coletando(cronometro), perfilando(arquivo_perfil):
+            resultados = _processar_arquivos(base_path, entradas, digitos, aba_base, aba_siglas, coluna,
+                                             aba_saida, usar_cache, cronometro, workers, modo_saida,
+                                             progresso, cancelar, usar_ledger, caminho_ledger, usar_snapshot,
+                                             destino, formato, incremental, journal_ledger)
+        return resultados
+    except Cancelado:
+        situacao = "cancelado"
+        raise
+    except BaseException as e:
+        situacao, erro = "erro", f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        if arquivo_metricas:
+            registrar_execucao(arquivo_metricas, cronometro, situacao=situacao, erro=erro,
+                               base=base_path, entradas=list(entradas), digitos=digitos, workers=workers,
+                               modo_saida=modo_saida, destino=destino,
+                               gerados=sum(n for _, _, n in resultados))
+
+
+def _processar_arquivos(base_path: str, entradas: Sequence[str], digitos: int, aba_base: str,
+                        aba_siglas: str, coluna: str, aba_saida: str, usar_cache: bool,
+                        cronometro: Cronometro, workers: int, modo_saida: str,
+                        progresso: Optional[Callable[[str, int, int], None]],
+                        cancelar: Optional[threading.Event], usar_ledger: bool,
+                        caminho_ledger: Optional[str], usar_snapshot: bool, destino: Optional[str],
+                        formato: Optional[str], incremental: bool,
+                        journal_ledger: Optional[str]) -> List[Tuple[str, str, int]]:
+    if base_path == FLUXO:
+        raise ErroBase("a base precisa ser um arquivo (a entrada padrão fica para as siglas)")
+    if destino is not None and len(entradas) > 1:
+        raise ValueError("'destino' só pode ser usado com uma única entrada")
+    if list(entradas).count(FLUXO) > 1:
+        raise ValueError("a entrada padrão ('-') só pode ser lida uma vez")
+    snapshot = snapshot_atual(base_path, digitos, aba_base) if usar_snapshot else None
+    ledger = None
+    if usar_ledger:
+        try:
+            ledger = abrir_ledger(base_path, caminho_ledger, journal_ledger)
+        except Exception as e:
+            raise ErroBase(f"{base_path}: ledger indisponível ({e})") from e
+    try:
+        # Entradas repetidas seriam gravadas em paralelo no mesmo arquivo, e as
+        # delimitadas já correm em blocos: nesses casos segue sequencial
+        if (workers > 1 and len(set(entradas)) == len(entradas)
+                and all(_so_xlsx(e, aba_saida, destino, formato) for e in entradas)):
+            return _processar_em_pipeline(base_path, entradas, digitos, aba_base, aba_siglas, coluna,
+                                          aba_saida, usar_cache, cronometro, workers, modo_saida,
+                                          progresso, cancelar, ledger, snapshot, incremental)
+        return _processar_sequencial(base_path, entradas, digitos, aba_base, aba_siglas, coluna,
+                                     aba_saida, usar_cache, cronometro, modo_saida, progresso,
+                                     cancelar, ledger, snapshot, destino, formato, incremental)
+    finally:
+        if ledger is not None:
+            ledger.fechar()
+
+
+def _processar_sequencial(base_path: str, entradas: Sequence[str], digitos: int, aba_base: str,
+                          aba_siglas: str, coluna: str, aba_saida: str, usar_cache: bool,
+                          cronometro: Cronometro, modo_saida: str,
+                          progresso: Optional[Callable[[str, int, int], None]],
+                          cancelar: Optional[threading.Event], ledger: Optional[Ledger],
+                          snapshot: Optional[str], destino: Optional[str],
+                          formato: Optional[str], incremental: bool) -> List[Tuple[str, str, int]]:
+    idx = _carregar_base_cronometrado(base_path, digitos, aba_base, usar_cache, cronometro,
+                                      reportador("Carregando base", progresso, cancelar), False, snapshot,
+                                      incremental)
+
+    resultados: List[Tuple[str, str, int]] = []
+    for entrada in entradas:
+        try:
+            saida = _destino_delimitado(entrada, aba_saida, destino, formato)
+        except ValueError as e:
+            raise ErroEntrada(entrada, e) from e
+        if saida is not None:
+            resultados.append(_processar_em_blocos(entrada, saida, aba_siglas, coluna, idx, digitos, formato,
+                                                   cronometro, progresso, cancelar, ledger, snapshot))
+            continue
+        etapa = "leitura"
+        try:
+            with cronometro.etapa(f"extrair_siglas [{entrada}]") as medida:
+                siglas = ler_siglas(entrada, aba_siglas, coluna,
+                                    progresso=reportador("Lendo siglas", progresso, cancelar))
+                medida.linhas = len(siglas)
+            etapa = "alocacao"
+            with cronometro.etapa(f"gerar_codigos [{entrada}]") as medida:
+                medida.linhas = len(siglas)
+                resultado = gerar_resultado(siglas, idx, digitos,
+                                            progresso=reportador("Gerando códigos", progresso, cancelar),
+                                            ledger=ledger, origem=entrada, snapshot=snapshot)
+            etapa = "gravacao"
+            with cronometro.etapa(f"salvar_resultado [{entrada}]") as medida:
+                medida.linhas = len(resultado)
+                arquivo, aba = salvar_resultado(entrada, aba_saida, resultado, modo=modo_saida,
+                                                progresso=reportador("Gravando resultado", progresso, cancelar))
+        except Cancelado:
+            raise
+        except Exception as e:
+            raise ErroEntrada(entrada, e, etapa) from e
+        resultados.append((arquivo, aba, resultado.gerados()))
+
+    return resultados
+
+
+def _destino_delimitado(entrada: str, aba_saida: str, destino: Optional[str],
+                        formato: Optional[str]) -> Optional[str]:
+    """Destino em texto delimitado do resultado, ou None se ele vai para uma aba do .xlsx."""
+    if destino is not None:
+        return destino
+    if formato_de(entrada, formato).escritor is None:
+        return None
+    return caminho_resultado(entrada, aba_saida)
+
+
+def _so_xlsx(entrada: str, aba_saida: str, destino: Optional[str], formato: Optional[str]) -> bool:
+    try:
+        return _destino_delimitado(entrada, aba_saida, destino, formato) is None
+    except ValueError:
+        return False  # formato desconhecido: o erro sai, com a entrada, no caminho sequencial
+
+
+def _processar_em_blocos(entrada: str, saida: str, aba_siglas: str, coluna: str,
+                         idx: Dict[str, AlocadorSigla], digitos: int, formato: Optional[str],
+                         cronometro: Cronometro, progresso: Optional[Callable[[str, int, int], None]],
+                         cancelar: Optional[threading.Event], ledger: Optional[Ledger],
+                         snapshot: Optional[str]) -> Tuple[str, str, int]:
+    """
+    Lê, aloca e grava a entrada em blocos de TAMANHO_BLOCO_SIGLAS: a memória
+    depende do bloco, não do tamanho da entrada. A alocação segue a ordem das
+    linhas, então o resultado é o mesmo de processar a entrada inteira de uma vez.
+    Num arquivo, a gravação é atômica; na saída padrão, as linhas saem a cada bloco.
+    """
+    etapa = "leitura"
+    gerados = 0
+    try:
+        formato_entrada, formato_saida = formato_de(entrada, formato), formato_de(saida, formato)
+        if formato_saida.escritor is None:
+            raise ValueError(f"destino '{saida}': use um arquivo .csv/.tsv ou '{FLUXO}'")
+        with cronometro.etapa(f"processar_em_blocos [{entrada}]") as medida, \
+                formato_saida.escritor(saida) as escrever:
+            medida.linhas = 0
+            escrever([list(COLUNAS_RESULTADO)])
+            blocos = formato_entrada.iterar_blocos_siglas(entrada, aba_siglas, letra_para_coluna(coluna),
+                                                          TAMANHO_BLOCO_SIGLAS,
+                                                          reportador("Lendo siglas", progresso, cancelar))
+            for siglas in blocos:
+                etapa = "alocacao"
+                resultado = gerar_resultado(siglas, idx, digitos,
+                                            progresso=reportador("Gerando códigos", progresso, cancelar),
+                                            ledger=ledger, origem=entrada, snapshot=snapshot)
+                etapa = "gravacao"
+                escrever(zip(resultado.siglas, resultado.codigos))
+                gerados += resultado.gerados()
+                medida.linhas += len(resultado)
+                etapa = "leitura"
+    except Cancelado:
+        raise
+    except Exception as e:
+        raise ErroEntrada(entrada, e, etapa) from e
+    return saida, "", gerados
+
+
+def _carregar_base_cronometrado(base_path: str, digitos: int, aba_base: str, usar_cache: bool,
+                                cronometro: Cronometro, progresso: Callable[[int, int], None],
+                                em_processo: bool, snapshot: Optional[str],
+                                incremental: bool) -> Dict[str, AlocadorSigla]:
+    try:
+        with cronometro.etapa("carregar_base [snapshot]" if snapshot else "carregar_base"):
+            return carregar_base(base_path, digitos, aba_base, usar_cache, progresso, em_processo,
+                                 cronometro, snapshot, incremental)
+    except Cancelado:
+        raise
+    except Exception as e:
+        raise ErroBase(f"{base_path} (aba '{aba_base}'): {e}") from e
+
+
+def _processar_em_pipeline(base_path: str, entradas: Sequence[str], digitos: int, aba_base: str,
+                           aba_siglas: str, coluna: str, aba_saida: str, usar_cache: bool,
+                           cronometro: Cronometro, workers: int, modo_saida: str,
+                           progresso: Optional[Callable[[str, int, int], None]],
+                           cancelar: Optional[threading.Event], ledger: Optional[Ledger],
+                           snapshot: Optional[str], incremental: bool) -> List[Tuple[str, str, int]]:
+    """
+    Leituras das entradas disparadas de uma vez no pool, em paralelo com a leitura
+    e indexação da base; cada entrada é alocada assim que sua leitura termina, em
+    ordem. Com uma única entrada a gravação fica neste processo (com progresso e
+    cancelamento); com várias, vai para o pool. Em caso de erro, as gravações já
+    enviadas são aguardadas e o primeiro erro, na ordem das entradas, é propagado.
+    """
+    resultados: List[Tuple[str, str, int]] = []
+    gravacoes = []
+    erro: Optional[ErroEntrada] = None
+    erro_pos = len(entradas)
+    gravar_no_pool = len(entradas) > 1
+    concluido = False
+    checar = reportador("", None, cancelar)
+
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(entradas)))
+    try:
+        leituras = [pool.submit(_ler_siglas_cronometrado, entrada, aba_siglas, coluna) for entrada in entradas]
+        idx = _carregar_base_cronometrado(base_path, digitos, aba_base, usar_cache, cronometro,
+                                          reportador("Carregando base", progresso, cancelar), True, snapshot,
+                                          incremental)
+
+        for n, (entrada, leitura) in enumerate(zip(entradas, leituras), 1):
+            etapa = "leitura"
+            try:
+                with cronometro.etapa(f"aguardar_leitura [{entrada}]"):
+                    # wait em vez de result(timeout=...): até o Python 3.10 o timeout de
+                    # result é concurrent.futures.TimeoutError, não o TimeoutError embutido
+                    while True:
+                        checar(0, 0)
+                        if wait([leitura], timeout=0.2).done:
+                            break
+                    siglas, medida = leitura.result()
+                cronometro.registrar(f"extrair_siglas [{entrada}] [processo]", medida.inicio, medida.fim, medida)
+                reportador("Lendo siglas", progresso, cancelar)(n, len(entradas))
+                etapa = "alocacao"
+                with cronometro.etapa(f"gerar_codigos [{entrada}]") as medida:
+                    medida.linhas = len(siglas)
+                    resultado = gerar_resultado(siglas, idx, digitos,
+                                                progresso=reportador("Gerando códigos", progresso, cancelar),
+                                                ledger=ledger, origem=entrada, snapshot=snapshot)
+                gerados = resultado.gerados()
+                if not gravar_no_pool:
+                    etapa = "gravacao"
+                    with cronometro.etapa(f"salvar_resultado [{entrada}]") as medida:
+                        medida.linhas = len(resultado)
+                        arquivo, aba = salvar_resultado(
+                            entrada, aba_saida, resultado, modo=modo_saida,
+                            progresso=reportador("Gravando resultado", progresso, cancelar))
+                    resultados.append((arquivo, aba, gerados))
+            except Cancelado:
+                raise
+            except Exception as e:
+                erro, erro_pos = ErroEntrada(entrada, e, etapa), len(gravacoes)
+                break
+            if gravar_no_pool:
+                gravacoes.append((entrada, gerados,
+                                  pool.submit(_salvar_cronometrado, entrada, aba_saida, resultado, modo_saida)))
+
+        with cronometro.etapa("aguardar_gravacoes"):
+            for i, (entrada, gerados, gravacao) in enumerate(gravacoes):
+                try:
+                    (arquivo, aba), medida = gravacao.result()
+                except Exception as e:
+                    # Vale o primeiro erro na ordem das entradas
+                    if i < erro_pos:
+                        erro, erro_pos = ErroEntrada(entrada, e, "gravacao"), i
+                    continue
+                cronometro.registrar(f"salvar_resultado [{entrada}] [processo]", medida.inicio, medida.fim, medida)
+                resultados.append((arquivo, aba, gerados))
+        concluido = True
+    finally:
+        # Cancelamento/erro: leituras pendentes são descartadas sem esperar o pool
+        pool.shutdown(wait=concluido, cancel_futures=True)
+
+    if erro is not None:
+        raise erro from erro.causa
+    return resultados
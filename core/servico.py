@@ -0,0 +1,264 @@
+"""
+Serviço local de alocação: mantém o índice da base em memória e atende pedidos
+de códigos por HTTP em localhost (asyncio, sem dependências externas).
+
+    GET  /proximo/ABC          -> {"sigla": "ABC", "codigo": "ABC0042"}   (só consulta)
+    POST /alocar/ABC           -> {"sigla": "ABC", "codigos": ["ABC0042"]}
+    POST /alocar/ABC?n=50      -> {"sigla": "ABC", "codigos": [... 50 códigos ...]}
+    GET  /saude                -> {"ok": true, "siglas": ..., "emitidos": ...}
+
+Pedidos que chegam enquanto uma reserva está em andamento são agrupados: todos
+os pendentes (de qualquer sigla) viram UMA transação no ledger (core.ledger),
+e cada pedido recebe sua fatia. A resposta só sai depois do COMMIT, então um
+código devolvido nunca é entregue de novo, nem por este serviço, nem por outra
+execução da ferramenta sobre a mesma base.
+
+Uso (a partir da raiz do repositório):
+    python -m core.servico --base DADOS_ARVORE_V3.xlsx --porta 8765
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from core.cli import EXIT_BASE, EXIT_OK
+from core.fast_code_generator import AlocadorSigla
+from core.ledger import JOURNAIS, JOURNAL_WAL, VAR_JOURNAL, Ledger, abrir_ledger
+from core.pipeline import ABA_BASE_PADRAO, carregar_base
+
+HOST_PADRAO = "127.0.0.1"
+PORTA_PADRAO = 8765
+MAX_POR_PEDIDO = 10_000
+_MOTIVOS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            500: "Internal Server Error"}
+
+
+class ErroPedido(Exception):
+    """Pedido inválido; vira uma resposta HTTP com o status informado."""
+
+    def __init__(self, status: int, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class ServicoAlocacao:
+    """
+    Índice + ledger + fila de pedidos. Todo acesso ao índice e ao SQLite roda na
+    única thread do executor (o SQLite não compartilha conexões entre threads e o
+    índice não é thread-safe); o laço do asyncio só recebe e agrupa pedidos.
+    """
+
+    def __init__(self, idx: Dict[str, AlocadorSigla], digitos: int, caminho_ledger: str,
+                 journal: str = JOURNAL_WAL):
+        self.idx = idx
+        self.digitos = digitos
+        self.caminho_ledger = caminho_ledger
+        self.journal = journal
+        self.transacoes = 0
+        self._ledger: Optional[Ledger] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ledger")
+        self._pendentes: List[Tuple[str, int, asyncio.Future]] = []
+        self._reservando = False
+
+    # ---------- Thread do executor ----------
+    def _abrir(self):
+        self._ledger = Ledger(self.caminho_ledger, journal=self.journal)
+        self._ledger.sincronizar(self.idx, self.digitos)
+
+    def _reservar(self, siglas: List[str]) -> List[Optional[str]]:
+        self.transacoes += 1
+        return self._ledger.reservar(siglas, self.idx, self.digitos, origem="servico")
+
+    def _consultar(self, sigla: str) -> str:
+        self._ledger.sincronizar(self.idx, self.digitos)
+        aloc = self.idx.get(sigla)
+        numero = aloc.proximo_livre() if aloc is not None else 1
+        return f"{sigla}{str(numero).zfill(self.digitos)}"
+
+    def _saude(self) -> dict:
+        return {"ok": True, "siglas": len(self.idx), "emitidos": self._ledger.emitidos(),
+                "transacoes": self.transacoes}
+
+    def _fechar(self):
+        if self._ledger is not None:
+            self._ledger.fechar()
+
+    # ---------- Laço do asyncio ----------
+    async def _no_executor(self, funcao, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, funcao, *args)
+
+    async def iniciar(self):
+        await self._no_executor(self._abrir)
+
+    async def encerrar(self):
+        await self._no_executor(self._fechar)
+        self._executor.shutdown()
+
+    async def alocar(self, sigla: str, n: int = 1) -> List[str]:
+        futuro = asyncio.get_running_loop().create_future()
+        self._pendentes.append((sigla, n, futuro))
+        if not self._reservando:
+            self._reservando = True
+            asyncio.get_running_loop().create_task(self._reservar_pendentes())
+        return await futuro
+
+    async def _reservar_pendentes(self):
+        """Esvazia a fila em lotes: o que chega durante uma reserva entra na próxima."""
+        try:
+            while self._pendentes:
+                lote, self._pendentes = self._pendentes, []
+                siglas = [sigla for sigla, n, _ in lote for _ in range(n)]
+                try:
+                    codigos = await self._no_executor(self._reservar, siglas)
+                except Exception as e:
+                    for _, _, futuro in lote:
+                        if not futuro.done():
+                            futuro.set_exception(e)
+                    continue
+                inicio = 0
+                for _, n, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_result(codigos[inicio:inicio + n])
+                    inicio += n
+        finally:
+            self._reservando = False
+
+    async def consultar(self, sigla: str) -> str:
+        return await self._no_executor(self._consultar, sigla)
+
+    async def saude(self) -> dict:
+        return await self._no_executor(self._saude)
+
+
+def _sigla_do_caminho(partes: List[str]) -> str:
+    if len(partes) != 2:
+        raise ErroPedido(404, "rota inexistente")
+    sigla = unquote(partes[1])
+    if len(sigla) != 3 or not sigla.isalpha():
+        raise ErroPedido(400, f"sigla inválida: {sigla!r} (3 letras)")
+    return sigla
+
+
+async def _rotear(servico: ServicoAlocacao, metodo: str, alvo: str) -> dict:
+    url = urlsplit(alvo)
+    partes = [p for p in url.path.split("/") if p]
+    rota = partes[0] if partes else ""
+
+    if rota == "saude" and len(partes) == 1:
+        return await servico.saude()
+    if rota == "proximo":
+        sigla = _sigla_do_caminho(partes)
+        if metodo != "GET":
+            raise ErroPedido(405, "use GET")
+        return {"sigla": sigla, "codigo": await servico.consultar(sigla)}
+    if rota == "alocar":
+        sigla = _sigla_do_caminho(partes)
+        if metodo != "POST":
+            raise ErroPedido(405, "use POST")
+        try:
+            n = int(parse_qs(url.query).get("n", ["1"])[0])
+        except ValueError:
+            raise ErroPedido(400, "n deve ser inteiro")
+        if not 1 <= n <= MAX_POR_PEDIDO:
+            raise ErroPedido(400, f"n deve estar entre 1 e {MAX_POR_PEDIDO}")
+        return {"sigla": sigla, "codigos": await servico.alocar(sigla, n)}
+    raise ErroPedido(404, "rota inexistente")
+
+
+async def _atender(servico: ServicoAlocacao, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Uma conexão HTTP/1.1 (keep-alive): lê pedidos até o cliente fechar."""
+    try:
+        while True:
+            linha = await reader.readline()
+            if not linha:
+                break
+            try:
+                metodo, alvo, versao = linha.decode("latin-1").split()
+            except ValueError:
+                break
+            cabecalhos = {}
+            while True:
+                h = await reader.readline()
+                if h in (b"\r\n", b"\n", b""):
+                    break
+                nome, _, valor = h.decode("latin-1").partition(":")
+                cabecalhos[nome.strip().lower()] = valor.strip()
+            tamanho = int(cabecalhos.get("content-length") or 0)
+            if tamanho:
+                await reader.readexactly(tamanho)  # corpo não é usado: parâmetros vão na URL
+
+            try:
+                corpo, status = await _rotear(servico, metodo, alvo), 200
+            except ErroPedido as e:
+                corpo, status = {"erro": str(e)}, e.status
+            except Exception as e:
+                corpo, status = {"erro": f"falha interna: {e}"}, 500
+
+            fechar = cabecalhos.get("connection", "").lower() == "close" or versao == "HTTP/1.0"
+            dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {_MOTIVOS.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(dados)}\r\n"
+                f"Connection: {'close' if fechar else 'keep-alive'}\r\n\r\n".encode("latin-1") + dados
+            )
+            await writer.drain()
+            if fechar:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def servir(servico: ServicoAlocacao, host: str = HOST_PADRAO, porta: int = PORTA_PADRAO,
+                 pronto: Optional[asyncio.Event] = None):
+    await servico.iniciar()
+    server = await asyncio.start_server(lambda r, w: _atender(servico, r, w), host, porta)
+    try:
+        endereco = server.sockets[0].getsockname()
+        print(f"Serviço de alocação em http://{endereco[0]}:{endereco[1]}", file=sys.stderr, flush=True)
+        if pronto is not None:
+            pronto.set()
+        async with server:
+            await server.serve_forever()
+    finally:
+        await servico.encerrar()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(prog="python -m core.servico",
+                                description="Serviço local (HTTP em localhost) de alocação de códigos.")
+    p.add_argument("--base", required=True, help="planilha de base (.xlsx)")
+    p.add_argument("--aba-base", default=ABA_BASE_PADRAO,
+                   help="aba(s) e colunas da base (ex.: aba1!A:D;aba2, * = todas; ver core.cli)")
+    p.add_argument("--digitos", type=int, choices=(3, 4), default=4)
+    p.add_argument("--ledger", metavar="CAMINHO", help="padrão: <base>.codigos.sqlite")
+    p.add_argument("--ledger-journal", type=str.upper, choices=JOURNAIS,
+                   help=f"journal do SQLite (padrão: {VAR_JOURNAL}, ou detectado pela pasta do ledger)")
+    p.add_argument("--host", default=HOST_PADRAO)
+    p.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    args = p.parse_args(argv)
+
+    try:
+        idx = carregar_base(args.base, args.digitos, args.aba_base)
+        ledger = abrir_ledger(args.base, args.ledger, args.ledger_journal)
+    except Exception as e:
+        print(f"Erro ao carregar a base {args.base}: {e}", file=sys.stderr)
+        return EXIT_BASE
+    ledger.fechar()  # só valida; o serviço abre a conexão na thread do executor
+
+    servico = ServicoAlocacao(idx, args.digitos, ledger.caminho, ledger.journal)
+    try:
+        asyncio.run(servir(servico, args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,373 @@
+"""
+Snapshot binário do índice de alocação, consultado via mmap sem desserializar.
+
+Layout (little-endian):
+    cabeçalho (64 bytes): magic, versão, dígitos, nº de siglas, bytes por sigla,
+                          tamanho e mtime da base compilada, crc32 do nome
+                          da aba, crc32 do restante
+    diretório: nº de siglas × 16 bytes (sigla UTF-8 com zeros à direita, 12 bytes
+               + 'proximo' u32), ordenado pela sigla para busca binária
+    bitsets:   nº de siglas × bytes por sigla (mesmo bitset de AlocadorSigla)
+
+Abrir um snapshot custa o mmap e a conferência do crc32: nada é copiado para
+objetos Python até alguém pedir um AlocadorSigla (alocador / para_indice).
+O snapshot é gerado pela etapa explícita "compilar base" e acompanha as
+alocações feitas depois dela (sincronizar_snapshot), então representa
+base + códigos já emitidos enquanto a base não for alterada.
+
+Uso (a partir da raiz do repositório):
+    python -m core.snapshot --base DADOS_ARVORE_V3.xlsx --digitos 4
+    python -m core.snapshot --base DADOS_ARVORE_V3.xlsx --consultar ABC
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.fast_code_generator import AlocadorSigla, _primeiro_livre
+from core.formatos import indexar_base
+
+MAGIC = b"GCSNAP\r\n"
+VERSAO_SNAPSHOT = 1
+_CABECALHO = struct.Struct("<8sHBxIIQqII24x")  # 64 bytes
+_ENTRADA = struct.Struct("<12sI")  # sigla + proximo
+_ALINHAMENTO = 64
+
+
+class SnapshotInvalido(Exception):
+    """Arquivo que não é um snapshot, de outra versão ou com checksum incorreto."""
+
+
+def caminho_snapshot_padrao(base_path: str, digitos: int) -> str:
+    """Snapshot ao lado da base: <base>.d<digitos>.snap (ex.: DADOS.xlsx.d4.snap)."""
+    return f"{base_path}.d{digitos}.snap"
+
+
+def _chave(sigla: str) -> bytes:
+    chave = sigla.encode("utf-8")
+    if len(chave) > 12:
+        raise ValueError(f"sigla longa demais para o snapshot: {sigla!r}")
+    return chave.ljust(12, b"\0")
+
+
+def _inicio_bitsets(n_siglas: int) -> int:
+    fim_diretorio = _CABECALHO.size + n_siglas * _ENTRADA.size
+    return -(-fim_diretorio // _ALINHAMENTO) * _ALINHAMENTO
+
+
+def _impressao_base(base_path: Optional[str], aba: Optional[str]) -> Tuple[int, int, int]:
+    if base_path is None:
+        return 0, 0, 0
+    st = os.stat(base_path)
+    return st.st_size, st.st_mtime_ns, zlib.crc32((aba or "").encode("utf-8"))
+
+
+def compilar_snapshot(idx: Dict[str, AlocadorSigla], caminho: str, digitos: int,
+                      base_path: Optional[str] = None, aba: Optional[str] = None) -> str:
+    """Grava idx como snapshot (arquivo temporário + os.replace). Devolve o caminho."""
+    return _gravar_snapshot(idx, caminho, digitos, _impressao_base(base_path, aba))
+
+
+def _gravar_snapshot(idx: Dict[str, AlocadorSigla], caminho: str, digitos: int,
+                     impressao: Tuple[int, int, int]) -> str:
+    bytes_por_sigla = 10 ** digitos // 8
+    siglas = sorted(idx, key=_chave)
+    inicio = _inicio_bitsets(len(siglas))
+    corpo = bytearray(inicio - _CABECALHO.size + len(siglas) * bytes_por_sigla)
+    for i, sigla in enumerate(siglas):
+        aloc = idx[sigla]
+        if len(aloc.bits) != bytes_por_sigla:
+            raise ValueError(f"alocador de {sigla!r} não tem {digitos} dígitos")
+        _ENTRADA.pack_into(corpo, i * _ENTRADA.size, _chave(sigla), aloc.proximo)
+        pos = inicio - _CABECALHO.size + i * bytes_por_sigla
+        corpo[pos:pos + bytes_por_sigla] = aloc.bits
+    cabecalho = _CABECALHO.pack(MAGIC, VERSAO_SNAPSHOT, digitos, len(siglas), bytes_por_sigla,
+                                *impressao, zlib.crc32(corpo))
+
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    fd, tmp = tempfile.mkstemp(prefix=".snap_", dir=pasta)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(cabecalho)
+            f.write(corpo)
+        os.replace(tmp, caminho)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return caminho
+
+
+class SnapshotIndice:
+    """
+    Snapshot aberto via mmap. As consultas (proximo_livre, in, len) leem direto
+    do arquivo mapeado. Com gravavel=True, 'marcar' altera os bitsets no lugar;
+    'fechar' recalcula o crc32 antes de desmapear.
+    """
+
+    def __init__(self, caminho: str, gravavel: bool = False, verificar: bool = True):
+        self.caminho = caminho
+        self._f = open(caminho, "r+b" if gravavel else "rb")
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_WRITE if gravavel else mmap.ACCESS_READ)
+        except ValueError:  # arquivo vazio
+            self._f.close()
+            raise SnapshotInvalido(f"{caminho}: arquivo vazio")
+        self._gravavel = gravavel
+        self._alterado = False
+        try:
+            self._ler_cabecalho(verificar)
+        except BaseException:
+            self._mm.close()
+            self._f.close()
+            raise
+
+    def _ler_cabecalho(self, verificar: bool):
+        mm = self._mm
+        if len(mm) < _CABECALHO.size:
+            raise SnapshotInvalido(f"{self.caminho}: arquivo truncado")
+        (magic, versao, self.digitos, self.n_siglas, self.bytes_por_sigla,
+         *impressao, crc) = _CABECALHO.unpack_from(mm, 0)
+        self.impressao = tuple(impressao)
+        if magic != MAGIC or versao != VERSAO_SNAPSHOT:
+            raise SnapshotInvalido(f"{self.caminho}: formato ou versão não suportados")
+        self._bitsets = _inicio_bitsets(self.n_siglas)
+        if len(mm) != self._bitsets + self.n_siglas * self.bytes_por_sigla:
+            raise SnapshotInvalido(f"{self.caminho}: tamanho inconsistente com o cabeçalho")
+        if verificar and zlib.crc32(memoryview(mm)[_CABECALHO.size:]) != crc:
+            raise SnapshotInvalido(f"{self.caminho}: checksum incorreto")
+
+    def __enter__(self) -> "SnapshotIndice":
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def fechar(self):
+        if self._mm.closed:
+            return
+        if self._alterado:
+            _CABECALHO.pack_into(self._mm, 0, MAGIC, VERSAO_SNAPSHOT, self.digitos, self.n_siglas,
+                                 self.bytes_por_sigla, *self.impressao,
+                                 zlib.crc32(memoryview(self._mm)[_CABECALHO.size:]))
+            self._mm.flush()
+        self._mm.close()
+        self._f.close()
+
+    # ---------- Consulta no lugar ----------
+    def _posicao(self, sigla: str) -> Optional[int]:
+        try:
+            chave = _chave(sigla)
+        except ValueError:
+            return None
+        mm, lo, hi = self._mm, 0, self.n_siglas
+        while lo < hi:
+            meio = (lo + hi) // 2
+            off = _CABECALHO.size + meio * _ENTRADA.size
+            atual = mm[off:off + 12]
+            if atual < chave:
+                lo = meio + 1
+            elif atual > chave:
+                hi = meio
+            else:
+                return meio
+        return None
+
+    def _proximo(self, i: int) -> int:
+        return _ENTRADA.unpack_from(self._mm, _CABECALHO.size + i * _ENTRADA.size)[1]
+
+    def __len__(self) -> int:
+        return self.n_siglas
+
+    def __contains__(self, sigla: str) -> bool:
+        return self._posicao(sigla) is not None
+
+    def siglas(self) -> List[str]:
+        mm = self._mm
+        return [mm[off:off + 12].rstrip(b"\0").decode("utf-8")
+                for off in range(_CABECALHO.size, _CABECALHO.size + self.n_siglas * _ENTRADA.size, _ENTRADA.size)]
+
+    def proximo_livre(self, sigla: str) -> int:
+        """Menor número livre da sigla (1 se ela não existe), lido direto do mmap."""
+        i = self._posicao(sigla)
+        if i is None:
+            return 1
+        inicio = self._bitsets + i * self.bytes_por_sigla
+        return _primeiro_livre(self._mm, self._proximo(i), inicio, self.bytes_por_sigla)
+
+    def proximo_codigo(self, sigla: str) -> str:
+        return f"{sigla}{str(self.proximo_livre(sigla)).zfill(self.digitos)}"
+
+    def usado(self, codigo: str) -> bool:
+        sigla, num = codigo[:3], codigo[3:]
+        i = self._posicao(sigla)
+        if i is None or not num.isdigit():
+            return False
+        n = int(num)
+        if n >= self.bytes_por_sigla * 8:
+            return n < self._proximo(i)
+        return bool(self._mm[self._bitsets + i * self.bytes_por_sigla + (n >> 3)] & (1 << (n & 7)))
+
+    # ---------- Cópias para alocação ----------
+    def alocador(self, sigla: str) -> Optional[AlocadorSigla]:
+        i = self._posicao(sigla)
+        if i is None:
+            return None
+        inicio = self._bitsets + i * self.bytes_por_sigla
+        return AlocadorSigla(bits=self._mm[inicio:inicio + self.bytes_por_sigla], proximo=self._proximo(i))
+
+    def para_indice(self) -> Dict[str, AlocadorSigla]:
+        """Índice mutável (cópia) para gerar_codigos_com_indice."""
+        mm, bps = self._mm, self.bytes_por_sigla
+        diretorio = mm[_CABECALHO.size:_CABECALHO.size + self.n_siglas * _ENTRADA.size]
+        with memoryview(mm) as bitsets:
+            inicio = self._bitsets
+            idx = {}
+            for chave, proximo in _ENTRADA.iter_unpack(diretorio):
+                idx[chave.rstrip(b"\0").decode("utf-8")] = AlocadorSigla(bits=bitsets[inicio:inicio + bps],
+                                                                        proximo=proximo)
+                inicio += bps
+        return idx
+
+    # ---------- Atualização no lugar ----------
+    def marcar(self, sigla: str, num: int) -> bool:
+        """Marca o número como usado. False se a sigla não está no snapshot."""
+        if not self._gravavel:
+            raise ValueError("snapshot aberto só para leitura")
+        i = self._posicao(sigla)
+        if i is None:
+            return False
+        if num >= self.bytes_por_sigla * 8:
+            # Além da capacidade só o ponteiro registra, e só com o bitset cheio
+            # (é quando AlocadorSigla.alocar_varios passa a seguir em sequência)
+            inicio = self._bitsets + i * self.bytes_por_sigla
+            livre = _primeiro_livre(self._mm, self._proximo(i), inicio, self.bytes_por_sigla)
+            if livre < self.bytes_por_sigla * 8:
+                return True
+            off = _CABECALHO.size + i * _ENTRADA.size
+            _ENTRADA.pack_into(self._mm, off, _chave(sigla), max(livre, num + 1))
+        elif num >= 0:
+            pos = self._bitsets + i * self.bytes_por_sigla + (num >> 3)
+            self._mm[pos] |= 1 << (num & 7)
+        self._alterado = True
+        return True
+
+    def atual_para(self, base_path: str, aba: str) -> bool:
+        """O snapshot foi compilado a partir desta aba, na versão atual (tamanho + mtime) da base?"""
+        return self.impressao == _impressao_base(base_path, aba)
+
+
+def _numeros(codigos: Iterable[Optional[str]], digitos: int) -> Iterable[Tuple[str, int]]:
+    for codigo in codigos:
+        if isinstance(codigo, str) and len(codigo) >= 3 + digitos and codigo[3:].isdigit():
+            yield codigo[:3], int(codigo[3:])
+
+
+def sincronizar_snapshot(caminho: str, codigos: Iterable[Optional[str]], digitos: int):
+    """
+    Registra no snapshot códigos emitidos depois da compilação. Siglas já presentes
+    são marcadas no lugar (mmap); se aparecer sigla nova, o arquivo é regravado.
+    Uma interrupção no meio deixa o crc32 incorreto: o snapshot passa a ser
+    recusado (e ignorado pelo pipeline) até ser compilado de novo. Por isso o
+    crc32 é conferido antes de marcar (SnapshotInvalido se não bater): recalculá-lo
+    por cima tornaria válido um bitset corrompido.
+    """
+    pares = list(_numeros(codigos, digitos))
+    if not pares:
+        return
+    with SnapshotIndice(caminho, gravavel=True) as snap:
+        if snap.digitos != digitos:
+            raise SnapshotInvalido(f"{caminho}: snapshot de {snap.digitos} dígitos")
+        faltando = [(sigla, num) for sigla, num in pares if not snap.marcar(sigla, num)]
+        if not faltando:
+            return
+        idx = snap.para_indice()
+        impressao = snap.impressao
+
+    for sigla, num in faltando:
+        aloc = idx.get(sigla)
+        if aloc is None:
+            aloc = idx[sigla] = AlocadorSigla(digitos)
+        if num >= aloc.capacidade:
+            livre = aloc.proximo_livre()
+            if livre >= aloc.capacidade:
+                aloc.proximo = max(livre, num + 1)
+        else:
+            aloc.marcar(num)
+    _gravar_snapshot(idx, caminho, digitos, impressao)
+
+
+def snapshot_atual(base_path: str, digitos: int, aba: str = "aba1",
+                   caminho: Optional[str] = None) -> Optional[str]:
+    """Caminho do snapshot da base se existir, for válido e estiver em dia com ela; senão None."""
+    caminho = caminho or caminho_snapshot_padrao(base_path, digitos)
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with SnapshotIndice(caminho) as snap:
+            if snap.digitos == digitos and snap.atual_para(base_path, aba):
+                return caminho
+    except (OSError, SnapshotInvalido):
+        pass
+    return None
+
+
+def compilar_base(base_path: str, digitos: int, aba: str = "aba1", caminho: Optional[str] = None,
+                  progresso=None) -> str:
+    """Etapa "compilar base": lê a base (streaming) e grava o snapshot ao lado dela."""
+    impressao = _impressao_base(base_path, aba)
+    idx = indexar_base(base_path, digitos, aba, progresso)
+    if _impressao_base(base_path, aba) != impressao:
+        raise RuntimeError(f"{base_path} foi alterada durante a compilação")
+    return _gravar_snapshot(idx, caminho or caminho_snapshot_padrao(base_path, digitos), digitos, impressao)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from core.cli import EXIT_BASE, EXIT_ERRO, EXIT_OK  # core.cli -> pipeline -> este módulo
+
+    p = argparse.ArgumentParser(prog="python -m core.snapshot",
+                                description="Compila a base em um snapshot binário (mmap) ou consulta um snapshot.")
+    p.add_argument("--base", required=True, help="base (.xlsx, .csv ou .tsv)")
+    p.add_argument("--aba-base", default="aba1",
+                   help="aba(s) e colunas da base (ex.: aba1!A:D;aba2, * = todas; ver core.cli)")
+    p.add_argument("--digitos", type=int, choices=(3, 4), default=4)
+    p.add_argument("--saida", metavar="CAMINHO", help="padrão: <base>.d<digitos>.snap")
+    p.add_argument("--consultar", metavar="SIGLA", action="append",
+                   help="em vez de compilar, mostra o próximo código livre da sigla no snapshot")
+    args = p.parse_args(argv)
+    caminho = args.saida or caminho_snapshot_padrao(args.base, args.digitos)
+
+    if args.consultar:
+        t0 = time.perf_counter()
+        try:
+            with SnapshotIndice(caminho) as snap:
+                resultados = [snap.proximo_codigo(s) for s in args.consultar]
+                atual = snap.atual_para(args.base, args.aba_base)
+        except (OSError, SnapshotInvalido) as e:
+            print(f"Erro ao abrir o snapshot: {e}", file=sys.stderr)
+            return EXIT_ERRO
+        print(f"[tempo] abrir + consultar: {(time.perf_counter() - t0) * 1000:.2f} ms", file=sys.stderr)
+        if not atual:
+            print("Aviso: a base (ou a aba) mudou desde a compilação; compile de novo.", file=sys.stderr)
+        for codigo in resultados:
+            print(codigo)
+        return EXIT_OK
+
+    t0 = time.perf_counter()
+    try:
+        compilar_base(args.base, args.digitos, args.aba_base, caminho)
+    except Exception as e:
+        print(f"Erro ao compilar a base {args.base}: {e}", file=sys.stderr)
+        return EXIT_BASE
+    print(f"{caminho} ({os.path.getsize(caminho):,} bytes) em {time.perf_counter() - t0:.2f} s")
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,42 @@
+import time
+
+_T0 = time.perf_counter()  # antes dos demais imports: base da medição de partida
+
+import multiprocessing
+import os
+
 import ttkbootstrap as ttk
 from ui.gui import App as GuiApp
 
-print("Iniciando aplicação...")
-
-try:
-    root = ttk.Window(themename="flatly")
-    print("Instância Tk criada.")
-    GuiApp(root)
-    print("App carregado.")
-    root.mainloop()
-    print("Loop encerrado.")
-except Exception as e:
-    print("Erro ao iniciar a interface:", e)
\ No newline at end of file
+# Com esta variável definida, o app informa o tempo até a primeira janela e fecha
+# (usado por benchmarks/bench_partida.py)
+VAR_MEDIR_PARTIDA = "GERADOR_CODIGOS_MEDIR_PARTIDA"
+
+
+def _informar_partida(root):
+    root.update_idletasks()
+    print(f"partida_ms={(time.perf_counter() - _T0) * 1000:.1f}", flush=True)
+    root.destroy()
+
+
+def main():
+    print("Iniciando aplicação...")
+
+    try:
+        root = ttk.Window(themename="flatly")
+        print("Instância Tk criada.")
+        GuiApp(root)
+        print("App carregado.")
+        if os.environ.get(VAR_MEDIR_PARTIDA):
+            root.after_idle(_informar_partida, root)
+        root.mainloop()
+        print("Loop encerrado.")
+    except Exception as e:
+        print("Erro ao iniciar a interface:", e)
+
+
+# O processamento usa processos filhos (leitura da base/siglas): no Windows e no
+# executável empacotado eles reimportam este módulo, então a janela só abre aqui.
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,115 @@
+import csv
+import os
+import tempfile
+import unittest
+from typing import List, Tuple
+
+from openpyxl import Workbook
+
+from core.base_incremental import BLOCO_LINHAS, atualizar_indice, estado_base
+from core.formatos import indexar_base
+from core.index_cache import obter_indice
+
+Linha = Tuple[str, str]
+
+
+def _linhas(n: int, inicio: int = 1) -> List[Linha]:
+    return [(f"ABC{i:04d}", f"XYZ{i:04d}") for i in range(inicio, inicio + n)]
+
+
+class _CasosIncrementais:
+    """Casos comuns a .xlsx e .csv: o índice incremental deve ser igual ao de indexar_base."""
+    extensao = ""
+
+    def setUp(self):
+        self._pasta = tempfile.TemporaryDirectory()
+        self.base = os.path.join(self._pasta.name, "base" + self.extensao)
+        self.cache = os.path.join(self._pasta.name, "cache")
+
+    def tearDown(self):
+        self._pasta.cleanup()
+
+    def _gravar(self, linhas: List[Linha]):
+        raise NotImplementedError
+
+    def _atualizar(self, antes: List[Linha], depois: List[Linha]):
+        """Grava 'antes', tira o estado e indexa; grava 'depois' e tenta a atualização incremental."""
+        self._gravar(antes)
+        estado = estado_base(self.base)
+        indice = indexar_base(self.base, 4)
+        self._gravar(depois)
+        return atualizar_indice(self.base, 4, indice, estado)
+
+    def _conferir_cache(self, antes: List[Linha], depois: List[Linha]):
+        self._gravar(antes)
+        obter_indice(self.base, 4, cache_dir=self.cache)
+        self._gravar(depois)
+        self.assertEqual(obter_indice(self.base, 4, cache_dir=self.cache), indexar_base(self.base, 4))
+
+    def test_linhas_acrescentadas(self):
+        antes = _linhas(BLOCO_LINHAS + 250)
+        depois = antes + _linhas(300, inicio=5000)
+        resultado = self._atualizar(antes, depois)
+        self.assertIsNotNone(resultado)
+        indice, _, novas = resultado
+        self.assertEqual(novas, 300)
+        self.assertEqual(indice, indexar_base(self.base, 4))
+        self._conferir_cache(antes, depois)
+
+    def test_valores_repetidos_acrescentados(self):
+        # Strings já presentes na base (no .xlsx, reaproveitadas do sharedStrings)
+        antes = _linhas(400)
+        depois = antes + antes[:50] + [("ABC0001", "")]
+        resultado = self._atualizar(antes, depois)
+        self.assertIsNotNone(resultado)
+        self.assertEqual(resultado[0], indexar_base(self.base, 4))
+        self._conferir_cache(antes, depois)
+
+    def test_linha_editada_reconstroi(self):
+        antes = _linhas(BLOCO_LINHAS + 250)
+        depois = list(antes) + _linhas(10, inicio=5000)
+        depois[10] = ("QQQ0007", depois[10][1])
+        self.assertIsNone(self._atualizar(antes, depois))
+        self._conferir_cache(antes, depois)
+
+    def test_linha_excluida_reconstroi(self):
+        antes = _linhas(BLOCO_LINHAS + 250)
+        depois = antes[:500] + antes[501:] + _linhas(10, inicio=5000)
+        self.assertIsNone(self._atualizar(antes, depois))
+        self._conferir_cache(antes, depois)
+
+    def test_atualizacoes_seguidas(self):
+        linhas = _linhas(300)
+        self._gravar(linhas)
+        obter_indice(self.base, 4, cache_dir=self.cache)
+        for i in range(3):
+            linhas = linhas + _linhas(120, inicio=6000 + 200 * i)
+            self._gravar(linhas)
+            self.assertEqual(obter_indice(self.base, 4, cache_dir=self.cache), indexar_base(self.base, 4))
+
+
+class TestIncrementalXlsx(_CasosIncrementais, unittest.TestCase):
+    extensao = ".xlsx"
+
+    def _gravar(self, linhas: List[Linha]):
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "aba1"
+        ws.append(["Codigo A", "Codigo B"])
+        for a, b in linhas:
+            ws.append([a, b or None])
+        wb.save(self.base)
+
+
+class TestIncrementalCsv(_CasosIncrementais, unittest.TestCase):
+    extensao = ".csv"
+
+    def _gravar(self, linhas: List[Linha]):
+        with open(self.base, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["Codigo A", "Codigo B"])
+            w.writerows(linhas)
+
+
+if __name__ == "__main__":
+    unittest.main()
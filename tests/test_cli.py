@@ -0,0 +1,48 @@
+import csv
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestCliFluxo(unittest.TestCase):
+    def setUp(self):
+        self._pasta = tempfile.TemporaryDirectory()
+        self.pasta = self._pasta.name
+        self.base = os.path.join(self.pasta, "base.csv")
+        with open(self.base, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows([["Codigo A", "Codigo B"], ["SET0001", "SET0002"], ["ABC0002", ""]])
+        self.env = dict(os.environ, PYTHONPATH=RAIZ,
+                        GERADOR_CODIGOS_CACHE=os.path.join(self.pasta, "cache"),
+                        GERADOR_CODIGOS_METRICAS=os.path.join(self.pasta, "metricas.jsonl"))
+
+    def tearDown(self):
+        self._pasta.cleanup()
+
+    def _cli(self, *args: str, entrada: str) -> subprocess.CompletedProcess:
+        return subprocess.run([sys.executable, "-m", "core.cli", "--base", self.base, "--sem-ledger", *args],
+                              input=entrada, capture_output=True, text=True, encoding="utf-8",
+                              env=self.env, cwd=self.pasta, timeout=120)
+
+    def _conferir_csv_puro(self, r: subprocess.CompletedProcess):
+        self.assertEqual(r.returncode, 0, r.stderr)
+        linhas = list(csv.reader(io.StringIO(r.stdout)))
+        self.assertEqual(linhas[0], ["Sigla", "Proximo_Codigo"])
+        self.assertEqual(linhas[-2:], [["ABC", "ABC0001"], ["SET", "SET0003"]])
+        self.assertTrue(all(len(linha) == 2 for linha in linhas), r.stdout)
+        self.assertNotIn("códigos gerados", r.stdout)
+        self.assertIn("-: 3 códigos gerados", r.stderr)
+
+    def test_entrada_da_stdin_sem_destino(self):
+        self._conferir_csv_puro(self._cli("--entrada", "-", entrada="Sigla\nABC\nSET\n"))
+
+    def test_destino_stdout(self):
+        self._conferir_csv_puro(self._cli("--entrada", "-", "--destino", "-", entrada="Sigla\nABC\nSET\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import pandas as pd
+
+from core.code_generator import limpar_cache_proximo_codigo, proximo_codigo
+
+
+class TestProximoCodigoMemorizado(unittest.TestCase):
+    def setUp(self):
+        limpar_cache_proximo_codigo()
+
+    def _base(self, n: int = 2000) -> pd.DataFrame:
+        return pd.DataFrame({"Codigo": [f"ABC{i % 9000 + 1:04d}" for i in range(n)]})
+
+    def test_linha_do_meio_alterada_em_copia(self):
+        df1 = self._base()
+        self.assertEqual(proximo_codigo("XYZ", df1), "XYZ0001")
+        df2 = df1.copy()
+        df2.loc[1001, "Codigo"] = "XYZ0001"  # fora de qualquer amostra do início/fim
+        self.assertEqual(proximo_codigo("XYZ", df2), "XYZ0002")
+
+    def test_linhas_acrescentadas_com_concat(self):
+        df1 = self._base()
+        self.assertEqual(proximo_codigo("XYZ", df1), "XYZ0001")
+        df2 = pd.concat([df1, pd.DataFrame({"Codigo": ["XYZ0001"]})], ignore_index=True)
+        self.assertEqual(proximo_codigo("XYZ", df2), "XYZ0002")
+
+    def test_edicao_no_lugar_antes_de_concat(self):
+        df1 = self._base()
+        self.assertEqual(proximo_codigo("XYZ", df1), "XYZ0001")
+        df1.loc[1001, "Codigo"] = "XYZ0001"
+        df2 = pd.concat([df1, pd.DataFrame({"Codigo": ["ABC9999"]})], ignore_index=True)
+        self.assertEqual(proximo_codigo("XYZ", df2), "XYZ0002")
+
+
+class TestSemPandas(unittest.TestCase):
+    def test_importa_sem_pandas(self):
+        # sys.modules[...] = None faz qualquer import de pandas/numpy falhar
+        codigo = ("import sys; sys.modules['pandas'] = None; sys.modules['numpy'] = None\n"
+                  "from core.code_generator import codigo_valido, proximo_codigo\n"
+                  "assert codigo_valido('ABC0001')")
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        r = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True,
+                           env=dict(os.environ, PYTHONPATH=raiz), timeout=60)
+        self.assertEqual(r.returncode, 0, r.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+import zipfile
+
+from openpyxl import Workbook, load_workbook
+
+from core.excel_processor import MODO_INJETAR, TabelaResultado, salvar_resultado
+
+# Partes que a injeção de uma aba precisa alterar; todas as outras são copiadas
+_ALTERADAS = {"xl/workbook.xml", "xl/_rels/workbook.xml.rels", "[Content_Types].xml"}
+
+
+class TestInjetarAba(unittest.TestCase):
+    def setUp(self):
+        self._pasta = tempfile.TemporaryDirectory()
+        self.arquivo = os.path.join(self._pasta.name, "entrada.xlsx")
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Siglas"
+        for linha in (["Sigla"], ["ABC"], ["SET"], ["Ação & <teste>"]):
+            ws.append(linha)
+        outra = wb.create_sheet("Plan2")
+        outra.append([1, 2.5, "texto"])
+        outra["D5"] = "=SUM(A1:B1)"
+        wb.save(self.arquivo)
+        with zipfile.ZipFile(self.arquivo) as z:
+            self.partes = {nome: z.read(nome) for nome in z.namelist()}
+
+    def tearDown(self):
+        self._pasta.cleanup()
+
+    def _injetar(self, aba: str = "RESULTADO") -> str:
+        tabela = TabelaResultado(["ABC", None, "SET"], ["ABC0001", None, "SET0001"])
+        arquivo, aba = salvar_resultado(self.arquivo, aba, tabela, modo=MODO_INJETAR)
+        self.assertEqual(arquivo, self.arquivo)
+        return aba
+
+    def test_demais_partes_intactas(self):
+        self._injetar()
+        with zipfile.ZipFile(self.arquivo) as z:
+            for nome, dados in self.partes.items():
+                if nome not in _ALTERADAS:
+                    self.assertEqual(z.read(nome), dados, nome)
+        wb = load_workbook(self.arquivo)
+        self.assertEqual(wb.sheetnames, ["Siglas", "Plan2", "RESULTADO"])
+        self.assertEqual([r[0] for r in wb["Siglas"].iter_rows(values_only=True)],
+                         ["Sigla", "ABC", "SET", "Ação & <teste>"])
+        self.assertEqual(wb["Plan2"]["D5"].value, "=SUM(A1:B1)")
+
+    def test_resultado_e_sigla_vazia(self):
+        aba = self._injetar()
+        ws = load_workbook(self.arquivo)[aba]
+        self.assertEqual(list(ws.iter_rows(values_only=True)), [
+            ("Sigla", "Proximo_Codigo"),
+            ("ABC", "ABC0001"),
+            (None, None),
+            ("SET", "SET0001"),
+        ])
+
+    def test_nome_unico_ao_injetar_duas_vezes(self):
+        self.assertEqual(self._injetar(), "RESULTADO")
+        self.assertEqual(self._injetar(), "RESULTADO1")
+        self.assertEqual(self._injetar("resultado"), "resultado2")  # nomes de aba ignoram a caixa
+        wb = load_workbook(self.arquivo)
+        self.assertEqual(wb.sheetnames, ["Siglas", "Plan2", "RESULTADO", "RESULTADO1", "resultado2"])
+        self.assertEqual(wb["RESULTADO1"]["B2"].value, "ABC0001")
+
+
+if __name__ == "__main__":
+    unittest.main()
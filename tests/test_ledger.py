@@ -0,0 +1,87 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from core.fast_code_generator import indexar_codigos
+from core.ledger import JOURNAL_DELETE, JOURNAL_WAL, VAR_JOURNAL, Ledger, journal_padrao, pasta_de_rede
+
+
+class TestLedgerDuasConexoes(unittest.TestCase):
+    journal = JOURNAL_WAL
+
+    def setUp(self):
+        self._pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self._pasta.name, "base.codigos.sqlite")
+        self.a = Ledger(self.caminho, journal=self.journal)
+        self.b = Ledger(self.caminho, journal=self.journal)
+        # Cada conexão com o seu índice, montado da mesma base (que já tem ABC0001)
+        self.idx_a = indexar_codigos(["ABC0001"], 4)
+        self.idx_b = indexar_codigos(["ABC0001"], 4)
+
+    def tearDown(self):
+        self.a.fechar()
+        self.b.fechar()
+        self._pasta.cleanup()
+
+    def test_journal(self):
+        modo = sqlite3.connect(self.caminho).execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(modo.upper(), self.journal)
+
+    def test_segunda_reserva_pula_os_codigos_da_primeira(self):
+        self.assertEqual(self.a.reservar(["ABC", "ABC", "SET"], self.idx_a, 4, origem="a"),
+                         ["ABC0002", "ABC0003", "SET0001"])
+        # b não sincronizou: a reserva aplica antes o que a confirmou
+        self.assertEqual(self.b.reservar(["ABC", None, "SET"], self.idx_b, 4, origem="b"),
+                         ["ABC0004", None, "SET0002"])
+        self.assertEqual(self.a.reservar(["SET"], self.idx_a, 4), ["SET0003"])
+        self.assertEqual(self.a.emitidos(), 6)
+
+    def test_reservas_intercaladas_nunca_repetem(self):
+        emitidos = []
+        for i in range(30):
+            ledger, idx = (self.a, self.idx_a) if i % 2 else (self.b, self.idx_b)
+            emitidos += [c for c in ledger.reservar(["ABC", "XYZ"] * (i % 4 + 1), idx, 4) if c]
+        self.assertEqual(len(emitidos), len(set(emitidos)))
+        self.assertEqual(sorted(emitidos), sorted(self.a.codigos()))
+
+    def test_sincronizar(self):
+        self.a.reservar(["ABC", "ABC"], self.idx_a, 4)
+        self.assertEqual(self.b.sincronizar(self.idx_b, 4), 2)
+        self.assertEqual(self.idx_b["ABC"].proximo_livre(), 4)
+        self.assertEqual(self.b.sincronizar(self.idx_b, 4), 0)
+
+    def test_codigo_repetido_e_recusado(self):
+        self.a.reservar(["ABC"], self.idx_a, 4)
+        # Índice que não viu o ledger nem a base: a restrição UNIQUE barra a repetição
+        with self.assertRaises(sqlite3.IntegrityError):
+            with mock.patch.object(self.b, "_aplicar_novos", return_value=0):
+                self.b.reservar(["ABC"], indexar_codigos(["ABC0001"], 4), 4)
+        self.assertEqual(self.a.emitidos(), 1)
+
+
+class TestLedgerJournalDelete(TestLedgerDuasConexoes):
+    journal = JOURNAL_DELETE
+
+
+class TestJournalPadrao(unittest.TestCase):
+    def test_variavel_de_ambiente(self):
+        with mock.patch.dict(os.environ, {VAR_JOURNAL: "delete"}):
+            self.assertEqual(journal_padrao("/tmp/x.sqlite"), JOURNAL_DELETE)
+        with mock.patch.dict(os.environ, {VAR_JOURNAL: "memoria"}):
+            with self.assertRaises(ValueError):
+                journal_padrao("/tmp/x.sqlite")
+
+    def test_pasta_de_rede_cai_para_delete(self):
+        with mock.patch.dict(os.environ), mock.patch("core.ledger.pasta_de_rede", return_value=True):
+            os.environ.pop(VAR_JOURNAL, None)
+            self.assertEqual(journal_padrao("/mnt/rede/x.sqlite"), JOURNAL_DELETE)
+
+    def test_pasta_local(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            self.assertFalse(pasta_de_rede(pasta))
+
+
+if __name__ == "__main__":
+    unittest.main()
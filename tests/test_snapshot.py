@@ -0,0 +1,123 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from core.fast_code_generator import indexar_codigos
+from core.pipeline import carregar_base, gerar_resultado, processar_arquivos
+from core.snapshot import (
+    SnapshotIndice,
+    SnapshotInvalido,
+    compilar_base,
+    compilar_snapshot,
+    sincronizar_snapshot,
+    snapshot_atual,
+)
+
+CODIGOS = ["ABC0001", "ABC0002", "ABC0004", "SET0001", "XYZ9999"]
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self._pasta = tempfile.TemporaryDirectory()
+        self.pasta = self._pasta.name
+        self.base = os.path.join(self.pasta, "base.csv")
+        with open(self.base, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["Codigo A", "Codigo B"])
+            w.writerows([CODIGOS[i], CODIGOS[i + 1] if i + 1 < len(CODIGOS) else ""]
+                        for i in range(0, len(CODIGOS), 2))
+
+    def tearDown(self):
+        self._pasta.cleanup()
+
+    def _compilar(self) -> str:
+        caminho = compilar_base(self.base, 4, aba="aba1")
+        self.assertEqual(snapshot_atual(self.base, 4, "aba1"), caminho)
+        return caminho
+
+    def test_compilar_consultar(self):
+        idx = indexar_codigos(CODIGOS, 4)
+        caminho = compilar_snapshot(idx, os.path.join(self.pasta, "idx.snap"), 4)
+        with SnapshotIndice(caminho) as snap:
+            self.assertEqual(len(snap), 3)
+            self.assertEqual(snap.siglas(), ["ABC", "SET", "XYZ"])
+            self.assertIn("SET", snap)
+            self.assertNotIn("QQQ", snap)
+            self.assertEqual(snap.proximo_codigo("ABC"), "ABC0003")
+            self.assertEqual(snap.proximo_codigo("QQQ"), "QQQ0001")
+            self.assertTrue(snap.usado("ABC0004"))
+            self.assertFalse(snap.usado("ABC0003"))
+            self.assertEqual(snap.para_indice(), idx)
+
+    def test_sincronizar(self):
+        caminho = self._compilar()
+        # ABC e SET já estão no snapshot (marcados no lugar); QQQ é nova (regrava o arquivo)
+        sincronizar_snapshot(caminho, ["ABC0003", None, "SET0002"], 4)
+        with SnapshotIndice(caminho) as snap:  # crc32 conferido
+            self.assertEqual(snap.proximo_codigo("ABC"), "ABC0005")
+            self.assertEqual(snap.proximo_codigo("SET"), "SET0003")
+        sincronizar_snapshot(caminho, ["QQQ0001"], 4)
+        with SnapshotIndice(caminho) as snap:
+            self.assertEqual(snap.proximo_codigo("QQQ"), "QQQ0002")
+            self.assertEqual(snap.proximo_codigo("ABC"), "ABC0005")
+        self.assertEqual(snapshot_atual(self.base, 4, "aba1"), caminho)
+
+    def test_base_alterada_invalida_o_snapshot(self):
+        self._compilar()
+        with open(self.base, "a", encoding="utf-8") as f:
+            f.write("ABC0003,\n")
+        self.assertIsNone(snapshot_atual(self.base, 4, "aba1"))
+        self.assertIsNone(snapshot_atual(self.base, 3, "aba1"))
+
+    def _corromper(self, caminho: str, modo: str):
+        with open(caminho, "r+b") as f:
+            if modo == "truncado":
+                f.truncate(os.path.getsize(caminho) - 7)
+            elif modo == "cabecalho":
+                f.truncate(20)
+            elif modo == "vazio":
+                f.truncate(0)
+            else:  # crc: um bit trocado no fim dos bitsets
+                f.seek(-1, os.SEEK_END)
+                byte = f.read(1)[0]
+                f.seek(-1, os.SEEK_END)
+                f.write(bytes([byte ^ 0x80]))
+
+    def test_arquivo_corrompido_e_recusado(self):
+        for modo in ("truncado", "cabecalho", "vazio", "crc"):
+            with self.subTest(modo=modo):
+                caminho = self._compilar()
+                self._corromper(caminho, modo)
+                with self.assertRaises(SnapshotInvalido):
+                    SnapshotIndice(caminho).fechar()
+                self.assertIsNone(snapshot_atual(self.base, 4, "aba1"))
+
+    def test_corrompido_reconstroi_pela_base(self):
+        esperado = indexar_codigos(CODIGOS, 4)
+        for modo in ("truncado", "crc"):
+            with self.subTest(modo=modo):
+                caminho = self._compilar()
+                self._corromper(caminho, modo)
+                # Corrompido entre snapshot_atual e a carga: o índice vem da base
+                idx = carregar_base(self.base, 4, usar_cache=False, snapshot=caminho)
+                self.assertEqual(idx, esperado)
+                resultado = gerar_resultado(["ABC"], idx, 4, snapshot=caminho)
+                self.assertEqual(resultado.codigos, ["ABC0003"])
+                # A sincronização não pode "consertar" o crc32 de um arquivo corrompido
+                self.assertIsNone(snapshot_atual(self.base, 4, "aba1"))
+
+    def test_pipeline_com_snapshot_corrompido(self):
+        caminho = self._compilar()
+        self._corromper(caminho, "crc")
+        entrada = os.path.join(self.pasta, "siglas.csv")
+        with open(entrada, "w", encoding="utf-8") as f:
+            f.write("ABC\nSET\n")
+        destino = os.path.join(self.pasta, "saida.csv")
+        processar_arquivos(self.base, [entrada], 4, usar_cache=False, usar_ledger=False, destino=destino)
+        with open(destino, encoding="utf-8") as f:
+            self.assertEqual(list(csv.reader(f))[1:], [["ABC", "ABC0003"], ["SET", "SET0002"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,41 +2,67 @@ import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from tkinter import filedialog, messagebox, simpledialog
 import tkinter as tk
-import pandas as pd
-import json
-
-from core.code_generator import proximo_codigo
-from core.excel_processor import (
-    carregar_codigos_existentes,
-    extrair_siglas,
-    salvar_resultado
-)
-from core.fast_code_generator import gerar_codigos_em_lote
-from utils.helpers import letra_para_coluna
+import importlib
+import os
+import queue
+import threading
+
+# openpyxl/sqlite3 (via core.*) não são importados aqui: a janela abre sem
+# eles e _precarregar os importa em segundo plano logo após o primeiro desenho.
 from config.texts import TEXTS
 
 from ui.help import show_help  # removido create_github_link aqui (reutilizado apenas na ajuda)
 from ui.theme import apply_theme, AVAILABLE_THEMES
 
 
+INTERVALO_FILA_MS = 100  # período de leitura da fila de progresso do worker
+WORKERS_PIPELINE = 2  # base e siglas lidas em processos separados, em paralelo
+VAR_PERFIL = "GERADOR_CODIGOS_PERFIL"  # se definida, cada execução é perfilada (cProfile) neste arquivo
+MODULOS_PRECARGA = ("core.pipeline",)  # puxa core.excel_processor, openpyxl e sqlite3
+COLUNAS_METRICAS = (("etapa", "Etapa", 260), ("tempo", "Tempo (s)", 80), ("cpu", "CPU (s)", 80),
+                    ("linhas", "Linhas", 80), ("vazao", "Linhas/s", 90), ("rss", "Pico RSS (MiB)", 100))
+
+
 class App:
     def __init__(self, root):
         print("Classe App correta carregada de:", __file__)
         self.root = root
         self.root.title(TEXTS["app_title"])
-        self.root.minsize(560, 420)
+        self.root.minsize(560, 560)
 
         # ===== Estado =====
         self.base_path = ""
+        self.base_aba = "aba1"
         self.siglas_path = ""
         self.modo_tres_siglas = ttk.BooleanVar()
+        self.saida_separada = ttk.BooleanVar()
         self.theme_var = tk.StringVar(value="flatly")
         self.style = apply_theme(self.theme_var.get())
 
+        # ===== Worker (processamento fora da thread do Tk) =====
+        self._worker = None
+        self._fila = queue.Queue()
+        self._cancelar = threading.Event()
+        self._fechar_ao_terminar = False
+
         # ===== UI =====
         self._build_ui()
         self._bind_shortcuts()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
         self._set_status("Pronto")
+        # Depois das tarefas de desenho já enfileiradas: a janela aparece antes da carga
+        self.root.after_idle(self._precarregar)
+
+    @staticmethod
+    def _precarregar():
+        """Importa os módulos pesados numa thread, para o primeiro uso não esperar por eles."""
+        def importar():
+            for nome in MODULOS_PRECARGA:
+                try:
+                    importlib.import_module(nome)
+                except Exception:
+                    pass  # o erro reaparece (e é tratado) no uso real
+        threading.Thread(target=importar, name="precarga", daemon=True).start()
 
     # ---------- UI ----------
     def _build_ui(self):
@@ -90,16 +116,45 @@ class App:
             variable=self.modo_tres_siglas,
             bootstyle="info"
         ).pack(anchor=W, pady=4)
+        ttk.Checkbutton(
+            card_opts,
+            text="Salvar resultado em arquivo separado",
+            variable=self.saida_separada,
+            bootstyle="info"
+        ).pack(anchor=W, pady=4)
 
         # Card: Ações
         card_actions = ttk.Labelframe(content, text="Ações", style="Card.TLabelframe", padding=10)
         card_actions.grid(row=0, column=2, sticky="nsew", padx=(6, 0), pady=6)
 
-        ttk.Button(card_actions, text="▶️ Processar", command=self.processar, bootstyle=PRIMARY)\
-            .pack(fill=X, pady=4)
+        self.btn_processar = ttk.Button(card_actions, text="▶️ Processar", command=self.processar, bootstyle=PRIMARY)
+        self.btn_processar.pack(fill=X, pady=4)
+        self.btn_cancelar = ttk.Button(card_actions, text="⏹️ Cancelar", command=self.cancelar,
+                                       bootstyle=DANGER, state=DISABLED)
+        self.btn_cancelar.pack(fill=X, pady=4)
         ttk.Button(card_actions, text="❓ Ajuda", command=lambda: show_help(self.root), bootstyle=SUCCESS)\
             .pack(fill=X, pady=4)
 
+        # Card: Última execução (métricas por etapa; etapas internas recuadas)
+        card_metricas = ttk.Labelframe(content, text="Última execução", style="Card.TLabelframe", padding=10)
+        card_metricas.grid(row=1, column=0, columnspan=3, sticky="nsew", pady=6)
+        card_metricas.columnconfigure(0, weight=1)
+        card_metricas.rowconfigure(0, weight=1)
+        content.rowconfigure(1, weight=2)
+
+        self.tabela_metricas = ttk.Treeview(card_metricas, columns=[c for c, _, _ in COLUNAS_METRICAS],
+                                            show="headings", height=6)
+        for coluna, titulo, largura in COLUNAS_METRICAS:
+            self.tabela_metricas.heading(coluna, text=titulo)
+            self.tabela_metricas.column(coluna, width=largura, anchor=W if coluna == "etapa" else E,
+                                        stretch=coluna == "etapa")
+        self.tabela_metricas.grid(row=0, column=0, sticky="nsew")
+        barra = ttk.Scrollbar(card_metricas, orient=VERTICAL, command=self.tabela_metricas.yview)
+        barra.grid(row=0, column=1, sticky="ns")
+        self.tabela_metricas.configure(yscrollcommand=barra.set)
+        self.resumo_metricas = ttk.Label(card_metricas, text="Nenhuma execução ainda", style="Status.TLabel")
+        self.resumo_metricas.grid(row=1, column=0, columnspan=2, sticky="w", pady=(6, 0))
+
         # Rodapé (status + made by centralizado) — sem ícone do GitHub
         footer = ttk.Frame(root, padding=(12, 8, 12, 12))
         footer.grid(row=2, column=0, sticky="ew")
@@ -115,6 +170,9 @@ class App:
 
         # coluna 2 propositalmente vazia (sem GitHub aqui)
 
+        self.progress = ttk.Progressbar(footer, mode="determinate", maximum=100, bootstyle="info-striped")
+        self.progress.grid(row=1, column=0, columnspan=3, sticky="ew", pady=(6, 0))
+
     def _bind_shortcuts(self):
         self.root.bind("<Control-o>", lambda e: self.load_base())
         self.root.bind("<Control-i>", lambda e: self.load_entrada())
@@ -128,20 +186,46 @@ class App:
         self.status_label.configure(text=msg)
         self.root.update_idletasks()
 
+    def _digitos(self) -> int:
+        return 3 if self.modo_tres_siglas.get() else 4
+
+    def _executando(self) -> bool:
+        return self._worker is not None and self._worker.is_alive()
+
+    def _set_executando(self, ativo: bool):
+        self.btn_processar.configure(state=DISABLED if ativo else NORMAL)
+        self.btn_cancelar.configure(state=NORMAL if ativo else DISABLED)
+
+    def _on_close(self):
+        # Nunca encerra no meio de uma gravação: cancela e fecha quando o worker terminar
+        if self._executando():
+            self._fechar_ao_terminar = True
+            self.cancelar()
+        else:
+            self.root.destroy()
+
     # ---------- Fluxo ----------
     def load_base(self):
         path = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx")])
         if path:
+            from core.excel_processor import abas_da_planilha  # normalmente já pré-carregado
             self._set_status("Carregando base...")
             self.base_path = path
+            self.base_aba = "aba1"
+            # Só confere a aba aqui (rápido); o índice é montado no processamento, fora da thread do Tk
             try:
-                carregar_codigos_existentes(self.base_path)
+                if self.base_aba not in abas_da_planilha(self.base_path):
+                    raise KeyError(self.base_aba)
                 messagebox.showinfo("Sucesso", "Base de códigos carregada!")
                 self._set_status("Base carregada")
             except Exception:
-                aba_manual = simpledialog.askstring("Erro", "Erro ao ler a aba 'aba1'. Digite o nome correto:")
+                from core.excel_processor import resolver_regioes
+                aba_manual = simpledialog.askstring(
+                    "Erro", "Erro ao ler a aba 'aba1'. Digite o nome correto\n"
+                            "(várias abas/colunas: aba1!A:D;aba2 — ou * para todas as abas):")
                 try:
-                    carregar_codigos_existentes(self.base_path, aba=aba_manual)
+                    resolver_regioes(self.base_path, aba_manual)  # KeyError se faltar alguma aba
+                    self.base_aba = aba_manual
                     messagebox.showinfo("Sucesso", f"Base carregada da aba '{aba_manual}'!")
                     self._set_status("Base carregada")
                 except Exception as e:
@@ -156,52 +240,157 @@ class App:
             self._set_status("Entrada carregada")
 
     def processar(self):
+        if self._executando():
+            return
         if not self.base_path or not self.siglas_path:
             messagebox.showerror("Erro", "Selecione ambos os arquivos.")
             return
 
         # Padrões
-        aba_siglas = "SIGLAS"
-        col_siglas = "A"
-        aba_saida = "RESULTADO"
+        self._iniciar_worker(aba_siglas="SIGLAS", col_siglas="A", tentativa=1)
+
+    def cancelar(self):
+        if self._executando():
+            self._cancelar.set()
+            self.btn_cancelar.configure(state=DISABLED)
+            self._set_status("Cancelando...")
+
+    def _iniciar_worker(self, aba_siglas: str, col_siglas: str, tentativa: int):
+        params = {
+            "base_path": self.base_path,
+            "base_aba": self.base_aba,
+            "siglas_path": self.siglas_path,
+            "aba_siglas": aba_siglas,
+            "col_siglas": col_siglas,
+            "aba_saida": "RESULTADO",
+            "digitos": self._digitos(),  # lido aqui: o worker não toca em variáveis do Tk
+            "saida_separada": self.saida_separada.get(),
+            "tentativa": tentativa,
+        }
+        self._fila = queue.Queue()
+        self._cancelar = threading.Event()
+        self.progress.configure(value=0)
+        self._set_executando(True)
+        self._set_status("Lendo base e siglas...")
+        self._worker = threading.Thread(target=self._executar, args=(params, self._fila, self._cancelar),
+                                        daemon=True)
+        self._worker.start()
+        self.root.after(INTERVALO_FILA_MS, self._acompanhar)
+
+    @staticmethod
+    def _executar(p: dict, fila: queue.Queue, cancelar: threading.Event):
+        """
+        Roda na thread do worker: nenhuma chamada ao Tk aqui, só mensagens na fila.
+        Base e siglas são lidas em paralelo (pipeline.processar_arquivos em pipeline).
+        O cancelamento é verificado a cada aviso de progresso; a gravação é atômica
+        (arquivo temporário + rename), então o arquivo nunca fica pela metade.
+        """
+        try:
+            from core.excel_processor import MODO_ARQUIVO, MODO_INJETAR
+            from core.metricas import caminho_metricas_padrao
+            from core.pipeline import Cancelado, Cronometro, ErroBase, ErroEntrada, processar_arquivos
+        except ImportError as e:
+            fila.put(("erro", "Erro ao iniciar", f"Dependência ausente: {e}"))
+            return
 
-        # Converte letra -> número (helpers.py)
-        col_num = letra_para_coluna(col_siglas)
+        def progresso(etapa: str, atual: int, total: int):
+            fila.put(("progresso", etapa, atual, total))
 
-        self._set_status("Lendo siglas...")
+        cronometro = Cronometro()
         try:
-            df_siglas = extrair_siglas(self.siglas_path, aba_siglas, col_num)
-        except Exception:
-            aba_siglas = simpledialog.askstring("Erro", "Erro ao ler a aba 'SIGLAS'. Digite o nome correto:")
-            col_siglas = simpledialog.askstring("Erro", "Erro ao ler a coluna 'A'. Digite a letra correta:")
-            col_num = letra_para_coluna(col_siglas)
-            try:
-                df_siglas = extrair_siglas(self.siglas_path, aba_siglas, col_num)
-            except Exception as e:
+            (arquivo, aba, _), = processar_arquivos(
+                p["base_path"], [p["siglas_path"]], p["digitos"],
+                aba_base=p["base_aba"], aba_siglas=p["aba_siglas"], coluna=p["col_siglas"],
+                aba_saida=p["aba_saida"], cronometro=cronometro, workers=WORKERS_PIPELINE,
+                modo_saida=MODO_ARQUIVO if p["saida_separada"] else MODO_INJETAR, progresso=progresso, cancelar=cancelar,
+                arquivo_metricas=caminho_metricas_padrao(), arquivo_perfil=os.environ.get(VAR_PERFIL),
+            )
+            fim = ("concluido", arquivo, aba)
+        except Cancelado:
+            fim = ("cancelado",)
+        except ErroBase as e:
+            fim = ("erro", "Erro ao carregar base", f"Erro ao carregar a base: {e}")
+        except ErroEntrada as e:
+            if e.etapa == "leitura":
+                fim = ("erro_siglas", p, e.causa)
+            else:
+                fim = ("erro", "Erro no processamento", f"Erro ao processar: {e.causa}")
+        except Exception as e:
+            fim = ("erro", "Erro no processamento", f"Erro ao processar: {e}")
+        # Antes do resultado: o painel já está atualizado quando a caixa de mensagem abrir
+        fila.put(("metricas", cronometro.para_dicts(), cronometro.decorrido(), cronometro.total(),
+                  cronometro.cpu_total(), cronometro.pico_rss_mb()))
+        fila.put(fim)
+
+    def _acompanhar(self):
+        """Consome a fila do worker (thread do Tk) e reagenda enquanto houver trabalho."""
+        try:
+            while True:
+                msg = self._fila.get_nowait()
+                self._tratar_mensagem(msg)
+        except queue.Empty:
+            pass
+
+        if self._executando():
+            self.root.after(INTERVALO_FILA_MS, self._acompanhar)
+        elif not self._fila.empty():
+            self.root.after_idle(self._acompanhar)
+        elif self._fechar_ao_terminar:
+            self.root.destroy()
+
+    def _tratar_mensagem(self, msg: tuple):
+        tipo = msg[0]
+        if tipo == "progresso":
+            _, etapa, atual, total = msg
+            self.progress.configure(value=100 * atual / total if total else 0)
+            self._set_status(f"{etapa}... {atual}/{total}")
+        elif tipo == "status":
+            self.progress.configure(value=0)
+            self._set_status(msg[1])
+        elif tipo == "concluido":
+            self._set_executando(False)
+            self.progress.configure(value=100)
+            _, arquivo, aba = msg
+            self._set_status(f"Concluído: aba '{aba}'")
+            messagebox.showinfo("Sucesso", f"{TEXTS['msg_final']}\n\n{arquivo} (aba '{aba}')")
+        elif tipo == "metricas":
+            self._mostrar_metricas(*msg[1:])
+        elif tipo == "cancelado":
+            self._set_executando(False)
+            self.progress.configure(value=0)
+            self._set_status("Cancelado (nenhum arquivo alterado)")
+        elif tipo == "erro":
+            _, status, texto = msg
+            self._set_executando(False)
+            messagebox.showerror("Erro", texto)
+            self._set_status(status)
+        elif tipo == "erro_siglas":
+            _, p, e = msg
+            self._set_executando(False)
+            if p["tentativa"] > 1 or self._fechar_ao_terminar:
                 messagebox.showerror("Erro", f"Erro ao extrair siglas: {e}")
                 self._set_status("Erro ao ler siglas")
                 return
-
-        self._set_status("Processando...")
-        # Carrega base (json gerado anteriormente)
-        with open("codigos.json") as f:
-            df_base = pd.DataFrame(json.load(f))
-
-        # Geração em lote otimizada
-        digitos = 3 if self.modo_tres_siglas.get() else 4
-        siglas_lista = [s if (isinstance(s, str) or pd.isna(s)) else None for s in df_siglas["Sigla"].tolist()]
-        novos = gerar_codigos_em_lote(siglas_lista, df_base, digitos=digitos)
-
-        # Atualiza df_base conforme antes
-        novos_validos = [c for c in novos if c is not None]
-        if novos_validos:
-            df_base = pd.concat([df_base, pd.DataFrame({"Codigo": novos_validos})], ignore_index=True)
-
-        df_result = pd.DataFrame({
-            "Sigla": df_siglas["Sigla"],
-            "Proximo_Codigo": novos
-        })
-
-        salvar_resultado(self.siglas_path, aba_saida, df_result)
-        self._set_status("Concluído")
-        messagebox.showinfo("Sucesso", TEXTS["msg_final"])
\ No newline at end of file
+            # Fora do laço de _acompanhar: o novo worker agenda seu próprio acompanhamento
+            self.root.after_idle(self._perguntar_aba_siglas)
+
+    def _mostrar_metricas(self, medidas: list, decorrido: float, soma: float, cpu: float, pico_rss):
+        self.tabela_metricas.delete(*self.tabela_metricas.get_children())
+        for m in sorted(medidas, key=lambda m: m["inicio"]):
+            self.tabela_metricas.insert("", END, values=(
+                "    " * m["nivel"] + m["nome"],
+                f"{m['duracao_s']:.3f}",
+                f"{m['cpu_s']:.3f}",
+                "" if m["linhas"] is None else f"{m['linhas']:,}".replace(",", "."),
+                "" if m["vazao"] is None else f"{m['vazao']:,.0f}".replace(",", "."),
+                "" if m["pico_rss_mb"] is None else f"{m['pico_rss_mb']:.0f}",
+            ))
+        resumo = f"Decorrido: {decorrido:.2f} s · soma das etapas: {soma:.2f} s · CPU: {cpu:.2f} s"
+        if pico_rss is not None:
+            resumo += f" · pico RSS: {pico_rss:.0f} MiB"
+        self.resumo_metricas.configure(text=resumo)
+
+    def _perguntar_aba_siglas(self):
+        aba_siglas = simpledialog.askstring("Erro", "Erro ao ler a aba 'SIGLAS'. Digite o nome correto:")
+        col_siglas = simpledialog.askstring("Erro", "Erro ao ler a coluna 'A'. Digite a letra correta:")
+        self._iniciar_worker(aba_siglas, col_siglas, tentativa=2)